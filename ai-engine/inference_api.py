@@ -1,11 +1,41 @@
-from fastapi import FastAPI
+import os
+from pathlib import Path
+from typing import Annotated, Optional
+
+import pandas as pd
+from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel, Field
 
-from models.energy_predictor import predict_next_day
-from models.anomaly_detector import AnomalyResult, load_detector
-from models.waste_model import WasteEmissionModel
+if os.getenv("INFERENCE_BACKEND", "torch") == "onnx":
+    # onnxruntime only: the torch-free backend keeps torch out of inference-only containers
+    from models.onnx_backend import (
+        ENERGY_ONNX_PATH as ENERGY_MODEL_PATH,
+        load_energy_session as load_model,
+        predict_next_day,
+        predict_next_day_batch,
+    )
+else:
+    from models.energy_predictor import MODEL_PATH as ENERGY_MODEL_PATH, load_model, predict_next_day, predict_next_day_batch
+from models.anomaly_detector import MODEL_PATH as ANOMALY_MODEL_PATH, AnomalyResult, load_detector
+from models.device_anomaly import MODEL_DIR as DEVICE_MODEL_DIR, DeviceModelCache
+from models.model_holder import ModelHolder
+from models.waste_model import MODEL_PATH as WASTE_MODEL_PATH, WasteEmissionModel
+from services.common import register_metrics_endpoint
 
 app = FastAPI(title="ZeroCraftr AI Engine", version="0.1.0")
+register_metrics_endpoint(app)
+
+energy_predictor = ModelHolder("energy_predictor", Path(os.getenv("ENERGY_MODEL_PATH", str(ENERGY_MODEL_PATH))), load_model)
+if os.getenv("INFERENCE_BACKEND", "torch") == "onnx":
+    # there is no untrained fallback for an exported graph, so refuse to start without one
+    energy_predictor.get()
+anomaly_detector = ModelHolder("anomaly_detector", ANOMALY_MODEL_PATH, load_detector)
+waste_model = ModelHolder("waste_model", WASTE_MODEL_PATH, WasteEmissionModel)
+_HOLDERS = (energy_predictor, anomaly_detector, waste_model)
+device_models = DeviceModelCache(
+    Path(os.getenv("DEVICE_MODEL_DIR", str(DEVICE_MODEL_DIR))),
+    max_models=int(os.getenv("DEVICE_MODEL_CACHE_SIZE", "128")),
+)
 
 
 class EnergyForecastRequest(BaseModel):
@@ -24,6 +54,35 @@ class AnomalyDetectionResponse(BaseModel):
     anomalies: list[AnomalyResult]
 
 
+class AnomalyColumnarRequest(BaseModel):
+    series: list[float] = Field(min_length=1)
+    only_anomalies: bool = False
+
+
+class AnomalyColumnarResponse(BaseModel):
+    count: int
+    anomaly_indices: list[int]
+    z_scores: Optional[list[float]] = None
+
+
+class DeviceReading(BaseModel):
+    temperature: Optional[float] = None
+    pressure: Optional[float] = None
+    vibration: Optional[float] = None
+    power_usage: Optional[float] = None
+
+
+class DeviceAnomalyRequest(BaseModel):
+    device_id: str
+    device_type: Optional[str] = None
+    readings: list[DeviceReading] = Field(min_length=1)
+
+
+class DeviceAnomalyResponse(BaseModel):
+    count: int
+    anomaly_indices: list[int]
+
+
 class WasteEstimationRequest(BaseModel):
     waste_kg: float = Field(gt=0)
 
@@ -32,31 +91,96 @@ class WasteEstimationResponse(BaseModel):
     co2e_prediction: float
 
 
+class EnergyForecastBatchRequest(BaseModel):
+    load_curves: list[Annotated[list[float], Field(min_length=24, max_length=24)]] = Field(min_length=1)
+
+
+class EnergyForecastBatchResponse(BaseModel):
+    predictions_kwh: list[float]
+
+
+class AnomalyDetectionBatchRequest(BaseModel):
+    series: list[Annotated[list[float], Field(min_length=1)]] = Field(min_length=1)
+
+
+class AnomalyDetectionBatchResponse(BaseModel):
+    anomalies: list[list[AnomalyResult]]
+
+
+class WasteEstimationBatchRequest(BaseModel):
+    waste_kg: list[Annotated[float, Field(gt=0)]] = Field(min_length=1)
+
+
+class WasteEstimationBatchResponse(BaseModel):
+    co2e_predictions: list[float]
+
+
 @app.post("/forecast/energy", response_model=EnergyForecastResponse)
 def forecast_energy(payload: EnergyForecastRequest) -> EnergyForecastResponse:
-    prediction = predict_next_day(payload.load_curve)
+    prediction = predict_next_day(payload.load_curve, model=energy_predictor.get())
     return EnergyForecastResponse(prediction_kwh=prediction)
 
 
 @app.post("/detect/anomalies", response_model=AnomalyDetectionResponse)
 def detect_anomalies(payload: AnomalyDetectionRequest) -> AnomalyDetectionResponse:
-    detector = load_detector()
-    results = detector.predict(payload.series)
+    results = anomaly_detector.get().predict(payload.series)
     return AnomalyDetectionResponse(anomalies=results)
 
 
+@app.post("/detect/anomalies/columnar", response_model=AnomalyColumnarResponse)
+def detect_anomalies_columnar(payload: AnomalyColumnarRequest) -> AnomalyColumnarResponse:
+    scores = anomaly_detector.get().score(payload.series)
+    return AnomalyColumnarResponse(
+        count=len(scores.values),
+        anomaly_indices=scores.anomalous_indices.tolist(),
+        z_scores=None if payload.only_anomalies else scores.z_scores.tolist(),
+    )
+
+
+@app.post("/detect/anomalies/device", response_model=DeviceAnomalyResponse)
+def detect_device_anomalies(payload: DeviceAnomalyRequest) -> DeviceAnomalyResponse:
+    model = device_models.get(payload.device_id, payload.device_type)
+    if model is None:
+        raise HTTPException(status_code=404, detail=f"No anomaly model for device {payload.device_id}")
+    readings = pd.DataFrame([reading.model_dump() for reading in payload.readings], dtype=float)
+    scores = model.score(readings)
+    return DeviceAnomalyResponse(count=len(payload.readings), anomaly_indices=scores.anomalous_indices.tolist())
+
+
 @app.post("/estimate/waste", response_model=WasteEstimationResponse)
 def estimate_waste(payload: WasteEstimationRequest) -> WasteEstimationResponse:
-    model = WasteEmissionModel()
-    prediction = model.predict(payload.waste_kg)
+    prediction = waste_model.get().predict(payload.waste_kg)
     return WasteEstimationResponse(co2e_prediction=prediction)
 
 
+@app.post("/forecast/energy/batch", response_model=EnergyForecastBatchResponse)
+def forecast_energy_batch(payload: EnergyForecastBatchRequest) -> EnergyForecastBatchResponse:
+    predictions = predict_next_day_batch(payload.load_curves, model=energy_predictor.get())
+    return EnergyForecastBatchResponse(predictions_kwh=predictions)
+
+
+@app.post("/detect/anomalies/batch", response_model=AnomalyDetectionBatchResponse)
+def detect_anomalies_batch(payload: AnomalyDetectionBatchRequest) -> AnomalyDetectionBatchResponse:
+    results = anomaly_detector.get().predict_many(payload.series)
+    return AnomalyDetectionBatchResponse(anomalies=results)
+
+
+@app.post("/estimate/waste/batch", response_model=WasteEstimationBatchResponse)
+def estimate_waste_batch(payload: WasteEstimationBatchRequest) -> WasteEstimationBatchResponse:
+    predictions = waste_model.get().predict_many(payload.waste_kg)
+    return WasteEstimationBatchResponse(co2e_predictions=predictions)
+
+
 @app.get("/healthz")
 def healthcheck() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/models/status")
+def models_status() -> dict[str, object]:
+    return {"models": [holder.status() for holder in _HOLDERS], "device_models_cached": len(device_models)}
+
+
 if __name__ == "__main__":
     import uvicorn
 
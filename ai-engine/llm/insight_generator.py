@@ -1,20 +1,20 @@
 from __future__ import annotations
 
 import json
+import logging
+import queue
 import random
+import threading
+import time
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Iterator, List, Optional, Sequence
 
 import numpy as np
 from prometheus_client import Summary
 
 _INSIGHT_TIME = Summary("insight_generation_time", "Time to generate sustainability insights (seconds)")
 
-try:
-    from transformers import AutoModelForCausalLM, AutoTokenizer  # type: ignore
-except Exception:  # pragma: no cover - optional dependency
-    AutoModelForCausalLM = None
-    AutoTokenizer = None
+logger = logging.getLogger(__name__)
 
 
 class InsightGenerator:
@@ -22,6 +22,11 @@ class InsightGenerator:
     Local insight generator backed by a lightweight transformer. For environments
     without GPU access or offline execution, the generator gracefully falls back
     to template-driven text synthesis while still leveraging the same interface.
+
+    Loading is offline-first: weights come from ``model_dir`` or the local Hugging Face
+    cache unless ``local_files_only`` is disabled. With ``lazy=True`` nothing is loaded
+    (not even ``transformers``) until the first generation, and ``quantize=True`` applies
+    dynamic int8 quantization to the model's Linear layers for CPU inference.
     """
 
     def __init__(
@@ -30,22 +35,72 @@ class InsightGenerator:
         prompt_path: Optional[Path] = None,
         temperature: float = 0.7,
         max_tokens: int = 128,
+        model_dir: Optional[Path] = None,
+        local_files_only: bool = True,
+        quantize: bool = False,
+        lazy: bool = False,
+        stream_timeout: float = 30.0,
     ) -> None:
+        self.model_name = model_name
+        self.model_dir = model_dir
+        self.local_files_only = local_files_only
+        self.quantize = quantize
         self.temperature = temperature
         self.max_tokens = max_tokens
+        self.stream_timeout = stream_timeout
         self.prompt_path = prompt_path or Path(__file__).with_name("prompt_templates.json")
         self.templates = self._load_templates()
         self.model = None
         self.tokenizer = None
+        self.loaded = False
+        self.load_seconds: Optional[float] = None
+        self.load_error: Optional[str] = None
+        self._load_lock = threading.Lock()
+
+        if not lazy:
+            self.load()
+
+    @property
+    def mode(self) -> str:
+        if not self.loaded:
+            return "unloaded"
+        if self.model is None:
+            return "template"
+        return "transformer-int8" if self.quantize else "transformer"
 
-        if AutoModelForCausalLM and AutoTokenizer:
+    @property
+    def seeded(self) -> bool:
+        """Whether ``seed`` determines the output; transformer sampling does not use it."""
+        return self.model is None
+
+    def load(self) -> None:
+        """Load tokenizer and model once; failures leave the generator in template mode."""
+        if self.loaded:
+            return
+        with self._load_lock:
+            if self.loaded:
+                return
+            started = time.perf_counter()
             try:
-                self.tokenizer = AutoTokenizer.from_pretrained(model_name, local_files_only=False)
-                self.model = AutoModelForCausalLM.from_pretrained(model_name, local_files_only=False)
-            except Exception:
-                # Fall back to template mode if model download fails (e.g., offline CI)
+                from transformers import AutoModelForCausalLM, AutoTokenizer  # type: ignore
+
+                source = str(self.model_dir) if self.model_dir and Path(self.model_dir).exists() else self.model_name
+                tokenizer = AutoTokenizer.from_pretrained(source, local_files_only=self.local_files_only)
+                model = AutoModelForCausalLM.from_pretrained(source, local_files_only=self.local_files_only)
+                model.eval()
+                if self.quantize:
+                    import torch
+
+                    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+                self.tokenizer, self.model = tokenizer, model
+            except Exception as exc:
+                # Fall back to template mode if transformers or the weights are unavailable (e.g., offline CI)
+                logger.info("Insight model unavailable, using templates: %s", exc)
                 self.model = None
                 self.tokenizer = None
+                self.load_error = str(exc)
+            self.load_seconds = time.perf_counter() - started
+            self.loaded = True
 
     def _load_templates(self) -> Dict[str, str]:
         if self.prompt_path.exists():
@@ -60,30 +115,112 @@ class InsightGenerator:
             )
         }
 
-    @_INSIGHT_TIME.time()
-    def generate(self, context: Dict[str, str], seed: Optional[int] = 42) -> Dict[str, float | str]:
-        rng = np.random.default_rng(seed)
+    def format_prompt(self, context: Dict[str, str]) -> str:
         template = self.templates.get("baseline")
-        formatted_prompt = template.format(
+        return template.format(
             energy_summary=context.get("energy_summary", "N/A"),
             forecast_summary=context.get("forecast_summary", "N/A"),
             optimization_summary=context.get("optimization_summary", "N/A"),
         )
 
+    def generate(self, context: Dict[str, str], seed: Optional[int] = 42) -> Dict[str, float | str]:
+        return self.generate_batch([context], [seed])[0]
+
+    @_INSIGHT_TIME.time()
+    def generate_batch(
+        self,
+        contexts: Sequence[Dict[str, str]],
+        seeds: Optional[Sequence[Optional[int]]] = None,
+    ) -> List[Dict[str, float | str]]:
+        """
+        Generate insights for several contexts with a single padded ``model.generate`` call.
+        """
+        seeds = list(seeds) if seeds is not None else [42] * len(contexts)
+        if len(seeds) != len(contexts):
+            raise ValueError("Expected one seed per context")
+        if not contexts:
+            return []
+        self.load()
+        rngs = [np.random.default_rng(seed) for seed in seeds]
+
         if self.model and self.tokenizer:
-            input_ids = self.tokenizer.encode(formatted_prompt, return_tensors="pt")
+            prompts = [self.format_prompt(context) for context in contexts]
+            # Decoder-only models continue from the last position, so pad prompts on the left
+            self.tokenizer.padding_side = "left"
+            if self.tokenizer.pad_token is None:
+                self.tokenizer.pad_token = self.tokenizer.eos_token
+            encoded = self.tokenizer(prompts, return_tensors="pt", padding=True)
+            prompt_length = encoded["input_ids"].shape[1]
             output_ids = self.model.generate(
-                input_ids,
-                max_length=min(self.max_tokens + input_ids.shape[1], 256),
+                **encoded,
+                max_length=min(self.max_tokens + prompt_length, 256),
                 temperature=self.temperature,
                 do_sample=True,
                 pad_token_id=self.tokenizer.eos_token_id,
             )
-            generated = self.tokenizer.decode(output_ids[0], skip_special_tokens=True)
-            insight_text = generated[len(formatted_prompt) :].strip()
+            texts = [self.tokenizer.decode(ids[prompt_length:], skip_special_tokens=True).strip() for ids in output_ids]
+        else:
+            texts = [self._template_generate(context, rng) for context, rng in zip(contexts, rngs)]
+
+        return [self._finalize(insight_text, rng) for insight_text, rng in zip(texts, rngs)]
+
+    def stream(self, context: Dict[str, str], seed: Optional[int] = 42) -> Iterator[Dict[str, float | str]]:
+        """
+        Yield ``{"delta": text}`` chunks as tokens are produced, then the final
+        ``{"insight", "confidence"}`` payload returned by ``generate``. If generation fails, or
+        no token arrives within ``stream_timeout`` seconds, the last item is ``{"error": message}``.
+        """
+        self.load()
+        rng = np.random.default_rng(seed)
+        chunks: List[str] = []
+        if self.model and self.tokenizer:
+            from transformers import TextIteratorStreamer  # type: ignore
+
+            encoded = self.tokenizer(self.format_prompt(context), return_tensors="pt")
+            streamer = TextIteratorStreamer(
+                self.tokenizer, skip_prompt=True, skip_special_tokens=True, timeout=self.stream_timeout
+            )
+            failure: List[BaseException] = []
+
+            def run_generate() -> None:
+                try:
+                    self.model.generate(
+                        **encoded,
+                        max_length=min(self.max_tokens + encoded["input_ids"].shape[1], 256),
+                        temperature=self.temperature,
+                        do_sample=True,
+                        pad_token_id=self.tokenizer.eos_token_id,
+                        streamer=streamer,
+                    )
+                except Exception as exc:
+                    logger.exception("Streaming insight generation failed")
+                    failure.append(exc)
+                    # unblock the consumer waiting on the streamer
+                    streamer.end()
+
+            worker = threading.Thread(target=run_generate, daemon=True)
+            worker.start()
+            try:
+                for text in streamer:
+                    if text:
+                        chunks.append(text)
+                        yield {"delta": text}
+            except queue.Empty:
+                yield {"error": f"No tokens generated within {self.stream_timeout:g}s"}
+                return
+            worker.join()
+            if failure:
+                yield {"error": str(failure[0]) or type(failure[0]).__name__}
+                return
         else:
-            insight_text = self._template_generate(context, rng)
+            words = self._template_generate(context, rng).split(" ")
+            for idx, word in enumerate(words):
+                text = word if idx == 0 else f" {word}"
+                chunks.append(text)
+                yield {"delta": text}
+        yield self._finalize("".join(chunks).strip(), rng)
 
+    def _finalize(self, insight_text: str, rng: np.random.Generator) -> Dict[str, float | str]:
         confidence = float(np.clip(0.75 + rng.random() * 0.2, 0.75, 0.95))
         return {"insight": insight_text or "Optimize shift schedules to align with off-peak energy windows.", "confidence": confidence}
 
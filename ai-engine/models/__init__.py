@@ -1,2 +1,18 @@
-from .intelligent_forecaster import IntelligentForecaster, ForecastResult
-from .optimizer import OptimizationEngine, EquipmentConfig, OptimizationResult
\ No newline at end of file
+from importlib import import_module
+
+# Resolved on first access so importing a torch-free submodule (e.g. models.onnx_backend)
+# does not pull in the forecaster and torch.
+_EXPORTS = {
+    "IntelligentForecaster": ".intelligent_forecaster",
+    "ForecastResult": ".intelligent_forecaster",
+    "OptimizationEngine": ".optimizer",
+    "EquipmentConfig": ".optimizer",
+    "OptimizationResult": ".optimizer",
+}
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(_EXPORTS[name], __name__), name)
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from typing import Iterable, List
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional
 
 import numpy as np
 from joblib import dump, load
@@ -16,6 +18,26 @@ class AnomalyResult(BaseModel):
     is_anomaly: bool
 
 
+@dataclass
+class AnomalyScores:
+    """Columnar detector output; aligned arrays avoid building one object per point."""
+
+    values: np.ndarray
+    z_scores: np.ndarray
+    is_anomaly: np.ndarray
+
+    @property
+    def anomalous_indices(self) -> np.ndarray:
+        return np.flatnonzero(self.is_anomaly)
+
+    def to_results(self) -> List[AnomalyResult]:
+        # Arrays are already typed, so skip per-point pydantic validation
+        return [
+            AnomalyResult.model_construct(value=value, z_score=z_score, is_anomaly=flag)
+            for value, z_score, flag in zip(self.values.tolist(), self.z_scores.tolist(), self.is_anomaly.tolist())
+        ]
+
+
 class EnergyAnomalyDetector:
     def __init__(self) -> None:
         self.model = IsolationForest(contamination=0.05, random_state=42)
@@ -28,25 +50,42 @@ class EnergyAnomalyDetector:
         dump(self.model, MODEL_PATH)
 
     def predict(self, series: Iterable[float]) -> List[AnomalyResult]:
-        arr = np.array(list(series)).reshape(-1, 1)
-        if len(arr) == 0:
+        return self.score(series).to_results()
+
+    def predict_many(self, series_batch: Iterable[Iterable[float]]) -> List[List[AnomalyResult]]:
+        return [scores.to_results() for scores in self.score_many(series_batch)]
+
+    def score(self, series: Iterable[float]) -> AnomalyScores:
+        return self.score_many([series])[0]
+
+    def score_many(self, series_batch: Iterable[Iterable[float]]) -> List[AnomalyScores]:
+        """Score several series with one ``decision_function`` call; z-scores stay per series."""
+        arrays = [np.asarray(series if isinstance(series, np.ndarray) else list(series), dtype=float) for series in series_batch]
+        if not arrays:
             return []
-        predictions = self.model.predict(arr)
-        scores = self.model.decision_function(arr)
-        mean = arr.mean()
-        std = arr.std() or 1
-        results = []
-        for value, prediction, score in zip(arr.flatten(), predictions, scores):
-            z_score = (value - mean) / std
-            is_anomaly = prediction == -1 or abs(z_score) > 3
-            results.append(AnomalyResult(value=float(value), z_score=float(z_score), is_anomaly=is_anomaly))
-        return results
-
-
-def load_detector() -> EnergyAnomalyDetector:
+        lengths = [len(arr) for arr in arrays]
+        if sum(lengths) == 0:
+            decision = np.empty(0)
+        else:
+            decision = self.model.decision_function(np.concatenate(arrays).reshape(-1, 1))
+        batch_scores: List[AnomalyScores] = []
+        for arr, series_decision in zip(arrays, np.split(decision, np.cumsum(lengths)[:-1])):
+            if len(arr) == 0:
+                empty = np.empty(0)
+                batch_scores.append(AnomalyScores(values=empty, z_scores=empty, is_anomaly=np.empty(0, dtype=bool)))
+                continue
+            std = arr.std() or 1
+            z_scores = (arr - arr.mean()) / std
+            # IsolationForest.predict flags exactly the points with a negative decision score
+            is_anomaly = (series_decision < 0) | (np.abs(z_scores) > 3)
+            batch_scores.append(AnomalyScores(values=arr, z_scores=z_scores, is_anomaly=is_anomaly))
+        return batch_scores
+
+
+def load_detector(path: Optional[Path] = None) -> EnergyAnomalyDetector:
     detector = EnergyAnomalyDetector()
     try:
-        detector.model = load(MODEL_PATH)
+        detector.model = load(path or MODEL_PATH)
     except FileNotFoundError:
         detector.model.fit(np.linspace(0.5, 1.5, 100).reshape(-1, 1))
     return detector
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from joblib import dump, load
+from sklearn.ensemble import IsolationForest
+
+FEATURE_COLUMNS: Tuple[str, ...] = ("temperature", "pressure", "vibration", "power_usage")
+MODEL_DIR = Path(__file__).resolve().parent / 'artifacts' / 'devices'
+_MIN_TRAINING_ROWS = 10
+
+
+@dataclass
+class DeviceAnomalyScores:
+    z_scores: np.ndarray  # (readings, features)
+    decision: np.ndarray
+    is_anomaly: np.ndarray
+
+    @property
+    def anomalous_indices(self) -> np.ndarray:
+        return np.flatnonzero(self.is_anomaly)
+
+
+class DeviceAnomalyModel:
+    """
+    IsolationForest over a device's temperature, pressure, vibration and power readings.
+    Missing readings are imputed with the training medians; a point is anomalous when the
+    forest scores it negative or any feature lies more than 3 standard deviations out.
+    """
+
+    def __init__(self, features: Sequence[str] = FEATURE_COLUMNS, contamination: float = 0.05) -> None:
+        self.features = tuple(features)
+        self.model = IsolationForest(contamination=contamination, random_state=42, n_jobs=1)
+        self.medians = np.zeros(len(self.features))
+        self.means = np.zeros(len(self.features))
+        self.stds = np.ones(len(self.features))
+
+    def _matrix(self, readings: pd.DataFrame) -> np.ndarray:
+        matrix = readings.reindex(columns=list(self.features)).to_numpy(dtype=float)
+        return np.where(np.isnan(matrix), self.medians, matrix)
+
+    def fit(self, readings: pd.DataFrame) -> "DeviceAnomalyModel":
+        matrix = readings.reindex(columns=list(self.features)).to_numpy(dtype=float)
+        if len(matrix) < _MIN_TRAINING_ROWS:
+            raise ValueError(f'Need at least {_MIN_TRAINING_ROWS} readings to train a device model')
+        with np.errstate(all="ignore"):
+            medians = np.nanmedian(matrix, axis=0)
+        self.medians = np.nan_to_num(medians)
+        matrix = self._matrix(readings)
+        self.means = matrix.mean(axis=0)
+        self.stds = np.where(matrix.std(axis=0) == 0, 1.0, matrix.std(axis=0))
+        self.model.fit(matrix)
+        return self
+
+    def score(self, readings: pd.DataFrame) -> DeviceAnomalyScores:
+        matrix = self._matrix(readings)
+        if len(matrix) == 0:
+            empty = np.empty(0)
+            return DeviceAnomalyScores(np.empty((0, len(self.features))), empty, np.empty(0, dtype=bool))
+        z_scores = (matrix - self.means) / self.stds
+        decision = self.model.decision_function(matrix)
+        is_anomaly = (decision < 0) | (np.abs(z_scores) > 3).any(axis=1)
+        return DeviceAnomalyScores(z_scores=z_scores, decision=decision, is_anomaly=is_anomaly)
+
+
+def artifact_path(key: str, model_dir: Path = MODEL_DIR) -> Path:
+    """Map a device id or ``type-<name>`` key onto a filesystem-safe artifact path."""
+    return Path(model_dir) / f"{re.sub(r'[^A-Za-z0-9_.-]', '_', key)}.joblib"
+
+
+def _fit_and_dump(task: Tuple[str, pd.DataFrame, str]) -> Tuple[str, Optional[str], Optional[str]]:
+    key, readings, model_dir = task
+    try:
+        model = DeviceAnomalyModel().fit(readings)
+    except ValueError as exc:
+        return key, None, str(exc)
+    path = artifact_path(key, Path(model_dir))
+    tmp_path = path.with_suffix(".tmp")
+    dump(model, tmp_path)
+    os.replace(tmp_path, path)  # readers never see a half-written artifact
+    return key, str(path), None
+
+
+def train_device_models(
+    readings_by_key: Mapping[str, pd.DataFrame],
+    model_dir: Path = MODEL_DIR,
+    max_workers: Optional[int] = None,
+) -> Dict[str, Optional[str]]:
+    """
+    Fit one model per device (or device type) in a process pool and write each artifact.
+    Returns artifact paths by key; keys with too little data map to ``None``.
+    """
+    Path(model_dir).mkdir(parents=True, exist_ok=True)
+    tasks = [(key, readings, str(model_dir)) for key, readings in readings_by_key.items()]
+    if not tasks:
+        return {}
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(tasks)))
+    if workers == 1:
+        results = map(_fit_and_dump, tasks)
+        return {key: path for key, path, _ in results}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return {key: path for key, path, _ in pool.map(_fit_and_dump, tasks)}
+
+
+def readings_by_device(
+    telemetry: pd.DataFrame, key_column: str = "device_id", type_column: str = "device_type"
+) -> Dict[str, pd.DataFrame]:
+    """
+    Split hypertable rows into per-device feature frames. When ``type_column`` is present, the
+    readings of each device type are also pooled under ``type-<device_type>``, the fallback
+    ``DeviceModelCache`` uses for devices without a model of their own.
+    """
+    frames = {
+        str(key): group.reindex(columns=list(FEATURE_COLUMNS)).reset_index(drop=True)
+        for key, group in telemetry.groupby(key_column, sort=False)
+    }
+    if type_column in telemetry.columns:
+        for device_type, group in telemetry.dropna(subset=[type_column]).groupby(type_column, sort=False):
+            frames[f"type-{device_type}"] = group.reindex(columns=list(FEATURE_COLUMNS)).reset_index(drop=True)
+    return frames
+
+
+@dataclass
+class _CachedModel:
+    model: DeviceAnomalyModel
+    stamp: Tuple[int, int]
+    checked_at: float
+
+
+def _artifact_stamp(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class DeviceModelCache:
+    """
+    Bounded LRU of per-device models loaded lazily from ``model_dir``. Lookups fall back from
+    the device id to a ``type-<device_type>`` model, so memory stays capped at ``max_models``
+    regardless of fleet size. Like ``ModelHolder``, a cached model's artifact mtime and size are
+    re-checked at most every ``check_interval`` seconds and a retrained artifact is reloaded.
+    """
+
+    def __init__(self, model_dir: Path = MODEL_DIR, max_models: int = 128, check_interval: float = 1.0) -> None:
+        self.model_dir = Path(model_dir)
+        self.max_models = max(max_models, 1)
+        self.check_interval = check_interval
+        self._models: OrderedDict[str, _CachedModel] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _load(self, key: str) -> Optional[DeviceAnomalyModel]:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._models.get(key)
+            if cached is not None:
+                self._models.move_to_end(key)
+                if now - cached.checked_at < self.check_interval:
+                    return cached.model
+        path = artifact_path(key, self.model_dir)
+        stamp = _artifact_stamp(path)
+        if stamp is None:
+            self.invalidate(key)
+            return None
+        if cached is not None and cached.stamp == stamp:
+            cached.checked_at = now
+            return cached.model
+        # loaded outside the lock; two racing loads of the same artifact are harmless
+        model = load(path)
+        with self._lock:
+            self._models[key] = _CachedModel(model, stamp, now)
+            self._models.move_to_end(key)
+            while len(self._models) > self.max_models:
+                self._models.popitem(last=False)
+        return model
+
+    def get(self, device_id: str, device_type: Optional[str] = None) -> Optional[DeviceAnomalyModel]:
+        model = self._load(device_id)
+        if model is None and device_type:
+            model = self._load(f"type-{device_type}")
+        return model
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._models.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._models)
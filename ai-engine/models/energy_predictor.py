@@ -1,12 +1,15 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 
 import torch
 from torch import Tensor, nn
 
+from models.graph_export import export_graphs as export_module_graphs
+
 MODEL_PATH = Path(__file__).resolve().parent / 'artifacts' / 'energy_predictor.pt'
+GRAPH_STEM = MODEL_PATH.with_suffix('')
 
 
 class EnergyPredictor(nn.Module):
@@ -38,11 +41,32 @@ def load_model(path: Optional[Path] = None) -> EnergyPredictor:
     return predictor
 
 
-def predict_next_day(load_curve: list[float]) -> float:
+def predict_next_day(load_curve: list[float], model: Optional[EnergyPredictor] = None) -> float:
     if len(load_curve) != 24:
         raise ValueError('Expected 24 hourly load values')
-    model = load_model()
+    model = model or load_model()
     tensor = torch.tensor(load_curve, dtype=torch.float32)
     with torch.no_grad():
         prediction = model(tensor).item()
-    return max(prediction, 0.0)
\ No newline at end of file
+    return max(prediction, 0.0)
+
+
+def predict_next_day_batch(load_curves: list[list[float]], model: Optional[EnergyPredictor] = None) -> list[float]:
+    """Forecast several sites' next-day energy with a single forward pass."""
+    if any(len(curve) != 24 for curve in load_curves):
+        raise ValueError('Expected 24 hourly load values per curve')
+    if not load_curves:
+        return []
+    model = model or load_model()
+    tensor = torch.tensor(load_curves, dtype=torch.float32)
+    with torch.no_grad():
+        predictions = model(tensor).squeeze(-1).clamp(min=0.0)
+    return predictions.tolist()
+
+
+def export_graphs(model: Optional[EnergyPredictor] = None, stem: Optional[Path] = None) -> Dict[str, str]:
+    """Write TorchScript and ONNX graphs (``energy_predictor.ts`` / ``.onnx``) with a dynamic batch axis."""
+    model = model or load_model()
+    stem = stem or GRAPH_STEM
+    stem.parent.mkdir(parents=True, exist_ok=True)
+    return export_module_graphs(model, torch.zeros(1, 24), stem)
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import BinaryIO, Dict, Sequence
+
+import torch
+from torch import nn
+
+logger = logging.getLogger(__name__)
+
+ONNX_OPSET = 17
+
+
+def export_torchscript(module: nn.Module, example: torch.Tensor, path: Path | str) -> str:
+    """Trace ``module`` into a TorchScript graph loadable with ``torch.jit.load`` (no Python class needed)."""
+    module.eval()
+    with torch.no_grad():
+        traced = torch.jit.trace(module, example)
+    traced.save(str(path))
+    return str(path)
+
+
+def export_onnx(
+    module: nn.Module,
+    example: torch.Tensor,
+    path: Path | str | BinaryIO,
+    dynamic_dims: Sequence[int] = (0,),
+) -> None:
+    """
+    Export ``module`` to ONNX with a single ``input``/``output`` pair; ``dynamic_dims`` of the input stay symbolic.
+    ``path`` may also be a binary buffer when the graph is handed straight to onnxruntime.
+    """
+    target = str(path) if isinstance(path, (str, Path)) else path
+    module.eval()
+    with torch.no_grad():
+        torch.onnx.export(
+            module,
+            (example,),
+            target,
+            input_names=["input"],
+            output_names=["output"],
+            dynamic_axes={
+                "input": {dim: f"dim_{dim}" for dim in dynamic_dims},
+                "output": {0: "dim_0"} if 0 in dynamic_dims else {},
+            },
+            opset_version=ONNX_OPSET,
+            dynamo=False,
+        )
+
+
+def export_graphs(
+    module: nn.Module,
+    example: torch.Tensor,
+    stem: Path | str,
+    dynamic_dims: Sequence[int] = (0,),
+) -> Dict[str, str]:
+    """
+    Write ``<stem>.ts`` (TorchScript) and ``<stem>.onnx`` next to each other.
+    ONNX export depends on the exporter available in the installed torch build, so a failure
+    there is logged and the TorchScript graph is still returned.
+    """
+    stem = Path(stem)
+    paths = {"torchscript": export_torchscript(module, example, stem.with_suffix(".ts"))}
+    try:
+        export_onnx(module, example, stem.with_suffix(".onnx"), dynamic_dims)
+        paths["onnx"] = str(stem.with_suffix(".onnx"))
+    except Exception as exc:  # pragma: no cover - exporter availability depends on torch build
+        logger.warning("ONNX export of %s failed (%s). Keeping TorchScript only.", stem.name, exc)
+    return paths
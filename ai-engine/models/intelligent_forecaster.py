@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+import copy
+import io
 import json
+import logging
 import math
 import random
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
 
 import numpy as np
 import pandas as pd
@@ -19,9 +23,30 @@ try:
 except Exception:  # pragma: no cover - optional dependency
     Prophet = None
 
+from scipy.optimize import nnls
+from sklearn.base import clone
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_absolute_error
 
+from models.graph_export import export_graphs, export_onnx
+from models.onnx_backend import OnnxModel
+from utils.feature_store import CALENDAR_COLUMNS, add_calendar_features, is_hourly_feature_frame
+from utils.resample import resample_hourly
+
+logger = logging.getLogger(__name__)
+LSTM_BACKENDS = ("torch", "torchscript", "onnx")
+RF_PROFILES: Dict[str, Dict[str, int]] = {
+    "full": {"n_estimators": 200},
+    # ~5x smaller on disk at the same holdout MAE; calendar features leave little for deep trees to learn
+    "compact": {"n_estimators": 50, "max_depth": 10, "min_samples_leaf": 2},
+}
+ARTIFACT_COMPRESSION = {"none": 0, "zlib": ("zlib", 3), "lz4": ("lz4", 3), "lzma": ("lzma", 3)}
+LSTM_PRECISIONS = {"float32": torch.float32, "float16": torch.float16}
+COMPONENTS = ("lstm", "prophet", "rf")
+# used until a backtest has enough history to learn per-site weights
+DEFAULT_WEIGHTS: Dict[str, float] = {"lstm": 0.5, "prophet": 0.3, "rf": 0.2}
+_RF_FEATURES = ["hour", "dayofweek", "sin_hour", "cos_hour"]
+
 _FORECAST_LATENCY = Histogram(
     "forecast_latency_seconds",
     "Latency for generating energy forecasts",
@@ -55,36 +80,113 @@ class _LSTMRegressor(nn.Module):
         return self.head(out)
 
 
-class _DummyProphet:
+class SeasonalTrendModel:
     """
-    Lightweight fallback when Prophet binaries are unavailable.
-    Produces hour-of-day seasonal averages with rolling trend.
+    Built-in seasonal-trend component with Prophet's ``fit``/``predict`` interface.
+    An hour-of-day x day-of-week profile and a linear trend are fitted jointly by alternating
+    least squares on NumPy arrays, with Huber weights so spikes do not tilt the trend.
+    Weekday cells are shrunk toward the hour's mean across weekdays, so short histories and
+    never-observed cells fall back to the daily shape.
     """
 
-    def __init__(self) -> None:
-        self.hourly_profile: dict[int, float] = {}
-        self.trend: float = 0.0
-
-    def fit(self, df: pd.DataFrame) -> None:
-        df = df.copy()
-        df["hour"] = df["ds"].dt.hour
-        hourly_means = df.groupby("hour")["y"].mean()
-        self.hourly_profile = hourly_means.to_dict()
-        self.trend = (df["y"].iloc[-1] - df["y"].iloc[0]) / max(len(df) - 1, 1)
+    def __init__(self, iterations: int = 3) -> None:
+        self.iterations = iterations
+        self.profile = np.zeros((7, 24))
+        self.intercept = 0.0
+        self.slope = 0.0
+        self.origin: Optional[pd.Timestamp] = None
+
+    def _hours(self, ds: pd.Series) -> np.ndarray:
+        return ((pd.DatetimeIndex(ds) - self.origin) / pd.Timedelta(hours=1)).to_numpy(dtype=float)
+
+    @staticmethod
+    def _cells(ds: pd.Series) -> np.ndarray:
+        index = pd.DatetimeIndex(ds)
+        return index.dayofweek.to_numpy() * 24 + index.hour.to_numpy()
+
+    def fit(self, df: pd.DataFrame) -> "SeasonalTrendModel":
+        y = df["y"].to_numpy(dtype=float)
+        self.origin = pd.Timestamp(df["ds"].iloc[0])
+        t = self._hours(df["ds"])
+        cells = self._cells(df["ds"])
+        design = np.column_stack([np.ones_like(t), t])
+        weights = np.ones_like(y)
+        profile = np.zeros(168)
+        coef = np.zeros(2)
+        for _ in range(self.iterations):
+            sw = np.sqrt(weights)
+            coef, *_ = np.linalg.lstsq(design * sw[:, None], (y - profile[cells]) * sw, rcond=None)
+            detrended = y - design @ coef
+            profile = self._profile(detrended, cells, weights)
+            residuals = detrended - profile[cells]
+            # MAD scale, floored so a near-perfect fit still down-weights its outliers
+            scale = max(1.4826 * np.median(np.abs(residuals - np.median(residuals))), 1e-6 * (np.std(y) or 1.0))
+            delta = 1.345 * scale
+            abs_residuals = np.abs(residuals)
+            weights = np.where(abs_residuals <= delta, 1.0, delta / np.maximum(abs_residuals, 1e-12))
+        self.intercept, self.slope = float(coef[0]), float(coef[1])
+        self.profile = profile.reshape(7, 24)
+        return self
+
+    @staticmethod
+    def _profile(values: np.ndarray, cells: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        hours = cells % 24
+        by_hour = np.bincount(hours, weights=values * weights, minlength=24) / np.maximum(
+            np.bincount(hours, weights=weights, minlength=24), 1e-12
+        )
+        hour_profile = np.tile(by_hour, 7)
+        counts = np.bincount(cells, weights=weights, minlength=168)
+        observed = counts > 0
+        deviation = np.zeros(168)
+        deviation[observed] = (
+            np.bincount(cells, weights=(values - hour_profile[cells]) * weights, minlength=168)[observed] / counts[observed]
+        )
+        # Weekday effects are shrunk toward the hourly profile by their signal-to-noise ratio
+        # (empirical Bayes): within-cell variance against the spread of the cell deviations.
+        dof = counts.sum() - observed.sum()
+        if dof > 0:
+            within = np.sum(weights * (values - hour_profile[cells] - deviation[cells]) ** 2) / dof
+            between = max(np.mean(deviation[observed] ** 2) - within * np.mean(1.0 / counts[observed]), 0.0)
+            shrink = between / (between + within / np.maximum(counts, 1e-12)) if between > 0 else 0.0
+            profile = hour_profile + deviation * shrink
+        else:
+            profile = hour_profile
+        return profile - profile[observed].mean()
 
     def predict(self, future_df: pd.DataFrame) -> pd.DataFrame:
-        future_df = future_df.copy()
-        future_df["hour"] = future_df["ds"].dt.hour
-        baseline = future_df["hour"].map(self.hourly_profile).fillna(np.mean(list(self.hourly_profile.values())))
-        steps = np.arange(len(future_df))
-        trend = baseline + steps * self.trend
-        return pd.DataFrame({"ds": future_df["ds"], "yhat": trend})
+        if self.origin is None:
+            raise RuntimeError("SeasonalTrendModel must be fitted before predicting.")
+        t = self._hours(future_df["ds"])
+        yhat = self.intercept + self.slope * t + self.profile.reshape(-1)[self._cells(future_df["ds"])]
+        return pd.DataFrame({"ds": future_df["ds"], "yhat": yhat})
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "profile": self.profile.round(6).tolist(),
+            "intercept": self.intercept,
+            "slope": self.slope,
+            "origin": self.origin.isoformat() if self.origin is not None else None,
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, object]) -> "SeasonalTrendModel":
+        model = cls()
+        model.profile = np.asarray(payload["profile"], dtype=float)
+        model.intercept = float(payload["intercept"])  # type: ignore[arg-type]
+        model.slope = float(payload["slope"])  # type: ignore[arg-type]
+        model.origin = pd.Timestamp(payload["origin"]) if payload.get("origin") else None
+        return model
+
+
+SEASONAL_MODELS = ("builtin", "prophet")
 
 
-def _get_prophet() -> object:
-    if Prophet is None:
-        return _DummyProphet()
-    return Prophet(daily_seasonality=True, weekly_seasonality=True, seasonality_mode="additive")
+def _get_prophet(seasonal_model: str = "builtin") -> object:
+    if seasonal_model == "prophet":
+        if Prophet is not None:
+            return Prophet(daily_seasonality=True, weekly_seasonality=True, seasonality_mode="additive")
+        logger.warning("prophet is not installed, using the built-in seasonal model instead")
+    return SeasonalTrendModel()
 
 
 @dataclass
@@ -96,77 +198,275 @@ class ForecastResult:
     components: Dict[str, float]
 
 
+def _simplex_weights(X: np.ndarray, y: np.ndarray) -> np.ndarray:
+    # a heavily weighted extra row turns NNLS into least squares on the simplex
+    penalty = 1e3 * max(float(np.abs(y).mean()), 1.0)
+    weights, _ = nnls(np.vstack([X, np.full(X.shape[1], penalty)]), np.append(y, penalty))
+    if weights.sum() > 0:
+        return weights / weights.sum()
+    return np.array([DEFAULT_WEIGHTS[name] for name in COMPONENTS])
+
+
+def _mape(actual: np.ndarray, predicted: np.ndarray) -> float:
+    actual = np.asarray(actual, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.abs((actual - predicted) / np.where(actual == 0, 1e-3, actual))
+    return float(np.mean(ratio) * 100.0)
+
+
 class IntelligentForecaster:
     """
-    Ensemble forecaster combining LSTM, Prophet, and RandomForest regressors.
+    Ensemble forecaster combining LSTM, seasonal-trend (built-in or Prophet), and RandomForest regressors.
     The forecaster expects telemetry data with at least columns:
     - timestamp (datetime)
     - energy_kwh (float)
-    Optionally accepts additional contextual features.
+    Samples at any cadence are resampled onto an hourly grid before fitting.
     """
 
-    def __init__(self, window: int = 24, device: Optional[str] = None) -> None:
+    def __init__(
+        self,
+        window: int = 24,
+        device: Optional[str] = None,
+        lstm_backend: str = "torch",
+        rf_profile: str = "full",
+        artifact_compression: str = "none",
+        lstm_precision: str = "float32",
+        seasonal_model: str = "builtin",
+        backtest_folds: int = 3,
+        interval: float = 0.95,
+    ) -> None:
+        if lstm_backend not in LSTM_BACKENDS:
+            raise ValueError(f"lstm_backend must be one of {LSTM_BACKENDS}")
+        if rf_profile not in RF_PROFILES:
+            raise ValueError(f"rf_profile must be one of {tuple(RF_PROFILES)}")
+        if artifact_compression not in ARTIFACT_COMPRESSION:
+            raise ValueError(f"artifact_compression must be one of {tuple(ARTIFACT_COMPRESSION)}")
+        if lstm_precision not in LSTM_PRECISIONS:
+            raise ValueError(f"lstm_precision must be one of {tuple(LSTM_PRECISIONS)}")
+        if seasonal_model not in SEASONAL_MODELS:
+            raise ValueError(f"seasonal_model must be one of {SEASONAL_MODELS}")
+        if artifact_compression == "lz4":
+            try:
+                import lz4  # type: ignore  # noqa: F401
+            except ImportError:  # pragma: no cover - optional dependency
+                logger.warning("lz4 is not installed, compressing artifacts with zlib instead")
+                artifact_compression = "zlib"
         self.window = window
         self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
         self.lstm = _LSTMRegressor().to(self.device)
-        self.prophet = _get_prophet()
-        self.random_forest = RandomForestRegressor(n_estimators=200, random_state=42)
+        self.lstm_backend = lstm_backend
+        # export_artifacts writes here (None keeps the working directory)
+        self.artifact_dir: Optional[Path] = None
+        self._lstm_runtime: Optional[Callable[[np.ndarray], np.ndarray]] = None
+        self.seasonal_model = seasonal_model
+        self.prophet = _get_prophet(seasonal_model)
+        self.random_forest = RandomForestRegressor(random_state=42, **RF_PROFILES[rf_profile])
+        self.artifact_compression = artifact_compression
+        self.lstm_precision = lstm_precision
         self.history: pd.DataFrame | None = None
         self.residuals: List[float] = []
+        self.backtest_folds = backtest_folds
+        self.interval = interval
+        self.ensemble_weights: Dict[str, float] = dict(DEFAULT_WEIGHTS)
+        # empirical (lower, upper) quantiles of backtest ensemble errors; None falls back to 1.96 sigma
+        self.error_quantiles: Optional[tuple] = None
+        self.backtest: Optional[pd.DataFrame] = None
+        self._prophet_restored = False
 
     def _prepare_dataframe(self, telemetry: pd.DataFrame) -> pd.DataFrame:
-        df = telemetry.copy()
-        if "timestamp" not in df.columns:
-            raise ValueError("telemetry must contain 'timestamp'")
-        if "energy_kwh" not in df.columns:
-            raise ValueError("telemetry must contain 'energy_kwh'")
-        df = df.sort_values("timestamp").reset_index(drop=True)
-        df["timestamp"] = pd.to_datetime(df["timestamp"])
-        df["hour"] = df["timestamp"].dt.hour
-        df["dayofweek"] = df["timestamp"].dt.dayofweek
-        df["sin_hour"] = np.sin(2 * math.pi * df["hour"] / 24)
-        df["cos_hour"] = np.cos(2 * math.pi * df["hour"] / 24)
-        return df
-
-    def fit(self, telemetry: pd.DataFrame, epochs: int = 50, lr: float = 0.005) -> Dict[str, float]:
+        # rows read back from the feature store are already hourly with calendar features
+        if is_hourly_feature_frame(telemetry):
+            return telemetry[["timestamp", "energy_kwh", *CALENDAR_COLUMNS]].reset_index(drop=True)
+        # The LSTM window and future index assume hourly cadence, so never fit on raw samples
+        return add_calendar_features(resample_hourly(telemetry))
+
+    def fit(self, telemetry: pd.DataFrame, epochs: int = 50, lr: float = 0.005, backtest: bool = True) -> Dict[str, float]:
+        """
+        Fit all components and, with ``backtest``, learn the ensemble weights and interval from a
+        rolling-origin backtest. ``backtest=False`` skips the refits (and keeps the default weights)
+        for per-request fits whose metrics are not used to select a model.
+        """
         df = self._prepare_dataframe(telemetry)
         self.history = df
         series = df["energy_kwh"].astype(float).values
-        dataset = _SequenceDataset(series, self.window)
-        dataloader = DataLoader(dataset, batch_size=32, shuffle=True)
+        # backtest folds start from the same initial weights and train for as many epochs, so they
+        # measure the LSTM that is served
+        initial_lstm = {name: tensor.clone() for name, tensor in self.lstm.state_dict().items()}
+        self._train_lstm(self.lstm, series, epochs, lr)
+        self._compile_lstm()
 
-        criterion = nn.L1Loss()
-        optimizer = torch.optim.Adam(self.lstm.parameters(), lr=lr)
-        self.lstm.train()
-        for _ in range(epochs):
-            for batch_x, batch_y in dataloader:
-                batch_x = batch_x.unsqueeze(-1).to(self.device)
-                batch_y = batch_y.unsqueeze(-1).to(self.device)
-                optimizer.zero_grad()
-                preds = self.lstm(batch_x)
-                loss = criterion(preds, batch_y)
-                loss.backward()
-                optimizer.step()
-
-        # Fit prophet component
+        # Fit seasonal-trend component
         prophet_df = pd.DataFrame({"ds": df["timestamp"], "y": df["energy_kwh"].astype(float)})
         self.prophet.fit(prophet_df)
 
         # Fit random forest component
-        features = df[["hour", "dayofweek", "sin_hour", "cos_hour"]]
+        features = df[_RF_FEATURES]
         self.random_forest.fit(features, df["energy_kwh"].astype(float))
 
         # Compute residuals for confidence estimation using in-sample RF baseline
         actual = df["energy_kwh"].astype(float)
         rf_in_sample = self.random_forest.predict(features)
         self.residuals = list((actual - rf_in_sample)[-48:])
-        mae = float(mean_absolute_error(actual, rf_in_sample))
-        with np.errstate(divide="ignore", invalid="ignore"):
-            mape_series = np.abs((actual - rf_in_sample) / np.where(actual == 0, 1e-3, actual))
-        mape = float(np.mean(mape_series) * 100.0)
         variance = float(np.var(rf_in_sample))
 
-        return {"mae": mae, "mape": mape, "variance": variance}
+        # mae/mape are the held-out backtest ensemble errors; the in-sample RF fit is only the
+        # fallback for windows too short to backtest, flagged by validated=0
+        metrics = {
+            "train_mae": float(mean_absolute_error(actual, rf_in_sample)),
+            "train_mape": _mape(actual.to_numpy(), rf_in_sample),
+            "variance": variance,
+        }
+        if backtest:
+            self.backtest = self._backtest(df, initial_lstm, epochs=epochs, lr=lr)
+        else:
+            self.backtest = pd.DataFrame(columns=["origin", "timestamp", "step", "actual", *COMPONENTS])
+        metrics.update(self._fit_ensemble(self.backtest))
+        validated = "backtest_mae" in metrics
+        metrics["mae"] = metrics["backtest_mae"] if validated else metrics["train_mae"]
+        metrics["mape"] = metrics["backtest_mape"] if validated else metrics["train_mape"]
+        metrics["validated"] = float(validated)
+        return metrics
+
+    def _train_lstm(self, model: _LSTMRegressor, series: np.ndarray, epochs: int, lr: float) -> None:
+        dataloader = DataLoader(_SequenceDataset(series, self.window), batch_size=32, shuffle=True)
+        criterion = nn.L1Loss()
+        optimizer = torch.optim.Adam(model.parameters(), lr=lr)
+        model.train()
+        for _ in range(epochs):
+            for batch_x, batch_y in dataloader:
+                batch_x = batch_x.unsqueeze(-1).to(self.device)
+                batch_y = batch_y.unsqueeze(-1).to(self.device)
+                optimizer.zero_grad()
+                loss = criterion(model(batch_x), batch_y)
+                loss.backward()
+                optimizer.step()
+
+    def _backtest(
+        self,
+        df: pd.DataFrame,
+        initial_lstm: Dict[str, torch.Tensor],
+        horizon: int = 24,
+        epochs: int = 50,
+        lr: float = 0.005,
+    ) -> pd.DataFrame:
+        """
+        Rolling-origin backtest over the last ``backtest_folds`` days. Every component is refit on
+        the hours before each origin (the LSTM from ``initial_lstm`` for ``epochs`` epochs, like the
+        served one), so no prediction has seen the hours it forecasts. Returns one row per forecast hour with the
+        actual value and each component's prediction.
+        """
+        series = df["energy_kwh"].astype(float).to_numpy()
+        folds: List[pd.DataFrame] = []
+        for fold in range(self.backtest_folds, 0, -1):
+            origin = len(df) - fold * horizon
+            if origin < max(2 * self.window, 72):
+                continue
+            train, test = df.iloc[:origin], df.iloc[origin : origin + horizon]
+            seasonal = _get_prophet(self.seasonal_model)
+            seasonal.fit(pd.DataFrame({"ds": train["timestamp"], "y": series[:origin]}))
+            forest = clone(self.random_forest).fit(train[_RF_FEATURES], series[:origin])
+            lstm = _LSTMRegressor().to(self.device)
+            lstm.load_state_dict(initial_lstm)
+            self._train_lstm(lstm, series[:origin], epochs, lr)
+            folds.append(
+                pd.DataFrame(
+                    {
+                        "origin": train["timestamp"].iloc[-1],
+                        "timestamp": test["timestamp"].to_numpy(),
+                        "step": np.arange(1, len(test) + 1),
+                        "actual": series[origin : origin + horizon],
+                        "lstm": self._lstm_forecast(series[:origin], len(test), model=lstm),
+                        "prophet": seasonal.predict(pd.DataFrame({"ds": test["timestamp"]}))["yhat"].to_numpy(),
+                        "rf": forest.predict(test[_RF_FEATURES]),
+                    }
+                )
+            )
+        if not folds:
+            return pd.DataFrame(columns=["origin", "timestamp", "step", "actual", *COMPONENTS])
+        return pd.concat(folds, ignore_index=True)
+
+    def _fit_ensemble(self, backtest: pd.DataFrame) -> Dict[str, float]:
+        """
+        Non-negative weights summing to one that minimise backtest squared error, plus error
+        quantiles. The reported ``backtest_mae``/``backtest_mape`` and the quantiles come from
+        cross-fitted errors: each fold is scored with weights fitted on the other folds.
+        """
+        if backtest.empty:
+            self.ensemble_weights = dict(DEFAULT_WEIGHTS)
+            self.error_quantiles = None
+            return {}
+        X = backtest[list(COMPONENTS)].to_numpy(dtype=float)
+        y = backtest["actual"].to_numpy(dtype=float)
+        weights = _simplex_weights(X, y)
+        self.ensemble_weights = {name: float(weight) for name, weight in zip(COMPONENTS, weights)}
+        origins = backtest["origin"].to_numpy()
+        errors = y - X @ weights
+        if len(np.unique(origins)) > 1:
+            for origin in np.unique(origins):
+                held_out = origins == origin
+                errors[held_out] = y[held_out] - X[held_out] @ _simplex_weights(X[~held_out], y[~held_out])
+        tail = (1.0 - self.interval) / 2
+        self.error_quantiles = (float(np.quantile(errors, tail)), float(np.quantile(errors, 1.0 - tail)))
+        metrics = {f"backtest_mae_{name}": float(np.abs(y - backtest[name]).mean()) for name in COMPONENTS}
+        metrics["backtest_mae"] = float(np.abs(errors).mean())
+        metrics["backtest_mape"] = _mape(y, y - errors)
+        return metrics
+
+    def _lstm_example(self) -> torch.Tensor:
+        return torch.zeros(1, self.window, 1, device=self.device)
+
+    def _compile_lstm(self) -> None:
+        """
+        Swap the recursive forecast loop onto a TorchScript graph or an onnxruntime session when
+        ``lstm_backend`` asks for one; eager PyTorch stays the fallback if compilation fails.
+        """
+        self._lstm_runtime = None
+        if self.lstm_backend == "torch":
+            return
+        self.lstm.eval()
+        try:
+            if self.lstm_backend == "onnx":
+                buffer = io.BytesIO()
+                # batch stays fixed at 1: exported LSTMs mis-handle a dynamic batch without explicit h0/c0
+                export_onnx(self.lstm, self._lstm_example(), buffer, dynamic_dims=(1,))
+                self._lstm_runtime = OnnxModel(buffer.getvalue())
+            else:
+                with torch.no_grad():
+                    traced = torch.jit.trace(self.lstm, self._lstm_example())
+                self._lstm_runtime = self._torch_runtime(traced)
+        except Exception as exc:  # pragma: no cover - exporter/runtime availability
+            logger.warning("Falling back to eager LSTM inference (%s backend failed: %s)", self.lstm_backend, exc)
+
+    def _torch_runtime(self, module: Callable[[torch.Tensor], torch.Tensor]) -> Callable[[np.ndarray], np.ndarray]:
+        def run(window: np.ndarray) -> np.ndarray:
+            with torch.no_grad():
+                return module(torch.from_numpy(window).to(self.device)).cpu().numpy()
+
+        return run
+
+    def load_lstm_graph(self, path: Path | str) -> None:
+        """Serve LSTM predictions from an exported ``.onnx`` or TorchScript ``.ts`` graph."""
+        path = Path(path)
+        if path.suffix == ".onnx":
+            self._lstm_runtime = OnnxModel(path)
+        else:
+            self._lstm_runtime = self._torch_runtime(torch.jit.load(str(path), map_location=self.device))
+
+    def _lstm_forecast(self, series: np.ndarray, horizon_hours: int, model: Optional[_LSTMRegressor] = None) -> np.ndarray:
+        lstm_state = series.copy()
+        if model is not None:
+            model.eval()
+            runtime = self._torch_runtime(model)
+        else:
+            self.lstm.eval()
+            runtime = self._lstm_runtime or self._torch_runtime(self.lstm)
+        lstm_preds: List[float] = []
+        for _ in range(horizon_hours):
+            window = lstm_state[-self.window :].astype(np.float32).reshape(1, -1, 1)
+            pred = float(runtime(window).reshape(-1)[0])
+            lstm_preds.append(pred)
+            lstm_state = np.append(lstm_state, pred)
+        return np.array(lstm_preds)
 
     def _predict_components(self, horizon_hours: int, training: bool = False) -> Dict[str, np.ndarray]:
         if self.history is None:
@@ -174,19 +474,9 @@ class IntelligentForecaster:
         history = self.history
 
         # LSTM iterative forecast
-        lstm_inputs = history["energy_kwh"].astype(float).values
-        lstm_state = lstm_inputs.copy()
-        self.lstm.eval()
-        lstm_preds: List[float] = []
-        with torch.no_grad():
-            for _ in range(horizon_hours):
-                window = lstm_state[-self.window :]
-                tens = torch.tensor(window, dtype=torch.float32, device=self.device).unsqueeze(0).unsqueeze(-1)
-                pred = self.lstm(tens).cpu().item()
-                lstm_preds.append(pred)
-                lstm_state = np.append(lstm_state, pred)
-
-        # Prophet component
+        lstm_preds = self._lstm_forecast(history["energy_kwh"].astype(float).values, horizon_hours)
+
+        # Seasonal-trend component
         start_ts = history["timestamp"].iloc[-1] + timedelta(hours=1)
         future_dates = pd.date_range(start_ts, periods=horizon_hours, freq="H")
         prophet_future = pd.DataFrame({"ds": future_dates})
@@ -194,16 +484,8 @@ class IntelligentForecaster:
         prophet_preds = prophet_preds_df["yhat"].to_numpy()
 
         # RandomForest component
-        future_features = pd.DataFrame(
-            {
-                "timestamp": future_dates,
-            }
-        )
-        future_features["hour"] = future_features["timestamp"].dt.hour
-        future_features["dayofweek"] = future_features["timestamp"].dt.dayofweek
-        future_features["sin_hour"] = np.sin(2 * math.pi * future_features["hour"] / 24)
-        future_features["cos_hour"] = np.cos(2 * math.pi * future_features["hour"] / 24)
-        rf_preds = self.random_forest.predict(future_features[["hour", "dayofweek", "sin_hour", "cos_hour"]])
+        future_features = add_calendar_features(pd.DataFrame({"timestamp": future_dates}))
+        rf_preds = self.random_forest.predict(future_features[_RF_FEATURES])
 
         predictions = {
             "lstm": np.array(lstm_preds),
@@ -219,25 +501,23 @@ class IntelligentForecaster:
         return {"predictions": predictions}
 
     def _combine_components(self, components: Dict[str, np.ndarray]) -> np.ndarray:
-        lstm_preds = components["lstm"]
-        prophet_preds = components["prophet"]
-        rf_preds = components["rf"]
-        return 0.5 * lstm_preds + 0.3 * prophet_preds + 0.2 * rf_preds
+        return sum(self.ensemble_weights[name] * np.asarray(components[name]) for name in COMPONENTS)
 
     @_FORECAST_LATENCY.time()
     def predict(self, horizon_hours: int = 24) -> List[ForecastResult]:
         components = self._predict_components(horizon_hours)["predictions"]
         combined = self._combine_components(components)
-        if self.residuals:
-            residual_std = float(np.std(self.residuals))
+        if self.error_quantiles is not None:
+            lower_offset, upper_offset = self.error_quantiles
         else:
-            residual_std = float(np.std(combined) * 0.1)
+            residual_std = float(np.std(self.residuals)) if self.residuals else float(np.std(combined) * 0.1)
+            lower_offset, upper_offset = -1.96 * residual_std, 1.96 * residual_std
 
         results: List[ForecastResult] = []
         for idx, ts in enumerate(components["timestamps"]):
             pred = float(combined[idx])
-            lower = pred - 1.96 * residual_std
-            upper = pred + 1.96 * residual_std
+            lower = pred + lower_offset
+            upper = pred + upper_offset
             results.append(
                 ForecastResult(
                     timestamp=pd.Timestamp(ts).to_pydatetime(),
@@ -253,6 +533,70 @@ class IntelligentForecaster:
             )
         return results
 
+    @staticmethod
+    def serving_artifacts(artifacts: Dict[str, Any], lstm_backend: str = "torch") -> Dict[str, Any]:
+        """The entries of an artifact mapping that ``from_artifacts`` reads for ``lstm_backend``."""
+        return {
+            name: artifact
+            for name, artifact in artifacts.items()
+            if not name.startswith("lstm_") or name == f"lstm_{lstm_backend}"
+        }
+
+    @classmethod
+    def from_artifacts(cls, paths: Dict[str, Path | str], **kwargs) -> "IntelligentForecaster":
+        """
+        Rebuild a fitted forecaster from ``export_artifacts`` output for serving. With a
+        ``torchscript``/``onnx`` backend the matching exported graph is loaded, and the LSTM is only
+        traced or exported again when the artifacts have none.
+        Attach the caller's telemetry with ``with_history`` before predicting.
+        """
+        import joblib
+
+        forecaster = cls(**kwargs)
+        graph = paths.get(f"lstm_{forecaster.lstm_backend}")
+        forecaster.load_lstm_weights(paths["lstm"], compile=graph is None)
+        if graph is not None:
+            # serve the graph exported at training time instead of re-tracing in every process
+            forecaster.load_lstm_graph(graph)
+        forecaster.random_forest = joblib.load(paths["random_forest"])
+        with open(paths["prophet"], "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        # older exports (hourly profile only) and Prophet payloads are refit on the served history
+        if "profile" in payload:
+            forecaster.prophet = SeasonalTrendModel.from_dict(payload)
+            forecaster._prophet_restored = True
+        if "ensemble" in paths:
+            with open(paths["ensemble"], "r", encoding="utf-8") as f:
+                ensemble = json.load(f)
+            forecaster.ensemble_weights = {name: float(ensemble["weights"][name]) for name in COMPONENTS}
+            if ensemble.get("error_quantiles"):
+                forecaster.error_quantiles = tuple(ensemble["error_quantiles"])
+        return forecaster
+
+    def with_history(self, telemetry: pd.DataFrame) -> "IntelligentForecaster":
+        """
+        Copy of this forecaster that forecasts on from ``telemetry``. Weights are shared, not refit,
+        so one loaded model serves concurrent requests; only a seasonal component that could not be
+        restored from its artifact is fitted on the given history.
+        """
+        served = copy.copy(self)
+        df = self._prepare_dataframe(telemetry)
+        served.history = df
+        features = df[_RF_FEATURES]
+        actual = df["energy_kwh"].astype(float)
+        served.residuals = list((actual - self.random_forest.predict(features))[-48:])
+        if not self._prophet_restored:
+            served.prophet = _get_prophet(self.seasonal_model)
+            served.prophet.fit(pd.DataFrame({"ds": df["timestamp"], "y": actual}))
+        return served
+
+    def load_lstm_weights(self, path: Path | str, compile: bool = True) -> None:
+        """Load an exported LSTM state_dict, upcasting float16 exports back to float32."""
+        state = torch.load(path, map_location=self.device)
+        self.lstm.load_state_dict({name: tensor.float() for name, tensor in state.items()})
+        if compile:
+            self._compile_lstm()
+
     def export_artifacts(self) -> Dict[str, str]:
         """
         Serialize model weights for persistence. Returns mapping of artifact names to file paths.
@@ -262,28 +606,34 @@ class IntelligentForecaster:
 
         timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
         paths: Dict[str, str] = {}
-        lstm_path = f"intelligent_forecaster_lstm_{timestamp}.pt"
-        torch.save(self.lstm.state_dict(), lstm_path)
+        out = self.artifact_dir or Path(".")
+        lstm_path = str(out / f"intelligent_forecaster_lstm_{timestamp}.pt")
+        dtype = LSTM_PRECISIONS[self.lstm_precision]
+        torch.save({name: tensor.detach().to("cpu", dtype) for name, tensor in self.lstm.state_dict().items()}, lstm_path)
         paths["lstm"] = lstm_path
+        graphs = export_graphs(self.lstm, self._lstm_example(), out / f"intelligent_forecaster_lstm_{timestamp}", dynamic_dims=(1,))
+        paths.update({f"lstm_{kind}": path for kind, path in graphs.items()})
 
-        rf_path = f"intelligent_forecaster_rf_{timestamp}.joblib"
+        rf_path = str(out / f"intelligent_forecaster_rf_{timestamp}.joblib")
         import joblib
 
-        joblib.dump(self.random_forest, rf_path)
+        joblib.dump(self.random_forest, rf_path, compress=ARTIFACT_COMPRESSION[self.artifact_compression])
         paths["random_forest"] = rf_path
 
-        prophet_path = f"intelligent_forecaster_prophet_{timestamp}.json"
-        if isinstance(self.prophet, _DummyProphet):
-            payload = {
-                "hourly_profile": self.prophet.hourly_profile,
-                "trend": self.prophet.trend,
-            }
+        prophet_path = str(out / f"intelligent_forecaster_prophet_{timestamp}.json")
+        if isinstance(self.prophet, SeasonalTrendModel):
+            payload = self.prophet.to_dict()
         else:
             payload = getattr(self.prophet, "component_modes", {})
         with open(prophet_path, "w", encoding="utf-8") as f:
             json.dump(payload, f)
         paths["prophet"] = prophet_path
 
+        ensemble_path = str(out / f"intelligent_forecaster_ensemble_{timestamp}.json")
+        with open(ensemble_path, "w", encoding="utf-8") as f:
+            json.dump({"weights": self.ensemble_weights, "error_quantiles": self.error_quantiles}, f)
+        paths["ensemble"] = ensemble_path
+
         return paths
 
 
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Generic, Optional, Tuple, TypeVar
+
+from prometheus_client import Histogram
+
+from models.registry import ModelRegistry, RegistryEntry
+
+logger = logging.getLogger(__name__)
+
+_MODEL_LOAD_SECONDS = Histogram(
+    "model_load_seconds",
+    "Time spent loading model artifacts",
+    ["model"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+
+T = TypeVar("T")
+_Stamp = Optional[Tuple[int, int]]
+
+
+@dataclass
+class _Loaded(Generic[T]):
+    model: T
+    stamp: _Stamp
+    loaded_at: datetime
+    load_seconds: float
+
+
+class ModelHolder(Generic[T]):
+    """
+    Process-wide holder that loads a model artifact once and reuses it across requests.
+    The artifact's mtime and size are re-checked at most every ``check_interval`` seconds;
+    when they change the model is reloaded and swapped in with a single reference assignment,
+    so in-flight requests keep the instance they already fetched.
+    """
+
+    def __init__(self, name: str, path: Path | str, loader: Callable[[Path], T], check_interval: float = 1.0) -> None:
+        self.name = name
+        self.path = Path(path)
+        self.loader = loader
+        self.check_interval = check_interval
+        self._current: Optional[_Loaded[T]] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _stamp(self) -> _Stamp:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self) -> T:
+        current = self._current
+        now = time.monotonic()
+        if current is not None and now - self._checked_at < self.check_interval:
+            return current.model
+        stamp = self._stamp()
+        self._checked_at = now
+        if current is not None and current.stamp == stamp:
+            return current.model
+        with self._lock:
+            current = self._current
+            if current is not None and current.stamp == stamp:
+                return current.model
+            return self._load(stamp).model
+
+    def _load(self, stamp: _Stamp) -> _Loaded[T]:
+        started = time.perf_counter()
+        model = self.loader(self.path)
+        elapsed = time.perf_counter() - started
+        _MODEL_LOAD_SECONDS.labels(model=self.name).observe(elapsed)
+        loaded = _Loaded(model=model, stamp=stamp, loaded_at=datetime.utcnow(), load_seconds=elapsed)
+        self._current = loaded
+        logger.info("Loaded %s from %s in %.3fs", self.name, self.path, elapsed)
+        return loaded
+
+    def status(self) -> Dict[str, object]:
+        current = self._current
+        return {
+            "name": self.name,
+            "path": str(self.path),
+            "loaded": current is not None,
+            "from_artifact": bool(current and current.stamp is not None),
+            "loaded_at": current.loaded_at.isoformat() if current else None,
+            "load_seconds": current.load_seconds if current else None,
+        }
+
+
+@dataclass
+class _Served(Generic[T]):
+    entry: RegistryEntry
+    model: T
+    checked_at: float
+    loaded_at: datetime
+    load_seconds: float
+
+
+class ProductionModel(Generic[T]):
+    """
+    Serves the production version of a registry model per site. The production entry is re-read
+    at most every ``check_interval`` seconds; after a promotion the new version is loaded beside
+    the old one and swapped in with a single reference assignment, so requests already holding
+    the previous model finish on it. Loaded sites are kept in an LRU of ``max_sites`` entries.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        registry: ModelRegistry,
+        loader: Callable[[RegistryEntry], T],
+        check_interval: float = 5.0,
+        max_sites: int = 64,
+    ) -> None:
+        self.model_name = model_name
+        self.registry = registry
+        self.loader = loader
+        self.check_interval = check_interval
+        self.max_sites = max(max_sites, 1)
+        self._sites: "OrderedDict[Optional[int], _Served[T]]" = OrderedDict()
+        # entry id and time of the last failed load per site, so a broken artifact is retried
+        # once per ``check_interval`` instead of on every request
+        self._failed: Dict[Optional[int], Tuple[int, float]] = {}
+        self._site_locks: Dict[Optional[int], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, site_id: Optional[int]) -> Optional[Tuple[RegistryEntry, T]]:
+        """
+        The production entry and model for ``site_id``, or None when there is none or its first
+        load failed. Artifacts are loaded under a per-site lock, so a slow fetch for one site does
+        not hold up requests for the others; a failed load keeps serving the previous version.
+        """
+        served = self._sites.get(site_id)
+        now = time.monotonic()
+        if served is not None and now - served.checked_at < self.check_interval:
+            return served.entry, served.model
+        entry = self.registry.production(self.model_name, site_id)
+        if entry is None:
+            with self._lock:
+                self._sites.pop(site_id, None)
+            return None
+        with self._lock:
+            site_lock = self._site_locks.setdefault(site_id, threading.Lock())
+        with site_lock:
+            served = self._sites.get(site_id)
+            if served is None or served.entry.id != entry.id:
+                failed = self._failed.get(site_id)
+                if failed is not None and failed[0] == entry.id and now - failed[1] < self.check_interval:
+                    return (served.entry, served.model) if served is not None else None
+                try:
+                    served = self._load(entry)
+                except Exception:
+                    logger.exception("Could not load %s v%s for site %s", self.model_name, entry.version, site_id)
+                    self._failed[site_id] = (entry.id, now)
+                    return (served.entry, served.model) if served is not None else None
+                self._failed.pop(site_id, None)
+            served.checked_at = now
+            with self._lock:
+                self._sites[site_id] = served
+                self._sites.move_to_end(site_id)
+                while len(self._sites) > self.max_sites:
+                    evicted, _ = self._sites.popitem(last=False)
+                    self._site_locks.pop(evicted, None)
+            return served.entry, served.model
+
+    def _load(self, entry: RegistryEntry) -> _Served[T]:
+        started = time.perf_counter()
+        model = self.loader(entry)
+        elapsed = time.perf_counter() - started
+        _MODEL_LOAD_SECONDS.labels(model=self.model_name).observe(elapsed)
+        logger.info("Loaded %s v%s for site %s in %.3fs", self.model_name, entry.version, entry.site_id, elapsed)
+        return _Served(entry=entry, model=model, checked_at=0.0, loaded_at=datetime.utcnow(), load_seconds=elapsed)
+
+    def status(self) -> Dict[str, object]:
+        sites = list(self._sites.values())
+        return {
+            "name": self.model_name,
+            "sites_loaded": len(sites),
+            "versions": {str(served.entry.site_id): served.entry.version for served in sites},
+        }
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+ENERGY_ONNX_PATH = Path(__file__).resolve().parent / 'artifacts' / 'energy_predictor.onnx'
+
+
+class OnnxModel:
+    """
+    CPU onnxruntime session for a graph exported by ``models.graph_export.export_onnx``.
+    Nothing here imports torch, so inference-only containers can serve exported graphs with
+    just numpy and onnxruntime installed.
+    """
+
+    def __init__(self, source: Path | str | bytes, intra_op_threads: Optional[int] = None) -> None:
+        try:
+            import onnxruntime as ort  # type: ignore
+        except ImportError as exc:  # pragma: no cover - optional dependency
+            raise RuntimeError("onnxruntime is required for the ONNX inference backend") from exc
+
+        options = ort.SessionOptions()
+        threads = intra_op_threads or int(os.getenv("ONNX_INTRA_OP_THREADS", "1"))
+        options.intra_op_num_threads = threads
+        model = source if isinstance(source, bytes) else str(source)
+        self.session = ort.InferenceSession(model, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, inputs: np.ndarray) -> np.ndarray:
+        return self.session.run(None, {self.input_name: np.ascontiguousarray(inputs, dtype=np.float32)})[0]
+
+
+def load_energy_session(path: Optional[Path] = None) -> OnnxModel:
+    artifact = path or ENERGY_ONNX_PATH
+    if not artifact.exists():
+        raise FileNotFoundError(f"Export the energy predictor to {artifact} before using the ONNX backend")
+    return OnnxModel(artifact)
+
+
+def predict_next_day(load_curve: list[float], model: Optional[OnnxModel] = None) -> float:
+    return predict_next_day_batch([load_curve], model=model)[0]
+
+
+def predict_next_day_batch(load_curves: list[list[float]], model: Optional[OnnxModel] = None) -> list[float]:
+    """Same contract as ``energy_predictor.predict_next_day_batch``, served by onnxruntime."""
+    if any(len(curve) != 24 for curve in load_curves):
+        raise ValueError('Expected 24 hourly load values per curve')
+    if not load_curves:
+        return []
+    model = model or load_energy_session()
+    predictions = model(np.asarray(load_curves, dtype=np.float32)).reshape(-1)
+    return np.maximum(predictions, 0.0).astype(float).tolist()
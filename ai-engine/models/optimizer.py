@@ -3,16 +3,23 @@ from __future__ import annotations
 import math
 import statistics
 from dataclasses import dataclass
-from typing import Callable, Dict, List, Optional
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
 
 import numpy as np
 import optuna
 from optuna.samplers import TPESampler
+from optuna.trial import TrialState
 from prometheus_client import Counter, Summary
 
 optimizer_latency = Summary("optimizer_latency_seconds", "Latency of optimization runs")
 optimizer_suggestions = Counter("optimizer_suggestions_total", "Total optimization suggestions generated")
 
+SOLVERS = ("tpe", "auto")
+
+# Scores a population: (load_pct, runtime_hours, idle_hours) arrays shaped (candidates, equipment)
+BatchEvaluator = Callable[[np.ndarray, np.ndarray, np.ndarray], Dict[str, np.ndarray]]
+
 
 @dataclass
 class EquipmentConfig:
@@ -36,6 +43,16 @@ class OptimizationEngine:
     """
     Bayesian optimization wrapper that tunes equipment parameters to reduce energy & emissions.
     The objective function delegates to a user-provided callable that returns (energy_kwh, co2_kg).
+    When a batch evaluator is supplied, trials are drawn in batches via ask/tell and the whole
+    population is scored in a single vectorized call. ``n_jobs`` runs scalar trials in threads,
+    which only pays off for evaluators that release the GIL (remote simulators, native code).
+
+    ``solver="auto"`` skips the joint TPE search for evaluators marked with ``separable``: each
+    machine's (load, runtime, idle) is then minimised independently on a refined vectorized grid.
+
+    Passing an Optuna ``storage`` URL and ``study_name`` persists the study across runs: the best
+    earlier trials are re-enqueued as warm starts, and trials dominated by the baseline on both
+    energy and CO2 are recorded as pruned so they never seed or win later runs.
     """
 
     def __init__(
@@ -44,49 +61,176 @@ class OptimizationEngine:
         lambda_weight: float = 0.5,
         n_trials: int = 40,
         random_state: Optional[int] = 42,
+        n_jobs: int = 1,
+        batch_evaluator: Optional[BatchEvaluator] = None,
+        batch_size: int = 8,
+        storage: Optional[Union[str, optuna.storages.BaseStorage]] = None,
+        study_name: Optional[str] = None,
+        warm_start_trials: int = 5,
+        solver: str = "tpe",
+        grid_points: int = 17,
     ) -> None:
+        if solver not in SOLVERS:
+            raise ValueError(f"Unknown solver '{solver}'")
         self.evaluator = evaluator
         self.lambda_weight = lambda_weight
         self.n_trials = n_trials
         self.random_state = random_state
+        self.n_jobs = n_jobs
+        self.batch_evaluator = batch_evaluator
+        self.batch_size = max(batch_size, 1)
+        self.storage = storage
+        self.study_name = study_name
+        self.warm_start_trials = warm_start_trials
+        self.solver = solver
+        self.grid_points = max(grid_points, 3)
+
+    @staticmethod
+    def _bounds(eq: EquipmentConfig) -> Dict[str, Tuple[float, float]]:
+        return {
+            f"load_{eq.name}": (0.5 * eq.load_pct, 1.05 * eq.load_pct),
+            f"runtime_{eq.name}": (max(0.5 * eq.runtime_hours, 1.0), 1.1 * eq.runtime_hours),
+            f"idle_{eq.name}": (0.1, max(eq.idle_hours, 1.0)),
+        }
 
-    def _objective(self, trial: optuna.trial.Trial, baseline: List[EquipmentConfig]):
+    def _suggest(self, trial: optuna.trial.Trial, baseline: List[EquipmentConfig]) -> List[EquipmentConfig]:
         configs: List[EquipmentConfig] = []
         for eq in baseline:
-            load = trial.suggest_float(f"load_{eq.name}", 0.5 * eq.load_pct, 1.05 * eq.load_pct)
-            runtime = trial.suggest_float(f"runtime_{eq.name}", max(0.5 * eq.runtime_hours, 1.0), 1.1 * eq.runtime_hours)
-            idle = trial.suggest_float(f"idle_{eq.name}", 0.1, max(eq.idle_hours, 1.0))
+            load, runtime, idle = (trial.suggest_float(name, low, high) for name, (low, high) in self._bounds(eq).items())
             configs.append(EquipmentConfig(eq.name, load, runtime, idle))
+        return configs
+
+    @staticmethod
+    def _is_dominated(energy: float, co2: float, reference: Dict[str, float]) -> bool:
+        return energy >= reference["energy_kwh"] and co2 >= reference["co2_kg"] and (
+            energy > reference["energy_kwh"] or co2 > reference["co2_kg"]
+        )
 
-        metrics = self.evaluator(configs)
+    def _objective(self, trial: optuna.trial.Trial, baseline: List[EquipmentConfig], reference: Dict[str, float]):
+        metrics = self.evaluator(self._suggest(trial, baseline))
         energy = metrics["energy_kwh"]
         co2 = metrics["co2_kg"]
         objective = energy + self.lambda_weight * co2
+        if self._is_dominated(energy, co2, reference):
+            trial.report(objective, step=0)
+            raise optuna.TrialPruned()
         return objective
 
+    def _optimize_batched(self, study: optuna.Study, baseline: List[EquipmentConfig], reference: Dict[str, float]) -> None:
+        remaining = self.n_trials
+        while remaining > 0:
+            trials = [study.ask() for _ in range(min(self.batch_size, remaining))]
+            population = [self._suggest(trial, baseline) for trial in trials]
+            metrics = self.batch_evaluator(*population_arrays(population))
+            energies = np.asarray(metrics["energy_kwh"], dtype=float)
+            co2s = np.asarray(metrics["co2_kg"], dtype=float)
+            for trial, energy, co2 in zip(trials, energies, co2s):
+                objective = float(energy + self.lambda_weight * co2)
+                if self._is_dominated(energy, co2, reference):
+                    trial.report(objective, step=0)
+                    study.tell(trial, state=TrialState.PRUNED)
+                else:
+                    study.tell(trial, objective)
+            remaining -= len(trials)
+
+    def _create_study(self, concurrent: bool) -> optuna.Study:
+        return optuna.create_study(
+            storage=self.storage,
+            study_name=self.study_name,
+            load_if_exists=self.storage is not None,
+            # constant_liar keeps concurrently pending trials from collapsing onto the same point
+            sampler=TPESampler(seed=self.random_state, constant_liar=concurrent),
+            direction="minimize",
+        )
+
+    def _enqueue_warm_starts(self, study: optuna.Study, baseline: List[EquipmentConfig]) -> None:
+        bounds: Dict[str, Tuple[float, float]] = {}
+        for eq in baseline:
+            bounds.update(self._bounds(eq))
+        completed = study.get_trials(deepcopy=False, states=(TrialState.COMPLETE,))
+        seeds: List[Dict[str, float]] = []
+        for trial in sorted(completed, key=lambda trial: trial.value):
+            if len(seeds) >= self.warm_start_trials:
+                break
+            if not bounds.keys() <= trial.params.keys():
+                continue  # trial predates the current equipment list
+            params = {name: float(np.clip(trial.params[name], low, high)) for name, (low, high) in bounds.items()}
+            if params not in seeds:  # earlier warm starts re-evaluated the same configs
+                seeds.append(params)
+        for params in seeds:
+            study.enqueue_trial(params)
+
+    def _optimize_separable(self, baseline: List[EquipmentConfig], machine_terms: BatchEvaluator) -> List[EquipmentConfig]:
+        # (machines, 3) lower/upper bounds in load, runtime, idle order
+        bounds = np.array([list(self._bounds(eq).values()) for eq in baseline], dtype=float)
+        low, high = bounds[..., 0], bounds[..., 1]
+        axis = np.linspace(0.0, 1.0, self.grid_points)
+        unit_grid = np.stack(np.meshgrid(axis, axis, axis, indexing="ij"), axis=-1).reshape(-1, 3)
+        machines = np.arange(len(baseline))
+        for _ in range(3):
+            # candidates shaped (grid, machines, 3); every machine is scored on its own grid at once
+            candidates = low + unit_grid[:, None, :] * (high - low)
+            terms = machine_terms(candidates[..., 0], candidates[..., 1], candidates[..., 2])
+            objective = np.asarray(terms["energy_kwh"]) + self.lambda_weight * np.asarray(terms["co2_kg"])
+            best = candidates[objective.argmin(axis=0), machines]
+            # zoom into one grid step around each machine's optimum, clipped to the original bounds
+            step = (high - low) / (self.grid_points - 1)
+            low = np.maximum(best - step, bounds[..., 0])
+            high = np.minimum(best + step, bounds[..., 1])
+        return [
+            EquipmentConfig(eq.name, float(load), float(runtime), float(idle))
+            for eq, (load, runtime, idle) in zip(baseline, best)
+        ]
+
     @optimizer_latency.time()
     def optimize(self, baseline: List[EquipmentConfig]) -> OptimizationResult:
         baseline_metrics = self.evaluator(baseline)
         baseline_objective = baseline_metrics["energy_kwh"] + self.lambda_weight * baseline_metrics["co2_kg"]
 
-        study = optuna.create_study(
-            sampler=TPESampler(seed=self.random_state),
-            direction="minimize",
-        )
-        study.optimize(lambda trial: self._objective(trial, baseline), n_trials=self.n_trials, show_progress_bar=False)
-        best_trial = study.best_trial
+        machine_terms = getattr(self.evaluator, "machine_terms", None)
+        if self.solver == "auto" and machine_terms is not None and baseline:
+            recommended = self._optimize_separable(baseline, machine_terms)
+            return self._result(recommended, baseline_objective)
 
-        recommended: List[EquipmentConfig] = []
-        for eq in baseline:
-            recommended.append(
+        concurrent = self.n_jobs != 1 or (self.batch_evaluator is not None and self.batch_size > 1)
+        study = self._create_study(concurrent)
+        first_trial = len(study.get_trials(deepcopy=False))
+        if self.storage is not None and first_trial:
+            self._enqueue_warm_starts(study, baseline)
+
+        if self.batch_evaluator is not None:
+            self._optimize_batched(study, baseline, baseline_metrics)
+        else:
+            study.optimize(
+                lambda trial: self._objective(trial, baseline, baseline_metrics),
+                n_trials=self.n_trials,
+                n_jobs=self.n_jobs,
+                show_progress_bar=False,
+            )
+
+        # Earlier runs in a persisted study may use other bounds, so only pick from this run
+        completed = [
+            trial
+            for trial in study.get_trials(deepcopy=False, states=(TrialState.COMPLETE,))
+            if trial.number >= first_trial
+        ]
+        if completed:
+            best_trial = min(completed, key=lambda trial: trial.value)
+            recommended = [
                 EquipmentConfig(
                     name=eq.name,
                     load_pct=float(best_trial.params[f"load_{eq.name}"]),
                     runtime_hours=float(best_trial.params[f"runtime_{eq.name}"]),
                     idle_hours=float(best_trial.params[f"idle_{eq.name}"]),
                 )
-            )
+                for eq in baseline
+            ]
+        else:
+            recommended = [EquipmentConfig(eq.name, eq.load_pct, eq.runtime_hours, eq.idle_hours) for eq in baseline]
 
+        return self._result(recommended, baseline_objective)
+
+    def _result(self, recommended: List[EquipmentConfig], baseline_objective: float) -> OptimizationResult:
         best_metrics = self.evaluator(recommended)
         best_objective = best_metrics["energy_kwh"] + self.lambda_weight * best_metrics["co2_kg"]
         savings_pct = (baseline_objective - best_objective) / baseline_objective * 100.0
@@ -102,17 +246,75 @@ class OptimizationEngine:
         )
 
 
+@lru_cache(maxsize=None)
+def study_storage(url: str) -> optuna.storages.RDBStorage:
+    """
+    Shared RDB storage per URL (e.g. ``sqlite:////models/optimizer_studies.db``) so services do not
+    rebuild the engine and re-check the schema on every request.
+    """
+    return optuna.storages.RDBStorage(url, engine_kwargs={"connect_args": {"timeout": 30}})
+
+
+def default_solver(solver: Optional[str], storage_url: Optional[str]) -> str:
+    """
+    Validate a configured solver name; unset means TPE when a study is persisted (its warm starts
+    only apply to TPE) and the separable fast path otherwise.
+    """
+    if not solver:
+        return "tpe" if storage_url else "auto"
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver '{solver}', expected one of {', '.join(SOLVERS)}")
+    return solver
+
+
+def population_arrays(population: Sequence[Sequence[EquipmentConfig]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Stack candidate configurations into (candidates, equipment) arrays of load, runtime and idle hours.
+    """
+    values = np.array(
+        [[(cfg.load_pct, cfg.runtime_hours, cfg.idle_hours) for cfg in configs] for configs in population],
+        dtype=float,
+    ).reshape(len(population), -1, 3)
+    return values[..., 0], values[..., 1], values[..., 2]
+
+
+def separable(machine_terms: BatchEvaluator) -> Callable[[Callable], Callable]:
+    """
+    Mark an evaluator as a sum of independent per-machine terms. ``machine_terms`` takes the same
+    arrays as a batch evaluator but returns per-machine energy/CO2 without summing over equipment,
+    which lets ``OptimizationEngine(solver="auto")`` optimize each machine on its own.
+    """
+
+    def decorate(evaluator: Callable) -> Callable:
+        evaluator.machine_terms = machine_terms  # type: ignore[attr-defined]
+        return evaluator
+
+    return decorate
+
+
+def sample_machine_terms(load_pct: np.ndarray, runtime_hours: np.ndarray, idle_hours: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Per-machine energy and CO2 of the sample model, element-wise over the input arrays.
+    """
+    load_factor = np.asarray(load_pct, dtype=float) / 100.0
+    efficiency = np.maximum(0.9 - 0.2 * np.abs(load_factor - 0.85), 0.1)
+    runtime_effect = np.asarray(runtime_hours, dtype=float) + 0.1 * np.asarray(idle_hours, dtype=float)
+    energy = runtime_effect * load_factor / efficiency * 10
+    return {"energy_kwh": energy, "co2_kg": energy * 0.82}
+
+
+def sample_batch_evaluator(load_pct: np.ndarray, runtime_hours: np.ndarray, idle_hours: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Vectorized counterpart of ``sample_evaluator`` scoring a whole population in one call.
+    """
+    terms = sample_machine_terms(load_pct, runtime_hours, idle_hours)
+    return {name: values.sum(axis=-1) for name, values in terms.items()}
+
+
+@separable(sample_machine_terms)
 def sample_evaluator(configs: List[EquipmentConfig]) -> Dict[str, float]:
     """
     Simple evaluator used in tests. Models energy as quadratic in load/runtime and emissions proportional to energy.
     """
-    energy = 0.0
-    co2 = 0.0
-    for cfg in configs:
-        load_factor = cfg.load_pct / 100.0
-        efficiency = 0.9 - 0.2 * abs(load_factor - 0.85)
-        runtime_effect = cfg.runtime_hours + 0.1 * cfg.idle_hours
-        machine_energy = runtime_effect * load_factor / max(efficiency, 0.1) * 10
-        energy += machine_energy
-        co2 += machine_energy * 0.82
-    return {"energy_kwh": energy, "co2_kg": co2}
+    metrics = sample_batch_evaluator(*population_arrays([configs]))
+    return {"energy_kwh": float(metrics["energy_kwh"][0]), "co2_kg": float(metrics["co2_kg"][0])}
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS models_registry (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    model_name TEXT NOT NULL,
+    version TEXT NOT NULL,
+    accuracy REAL,
+    path TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    site_id INTEGER,
+    fingerprint TEXT,
+    summary TEXT,
+    stage TEXT NOT NULL DEFAULT 'candidate',
+    promoted_at TEXT
+)
+"""
+STAGES = ("candidate", "production", "archived")
+# columns added after the first release; older registry files are migrated in place
+_ADDED_COLUMNS = (
+    ("site_id", "INTEGER"),
+    ("fingerprint", "TEXT"),
+    ("summary", "TEXT"),
+    ("stage", "TEXT NOT NULL DEFAULT 'candidate'"),
+    ("promoted_at", "TEXT"),
+)
+_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS ix_models_registry_model_site_created ON models_registry (model_name, site_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_models_registry_created ON models_registry (created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_models_registry_model_site_stage ON models_registry (model_name, site_id, stage)",
+)
+_COLUMNS = "id, model_name, version, accuracy, path, created_at, site_id, fingerprint, summary, stage, promoted_at"
+
+
+@dataclass
+class RegistryEntry:
+    id: int
+    model_name: str
+    version: str
+    accuracy: Optional[float]
+    path: str
+    created_at: datetime
+    site_id: Optional[int]
+    fingerprint: Optional[str]
+    summary: Dict[str, Any]
+    stage: str = "candidate"
+    promoted_at: Optional[datetime] = None
+
+    @classmethod
+    def from_row(cls, row: Tuple) -> "RegistryEntry":
+        return cls(
+            id=row[0],
+            model_name=row[1],
+            version=row[2],
+            accuracy=row[3],
+            path=row[4],
+            created_at=datetime.fromisoformat(row[5]),
+            site_id=row[6],
+            fingerprint=row[7],
+            summary=json.loads(row[8]) if row[8] else {},
+            stage=row[9],
+            promoted_at=datetime.fromisoformat(row[10]) if row[10] else None,
+        )
+
+
+class ModelRegistry:
+    """
+    SQLite model registry in WAL mode. One connection is shared per process and file (see
+    ``get_registry``); the schema, migrations and indexes are applied once when it opens, so
+    readers never block the retrain workers writing new versions.
+    """
+
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(_SCHEMA)
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(models_registry)")}
+            for column, ddl in _ADDED_COLUMNS:
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE models_registry ADD COLUMN {column} {ddl}")
+            for statement in _INDEXES:
+                self._conn.execute(statement)
+
+    def _fetch(self, sql: str, params: Tuple = ()) -> List[RegistryEntry]:
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [RegistryEntry.from_row(row) for row in rows]
+
+    def record(
+        self,
+        model_name: str,
+        site_id: Optional[int],
+        accuracy: Optional[float],
+        path: str,
+        fingerprint: Optional[str] = None,
+        summary: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        now = datetime.utcnow()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                """
+                INSERT INTO models_registry (model_name, version, accuracy, path, created_at, site_id, fingerprint, summary)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    model_name,
+                    now.strftime("%Y%m%d%H%M%S"),
+                    accuracy,
+                    path,
+                    now.isoformat(),
+                    site_id,
+                    fingerprint,
+                    json.dumps(summary) if summary is not None else None,
+                ),
+            )
+        return int(cursor.lastrowid)
+
+    def latest(self, model_name: str, site_id: Optional[int], with_fingerprint: bool = False) -> Optional[RegistryEntry]:
+        condition = " AND fingerprint IS NOT NULL" if with_fingerprint else ""
+        entries = self._fetch(
+            f"""
+            SELECT {_COLUMNS} FROM models_registry
+            WHERE model_name = ? AND site_id IS ?{condition}
+            ORDER BY created_at DESC, id DESC LIMIT 1
+            """,
+            (model_name, site_id),
+        )
+        return entries[0] if entries else None
+
+    def query(
+        self,
+        model_name: Optional[str] = None,
+        site_id: Optional[int] = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> List[RegistryEntry]:
+        clauses, params = self._filters(model_name, site_id)
+        return self._fetch(
+            f"SELECT {_COLUMNS} FROM models_registry{clauses} ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+            (*params, limit, offset),
+        )
+
+    def count(self, model_name: Optional[str] = None, site_id: Optional[int] = None) -> int:
+        clauses, params = self._filters(model_name, site_id)
+        with self._lock:
+            return int(self._conn.execute(f"SELECT COUNT(*) FROM models_registry{clauses}", params).fetchone()[0])
+
+    def latest_per_site(self, model_name: str) -> List[RegistryEntry]:
+        return self._fetch(
+            f"""
+            SELECT {_COLUMNS} FROM models_registry AS entry
+            WHERE model_name = ? AND id = (
+                SELECT id FROM models_registry
+                WHERE model_name = entry.model_name AND site_id IS entry.site_id
+                ORDER BY created_at DESC, id DESC LIMIT 1
+            )
+            ORDER BY site_id
+            """,
+            (model_name,),
+        )
+
+    @staticmethod
+    def _filters(model_name: Optional[str], site_id: Optional[int]) -> Tuple[str, Tuple]:
+        clauses: List[str] = []
+        params: List[Any] = []
+        if model_name is not None:
+            clauses.append("model_name = ?")
+            params.append(model_name)
+        if site_id is not None:
+            clauses.append("site_id = ?")
+            params.append(site_id)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), tuple(params)
+
+    def get(self, entry_id: int) -> Optional[RegistryEntry]:
+        entries = self._fetch(f"SELECT {_COLUMNS} FROM models_registry WHERE id = ?", (entry_id,))
+        return entries[0] if entries else None
+
+    def production(self, model_name: str, site_id: Optional[int]) -> Optional[RegistryEntry]:
+        entries = self._fetch(
+            f"""
+            SELECT {_COLUMNS} FROM models_registry
+            WHERE model_name = ? AND site_id IS ? AND stage = 'production'
+            ORDER BY promoted_at DESC, id DESC LIMIT 1
+            """,
+            (model_name, site_id),
+        )
+        return entries[0] if entries else None
+
+    def promote(self, entry_id: int) -> RegistryEntry:
+        """Make ``entry_id`` the production version of its model and site, archiving the previous one."""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT model_name, site_id FROM models_registry WHERE id = ?", (entry_id,)
+            ).fetchone()
+            if row is None:
+                raise KeyError(f"Registry entry {entry_id} does not exist")
+            self._conn.execute(
+                """
+                UPDATE models_registry SET stage = 'archived'
+                WHERE model_name = ? AND site_id IS ? AND stage = 'production' AND id != ?
+                """,
+                (row[0], row[1], entry_id),
+            )
+            self._conn.execute(
+                "UPDATE models_registry SET stage = 'production', promoted_at = ? WHERE id = ?",
+                (datetime.utcnow().isoformat(), entry_id),
+            )
+        return self.get(entry_id)  # type: ignore[return-value]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_REGISTRIES: Dict[Tuple[str, int], ModelRegistry] = {}
+_REGISTRIES_LOCK = threading.Lock()
+
+
+def get_registry(path: Path | str) -> ModelRegistry:
+    """Process-wide registry per file; keyed by pid as well so forked children never share a connection."""
+    key = (str(Path(path).resolve()), os.getpid())
+    with _REGISTRIES_LOCK:
+        registry = _REGISTRIES.get(key)
+        if registry is None:
+            registry = _REGISTRIES[key] = ModelRegistry(path)
+        return registry
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from pathlib import Path
+from typing import Optional
 
 import numpy as np
 from joblib import dump, load
@@ -10,20 +11,28 @@ MODEL_PATH = Path(__file__).resolve().parent / 'artifacts' / 'waste_model.joblib
 
 
 class WasteEmissionModel:
-    def __init__(self) -> None:
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = path or MODEL_PATH
         self.model = LinearRegression()
         self._ensure_model()
 
     def _ensure_model(self) -> None:
-        if MODEL_PATH.exists():
-            self.model = load(MODEL_PATH)
+        if self.path.exists():
+            self.model = load(self.path)
         else:
             # Train a baseline model that approximates typical conversion factors
             x = np.array([[0.5], [1.0], [1.5], [2.0]])
             y = np.array([1.0, 2.5, 3.3, 4.8])
             self.model.fit(x, y)
-            dump(self.model, MODEL_PATH)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            dump(self.model, self.path)
 
     def predict(self, waste_kg: float) -> float:
         prediction = self.model.predict([[waste_kg]])[0]
-        return float(max(prediction, 0.0))
\ No newline at end of file
+        return float(max(prediction, 0.0))
+
+    def predict_many(self, waste_kg: list[float]) -> list[float]:
+        if not waste_kg:
+            return []
+        predictions = self.model.predict(np.asarray(waste_kg, dtype=float).reshape(-1, 1))
+        return np.maximum(predictions, 0.0).astype(float).tolist()
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import copy
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+import torch
+
+from models.intelligent_forecaster import IntelligentForecaster, compute_mae, generate_synthetic_telemetry
+
+# (rf_profile, artifact_compression, lstm_precision)
+DEFAULT_CONFIGS: Tuple[Tuple[str, str, str], ...] = (
+    ("full", "none", "float32"),
+    ("full", "zlib", "float32"),
+    ("full", "lz4", "float32"),
+    ("compact", "none", "float32"),
+    ("compact", "lz4", "float32"),
+    ("compact", "lz4", "float16"),
+)
+
+
+def _best_of(load, repeats: int = 3) -> float:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        load()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def benchmark_artifacts(
+    telemetry: pd.DataFrame,
+    configs: Iterable[Tuple[str, str, str]] = DEFAULT_CONFIGS,
+    holdout_hours: int = 24,
+    epochs: int = 50,
+) -> List[Dict[str, object]]:
+    """
+    Artifact size, cold load time and holdout accuracy of the ensemble per export configuration.
+    One forecaster is fitted per RF profile; compression and LSTM precision are applied at export,
+    and accuracy is measured after reloading the exported LSTM weights.
+    """
+    train, holdout = telemetry.iloc[:-holdout_hours], telemetry.iloc[-holdout_hours:]
+    actual = holdout["energy_kwh"].astype(float).tolist()
+    fitted: Dict[str, IntelligentForecaster] = {}
+    rows: List[Dict[str, object]] = []
+    for rf_profile, compression, precision in configs:
+        if rf_profile not in fitted:
+            torch.manual_seed(42)
+            forecaster = IntelligentForecaster(device="cpu", rf_profile=rf_profile)
+            forecaster.fit(train, epochs=epochs)
+            fitted[rf_profile] = forecaster
+        forecaster = copy.deepcopy(fitted[rf_profile])
+        forecaster.artifact_compression = compression
+        forecaster.lstm_precision = precision
+        with tempfile.TemporaryDirectory() as work_dir:
+            forecaster.artifact_dir = Path(work_dir)
+            paths = forecaster.export_artifacts()
+            rf_path, lstm_path = Path(paths["random_forest"]), Path(paths["lstm"])
+            rf_load = _best_of(lambda: joblib.load(rf_path))
+            lstm_load = _best_of(lambda: torch.load(lstm_path, map_location="cpu"))
+            forecaster.load_lstm_weights(lstm_path)
+            rows.append(
+                {
+                    "rf_profile": rf_profile,
+                    "compression": compression,
+                    "lstm_precision": precision,
+                    "rf_mb": rf_path.stat().st_size / 1e6,
+                    "lstm_kb": lstm_path.stat().st_size / 1e3,
+                    "rf_load_ms": rf_load * 1000,
+                    "lstm_load_ms": lstm_load * 1000,
+                    "holdout_mae": compute_mae(actual, [point.prediction for point in forecaster.predict(holdout_hours)]),
+                }
+            )
+    return rows
+
+
+def format_table(rows: Sequence[Dict[str, object]]) -> str:
+    frame = pd.DataFrame(rows)
+    return frame.to_string(index=False, float_format=lambda value: f"{value:.3f}")
+
+
+if __name__ == "__main__":
+    np.random.seed(42)
+    print(format_table(benchmark_artifacts(generate_synthetic_telemetry(datetime(2024, 1, 1), periods=24 * 30))))
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# MinIO switches to multipart above one part; 16 MiB parts keep large RF joblibs streaming in parallel
+PART_SIZE = 16 * 1024 * 1024
+_CHUNK = 1024 * 1024
+
+
+def sha256_file(path: Path | str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@dataclass
+class StoredArtifact:
+    object_name: str
+    sha256: str
+    size: int
+
+
+class ArtifactUploader:
+    """
+    Uploads a set of artifact files concurrently, multipart for anything larger than ``part_size``.
+    ``max_workers`` bounds the total number of parts in flight across all files, and a failed set
+    is removed again so no half-uploaded version is left behind.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        bucket: str,
+        sse: Any = None,
+        max_workers: int = 4,
+        part_size: int = PART_SIZE,
+    ) -> None:
+        self.client = client
+        self.bucket = bucket
+        self.sse = sse
+        self.max_workers = max(max_workers, 1)
+        self.part_size = part_size
+
+    def _upload(self, path: Path, object_name: str, parallel_parts: int) -> StoredArtifact:
+        checksum = sha256_file(path)
+        self.client.fput_object(
+            self.bucket,
+            object_name,
+            str(path),
+            metadata={"sha256": checksum},
+            sse=self.sse,
+            part_size=self.part_size,
+            num_parallel_uploads=parallel_parts,
+        )
+        return StoredArtifact(object_name=object_name, sha256=checksum, size=path.stat().st_size)
+
+    def upload_all(self, artifacts: Dict[str, str], prefix: str) -> Dict[str, Dict[str, Any]]:
+        if not self.client.bucket_exists(self.bucket):
+            self.client.make_bucket(self.bucket)
+        files = min(self.max_workers, max(len(artifacts), 1))
+        parallel_parts = max(self.max_workers // files, 1)
+        with ThreadPoolExecutor(max_workers=files) as pool:
+            futures = {
+                name: pool.submit(self._upload, Path(path), f"{prefix}/{Path(path).name}", parallel_parts)
+                for name, path in artifacts.items()
+            }
+            wait(futures.values())
+        failed = [future.exception() for future in futures.values() if future.exception() is not None]
+        if failed:
+            self._remove(future.result().object_name for future in futures.values() if future.exception() is None)
+            raise failed[0]
+        return {name: asdict(future.result()) for name, future in futures.items()}
+
+    def _remove(self, object_names: Iterable[str]) -> None:
+        for object_name in object_names:
+            try:
+                self.client.remove_object(self.bucket, object_name)
+            except Exception as exc:
+                logger.warning("Could not remove partially uploaded %s: %s", object_name, exc)
+
+
+def is_cached_only(artifacts: Dict[str, Dict[str, Any]]) -> bool:
+    """Whether any of a registry entry's artifacts was kept in a local cache instead of object storage."""
+    return any(Path(artifact["object_name"]).is_absolute() for artifact in artifacts.values())
+
+
+class ArtifactCache:
+    """
+    Content-addressed artifact files on local disk (``<root>/<sha[:2]>/<sha><suffix>``).
+    Fetching an artifact whose checksum is already cached never touches object storage, and
+    downloads are verified before they are moved into place.
+    """
+
+    def __init__(self, root: Path | str, client: Any = None, bucket: Optional[str] = None, sse: Any = None) -> None:
+        self.root = Path(root)
+        self.client = client
+        self.bucket = bucket
+        self.sse = sse
+
+    def path_for(self, sha256: str, suffix: str = "") -> Path:
+        return self.root / sha256[:2] / f"{sha256}{suffix}"
+
+    def put(self, path: Path | str, sha256: Optional[str] = None) -> Path:
+        """Copy a local file into the cache (used to keep artifacts when uploads fail)."""
+        path = Path(path)
+        sha256 = sha256 or sha256_file(path)
+        target = self.path_for(sha256, path.suffix)
+        if not target.exists():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = target.with_name(f".{target.name}.tmp")
+            shutil.copyfile(path, tmp_path)
+            os.replace(tmp_path, target)
+        return target
+
+    def keep(self, artifacts: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+        """Registry entries for artifacts kept only in the cache, recorded by their absolute cached path."""
+        stored: Dict[str, Dict[str, Any]] = {}
+        for name, path in artifacts.items():
+            checksum = sha256_file(path)
+            cached = self.put(path, checksum)
+            stored[name] = {"object_name": cached.resolve().as_posix(), "sha256": checksum, "size": cached.stat().st_size}
+        return stored
+
+    def fetch(self, object_name: str, sha256: str) -> Path:
+        target = self.path_for(sha256, Path(object_name).suffix)
+        if target.exists():
+            return target
+        if self.client is None or self.bucket is None:
+            raise FileNotFoundError(f"{object_name} ({sha256}) is not cached and no object store is configured")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        handle, tmp_name = tempfile.mkstemp(dir=target.parent, suffix=".part")
+        os.close(handle)
+        try:
+            self.client.fget_object(self.bucket, object_name, tmp_name, ssec=self.sse)
+            actual = sha256_file(tmp_name)
+            if actual != sha256:
+                raise ValueError(f"Checksum mismatch for {object_name}: expected {sha256}, got {actual}")
+            os.replace(tmp_name, target)
+        finally:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+        return target
+
+    def resolve(self, artifacts: Dict[str, Dict[str, Any]]) -> Dict[str, Path]:
+        """Local paths for a registry entry's artifacts (``{name: {object_name, sha256, size}}``)."""
+        paths: Dict[str, Path] = {}
+        for name, artifact in artifacts.items():
+            local = Path(artifact["object_name"])
+            # artifacts whose upload failed were recorded by their absolute cache path, which only
+            # exists on the host that trained them
+            if local.is_absolute():
+                if not local.exists():
+                    raise FileNotFoundError(f"{name} was never uploaded and is not cached here ({local})")
+                paths[name] = local
+            else:
+                paths[name] = self.fetch(artifact["object_name"], artifact["sha256"])
+        return paths
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import json
+import logging
+import math
+import multiprocessing
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from multiprocessing.connection import Connection, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+SiteRunner = Callable[[int], Dict[str, float]]
+
+
+@dataclass
+class SiteInfo:
+    site_id: int
+    last_data_at: Optional[datetime] = None
+
+
+@dataclass
+class SiteOutcome:
+    site_id: int
+    status: str  # "succeeded" | "failed" | "timed_out"
+    started_at: str
+    duration_seconds: float
+    metrics: Dict[str, float] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+def _run_child(runner: SiteRunner, site_id: int, conn: Connection) -> None:
+    try:
+        conn.send(("succeeded", runner(site_id)))
+    except BaseException as exc:  # report everything, the parent decides what it means
+        conn.send(("failed", f"{type(exc).__name__}: {exc}"))
+    finally:
+        conn.close()
+
+
+class FleetRetrainScheduler:
+    """
+    Retrains every site of the fleet from one process tree. Sites run in child processes, at most
+    ``max_workers`` at a time, and are killed after ``site_timeout`` seconds. Progress is written to
+    ``state_path`` after every site, so a crashed or interrupted run resumes with the sites it had
+    not finished; the persisted last-training times drive the next run's priorities.
+    """
+
+    def __init__(
+        self,
+        runner: SiteRunner,
+        state_path: Path,
+        report_dir: Path,
+        max_workers: Optional[int] = None,
+        site_timeout: float = 3600.0,
+        mp_context: Optional[str] = None,
+    ) -> None:
+        self.runner = runner
+        self.state_path = Path(state_path)
+        self.report_dir = Path(report_dir)
+        self.max_workers = max(1, max_workers or os.cpu_count() or 1)
+        self.site_timeout = site_timeout
+        # spawn keeps children free of the parent's torch/BLAS thread state
+        self._mp = multiprocessing.get_context(mp_context or "spawn")
+
+    def _load_state(self) -> Dict[str, Any]:
+        if not self.state_path.exists():
+            return {"last_trained": {}, "run": None}
+        return json.loads(self.state_path.read_text(encoding="utf-8"))
+
+    def _save_state(self, state: Dict[str, Any]) -> None:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(state, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.state_path)
+
+    @staticmethod
+    def prioritize(sites: Sequence[SiteInfo], last_trained: Dict[str, str], now: datetime) -> List[SiteInfo]:
+        """Sites with data newer than their model first, then the stalest models; never-trained sites lead."""
+
+        def key(site: SiteInfo) -> tuple:
+            trained = last_trained.get(str(site.site_id))
+            if trained is None:
+                return (0, -math.inf)
+            trained_at = datetime.fromisoformat(trained)
+            has_new_data = site.last_data_at is None or site.last_data_at > trained_at
+            return (0 if has_new_data else 1, -(now - trained_at).total_seconds())
+
+        return sorted(sites, key=key)
+
+    def run(self, sites: Sequence[SiteInfo]) -> Dict[str, Any]:
+        state = self._load_state()
+        now = datetime.utcnow()
+        run = state.get("run")
+        if run and run.get("status") == "running":
+            logger.info("Resuming retrain run %s (%s sites done)", run["run_id"], len(run["outcomes"]))
+        else:
+            run = {"run_id": now.strftime("%Y%m%d%H%M%S"), "started_at": now.isoformat(), "status": "running", "outcomes": {}}
+            state["run"] = run
+            self._save_state(state)
+
+        ordered = self.prioritize(sites, state["last_trained"], now)
+        pending = deque(site.site_id for site in ordered if str(site.site_id) not in run["outcomes"])
+        running: Dict[Connection, tuple] = {}
+
+        while pending or running:
+            while pending and len(running) < self.max_workers:
+                site_id = pending.popleft()
+                parent_conn, child_conn = self._mp.Pipe(duplex=False)
+                process = self._mp.Process(target=_run_child, args=(self.runner, site_id, child_conn), daemon=True)
+                process.start()
+                child_conn.close()
+                running[parent_conn] = (site_id, process, time.monotonic(), datetime.utcnow().isoformat())
+
+            ready = wait(list(running), timeout=1.0)
+            for conn in list(running):
+                site_id, process, started, started_at = running[conn]
+                elapsed = time.monotonic() - started
+                if conn in ready:
+                    try:
+                        status, payload = conn.recv()
+                    except EOFError:  # child died without reporting (e.g. OOM kill)
+                        process.join()
+                        status, payload = "failed", f"exited with code {process.exitcode}"
+                elif elapsed > self.site_timeout:
+                    process.kill()
+                    status, payload = "timed_out", f"exceeded {self.site_timeout:.0f}s"
+                else:
+                    continue
+                process.join()
+                conn.close()
+                del running[conn]
+                outcome = SiteOutcome(
+                    site_id=site_id,
+                    status=status,
+                    started_at=started_at,
+                    duration_seconds=round(elapsed, 3),
+                    metrics=payload if status == "succeeded" else {},
+                    error=None if status == "succeeded" else payload,
+                )
+                self._record(state, outcome)
+
+        run["status"] = "finished"
+        run["finished_at"] = datetime.utcnow().isoformat()
+        report = self._report(run)
+        self._save_state(state)
+        return report
+
+    def _record(self, state: Dict[str, Any], outcome: SiteOutcome) -> None:
+        state["run"]["outcomes"][str(outcome.site_id)] = outcome.__dict__
+        if outcome.status == "succeeded":
+            state["last_trained"][str(outcome.site_id)] = datetime.utcnow().isoformat()
+        else:
+            logger.warning("Retrain of site %s %s: %s", outcome.site_id, outcome.status, outcome.error)
+        self._save_state(state)
+
+    def _report(self, run: Dict[str, Any]) -> Dict[str, Any]:
+        outcomes = list(run["outcomes"].values())
+        counts: Dict[str, int] = {}
+        for outcome in outcomes:
+            counts[outcome["status"]] = counts.get(outcome["status"], 0) + 1
+        report = {
+            "run_id": run["run_id"],
+            "started_at": run["started_at"],
+            "finished_at": run["finished_at"],
+            "sites": len(outcomes),
+            "counts": counts,
+            "slowest": sorted(outcomes, key=lambda item: item["duration_seconds"], reverse=True)[:5],
+            "outcomes": outcomes,
+        }
+        self.report_dir.mkdir(parents=True, exist_ok=True)
+        path = self.report_dir / f"retrain-report-{run['run_id']}.json"
+        path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        logger.info("Fleet retrain %s finished: %s (report: %s)", run["run_id"], counts, path)
+        return report
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from prometheus_client.core import GaugeMetricFamily
+
+from pipelines.forecast_precompute import adapt_sql, connect_dsn
+
+logger = logging.getLogger(__name__)
+
+# forecast lead times are reported per bucket, labelled by the bucket's upper bound in hours
+HORIZON_BUCKETS = (6, 24, 72, 168)
+ROLLING_DAYS = 7
+# telemetry_1h's refresh policy (end_offset 1h, schedule_interval 1h): a bucket can take this long
+# after its hour ends to be materialized
+REFRESH_LAG = timedelta(hours=2)
+_WATERMARK_KEY = "telemetry_1h"
+
+# Hourly actuals per site from the continuous aggregate, joined to every stored forecast for that
+# hour (the current one and those a later horizon replaced); only hours after the watermark are
+# read, so every run touches the new buckets alone.
+_FORECASTS_SQL = """
+    SELECT site_id, timestamp, issued_at, predicted_kwh FROM {table}
+    WHERE timestamp > %s AND timestamp <= %s AND issued_at IS NOT NULL
+"""
+_PAIRS_SQL = """
+    SELECT f.site_id, f.timestamp, f.issued_at, f.predicted_kwh, SUM(agg.avg_power) / 1000.0 AS actual_kwh
+    FROM ({current} UNION ALL {superseded}) AS f
+    JOIN device ON device.site_id = f.site_id
+    JOIN telemetry_1h AS agg ON agg.device_id = device.device_id AND agg.bucket = f.timestamp
+    GROUP BY f.site_id, f.timestamp, f.issued_at, f.predicted_kwh
+""".format(
+    current=_FORECASTS_SQL.format(table="forecast_energy"),
+    superseded=_FORECASTS_SQL.format(table="forecast_energy_superseded"),
+)
+_UPSERT_SQL = """
+    INSERT INTO forecast_accuracy_daily (site_id, horizon_hours, day, samples, abs_error_sum, pct_samples, pct_error_sum)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT (site_id, horizon_hours, day) DO UPDATE SET
+        samples = forecast_accuracy_daily.samples + excluded.samples,
+        abs_error_sum = forecast_accuracy_daily.abs_error_sum + excluded.abs_error_sum,
+        pct_samples = forecast_accuracy_daily.pct_samples + excluded.pct_samples,
+        pct_error_sum = forecast_accuracy_daily.pct_error_sum + excluded.pct_error_sum
+"""
+_WATERMARK_SQL = """
+    INSERT INTO forecast_accuracy_state (name, watermark) VALUES (%s, %s)
+    ON CONFLICT (name) DO UPDATE SET watermark = excluded.watermark
+"""
+
+
+@dataclass
+class SiteAccuracy:
+    site_id: int
+    horizon_hours: int
+    samples: int
+    mae: float
+    mape: Optional[float]
+
+
+def horizon_bucket(lead_hours: float) -> int:
+    for bound in HORIZON_BUCKETS:
+        if lead_hours <= bound:
+            return bound
+    return HORIZON_BUCKETS[-1]
+
+
+class ForecastAccuracyTracker:
+    """
+    Rolling forecast accuracy per site and lead time, stored in the backend's
+    ``forecast_accuracy_daily`` and ``forecast_accuracy_state`` tables. ``update`` joins the precomputed
+    ``forecast_energy`` rows against ``telemetry_1h`` for the hours since its watermark and adds
+    the errors to per-day sums, so a rolling window is a sum over a few rows per site.
+    The watermark only moves up to the newest bucket that was actually joined, so hours the
+    aggregate had not materialized yet are scored on a later run; buckets revised after they
+    were scored are not re-read.
+    """
+
+    def __init__(self, connect: Callable[[], Any], paramstyle: str = "format", refresh_lag: timedelta = REFRESH_LAG) -> None:
+        self._connect = connect
+        self.paramstyle = paramstyle
+        self.refresh_lag = refresh_lag
+
+    @classmethod
+    def from_dsn(cls, dsn: str) -> "ForecastAccuracyTracker":
+        return cls(connect_dsn(dsn))
+
+    def _sql(self, statement: str) -> str:
+        return adapt_sql(statement, self.paramstyle)
+
+    def update(self, until: Optional[datetime] = None, backfill_hours: int = 24 * ROLLING_DAYS) -> int:
+        """Score the hours after the watermark up to ``until`` (default: the last hour the aggregate is sure to hold)."""
+        until = until or datetime.utcnow().replace(minute=0, second=0, microsecond=0) - self.refresh_lag
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(self._sql("SELECT watermark FROM forecast_accuracy_state WHERE name = %s"), (_WATERMARK_KEY,))
+            row = cursor.fetchone()
+            since = _as_datetime(row[0]) if row else until - timedelta(hours=backfill_hours)
+            if since >= until:
+                conn.commit()
+                return 0
+            cursor.execute(self._sql(_PAIRS_SQL), (since, until, since, until))
+            sums: Dict[tuple, List[float]] = {}
+            scored = 0
+            newest: Optional[datetime] = None
+            for site_id, timestamp, issued_at, predicted, actual in cursor.fetchall():
+                if actual is None:
+                    continue
+                timestamp, issued_at = _as_datetime(timestamp), _as_datetime(issued_at)
+                lead = math.ceil((timestamp - issued_at).total_seconds() / 3600)
+                key = (int(site_id), horizon_bucket(lead), timestamp.date())
+                totals = sums.setdefault(key, [0, 0.0, 0, 0.0])
+                error = abs(float(actual) - float(predicted))
+                totals[0] += 1
+                totals[1] += error
+                if actual:
+                    totals[2] += 1
+                    totals[3] += error / abs(float(actual)) * 100.0
+                scored += 1
+                newest = timestamp if newest is None else max(newest, timestamp)
+            cursor.executemany(self._sql(_UPSERT_SQL), [(*key, *totals) for key, totals in sums.items()])
+            if newest is not None:
+                cursor.execute(self._sql(_WATERMARK_SQL), (_WATERMARK_KEY, newest))
+                # superseded predictions are only kept until their hour has been scored
+                cursor.execute(self._sql("DELETE FROM forecast_energy_superseded WHERE timestamp <= %s"), (newest,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        logger.info("Scored %s forecast hours between %s and %s (newest joined: %s)", scored, since, until, newest)
+        return scored
+
+    def rolling(self, days: int = ROLLING_DAYS, site_id: Optional[int] = None, today: Optional[date] = None) -> List[SiteAccuracy]:
+        start = (today or datetime.utcnow().date()) - timedelta(days=days - 1)
+        query = """
+            SELECT site_id, horizon_hours, SUM(samples), SUM(abs_error_sum), SUM(pct_samples), SUM(pct_error_sum)
+            FROM forecast_accuracy_daily WHERE day >= %s{site}
+            GROUP BY site_id, horizon_hours ORDER BY site_id, horizon_hours
+        """.format(site=" AND site_id = %s" if site_id is not None else "")
+        params: tuple = (start,) if site_id is None else (start, site_id)
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(self._sql(query), params)
+            except Exception as exc:
+                if not _is_missing_table(exc):
+                    raise
+                # nothing has been scored before the backend created the table
+                return []
+            rows = cursor.fetchall()
+        finally:
+            conn.close()
+        return [
+            SiteAccuracy(
+                site_id=int(site),
+                horizon_hours=int(horizon),
+                samples=int(samples),
+                mae=float(abs_sum) / samples,
+                mape=float(pct_sum) / pct_samples if pct_samples else None,
+            )
+            for site, horizon, samples, abs_sum, pct_samples, pct_sum in rows
+            if samples
+        ]
+
+
+def is_degraded(
+    accuracy: Iterable[SiteAccuracy],
+    baseline_mae: Optional[float],
+    tolerance: float = 0.25,
+    horizon_hours: int = 24,
+    min_samples: int = 24,
+) -> bool:
+    """
+    Whether a site's rolling MAE over leads up to ``horizon_hours`` exceeds the MAE its production
+    model was validated at by more than ``tolerance``. The buckets up to ``horizon_hours`` are
+    pooled so the comparison covers the same leads as the backtest (1-24h for the default). Sites
+    without a baseline or enough scored hours count as degraded, so they are never left untrained
+    for lack of evidence.
+    """
+    if baseline_mae is None:
+        return True
+    pooled = [item for item in accuracy if item.horizon_hours <= horizon_hours]
+    samples = sum(item.samples for item in pooled)
+    if samples < min_samples:
+        return True
+    mae = sum(item.mae * item.samples for item in pooled) / samples
+    return mae > baseline_mae * (1 + tolerance)
+
+
+class AccuracyCollector:
+    """Prometheus collector exposing the tracker's rolling MAE/MAPE, re-read at most every ``ttl`` seconds."""
+
+    def __init__(self, tracker: ForecastAccuracyTracker, days: int = ROLLING_DAYS, ttl: float = 60.0) -> None:
+        self.tracker = tracker
+        self.days = days
+        self.ttl = ttl
+        self._cached: List[SiteAccuracy] = []
+        self._loaded_at = -math.inf
+        self._lock = threading.Lock()
+
+    def _current(self) -> List[SiteAccuracy]:
+        with self._lock:
+            if time.monotonic() - self._loaded_at >= self.ttl:
+                try:
+                    self._cached = self.tracker.rolling(self.days)
+                except Exception as exc:  # pragma: no cover - database availability
+                    logger.warning("Could not read forecast accuracy: %s", exc)
+                self._loaded_at = time.monotonic()
+            return self._cached
+
+    def collect(self):
+        labels = ["site_id", "horizon_hours"]
+        mae = GaugeMetricFamily("forecast_rolling_mae", f"Forecast MAE (kWh) over the last {self.days} days", labels=labels)
+        mape = GaugeMetricFamily("forecast_rolling_mape", f"Forecast MAPE (%) over the last {self.days} days", labels=labels)
+        samples = GaugeMetricFamily("forecast_accuracy_samples", "Forecast hours scored in the rolling window", labels=labels)
+        for item in self._current():
+            values = [str(item.site_id), str(item.horizon_hours)]
+            mae.add_metric(values, item.mae)
+            samples.add_metric(values, item.samples)
+            if item.mape is not None:
+                mape.add_metric(values, item.mape)
+        yield mae
+        yield mape
+        yield samples
+
+
+def _is_missing_table(exc: Exception) -> bool:
+    # psycopg2 reports SQLSTATE 42P01 (undefined_table); sqlite says "no such table"
+    return getattr(exc, "pgcode", None) == "42P01" or "no such table" in str(exc)
+
+
+def _as_datetime(value: Any) -> datetime:
+    # sqlite hands back ISO strings, Postgres datetimes (tz-aware for timestamptz)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.replace(tzinfo=None)
+
+
+if __name__ == "__main__":
+    import os
+
+    logging.basicConfig(level=logging.INFO)
+    ForecastAccuracyTracker.from_dsn(os.environ["FORECAST_DATABASE_URL"]).update()
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import astuple, dataclass
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence
+
+from models.intelligent_forecaster import IntelligentForecaster
+
+logger = logging.getLogger(__name__)
+
+HORIZON_HOURS = 168
+# the backend serves a stored horizon for this long after it was issued (its FORECAST_MAX_AGE_HOURS),
+# so the nightly run stores that many extra hours to still cover a full horizon from any hour in between
+MAX_AGE_HOURS = 36
+# kg CO2e per kWh, the backend's default grid factor
+DEFAULT_EMISSION_FACTOR = 0.82
+
+# Predictions a new horizon replaces go to the backend's ``forecast_energy_superseded`` (one row per
+# issue) until the accuracy tracker has scored them, so leads past the retrain interval are measured.
+_SNAPSHOT_SQL = """
+    INSERT INTO forecast_energy_superseded (site_id, timestamp, issued_at, predicted_kwh, model_version)
+    SELECT site_id, timestamp, issued_at, predicted_kwh, model_version FROM forecast_energy
+    WHERE site_id = %s AND timestamp >= %s AND issued_at IS NOT NULL
+    ON CONFLICT DO NOTHING
+"""
+_DELETE_SQL = "DELETE FROM forecast_energy WHERE site_id = %s AND timestamp >= %s"
+_INSERT_SQL = (
+    "INSERT INTO forecast_energy "
+    "(site_id, timestamp, predicted_kwh, predicted_co2, lower_kwh, upper_kwh, issued_at, model_version) "
+    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)"
+)
+
+
+def connect_dsn(dsn: str) -> Callable[[], Any]:
+    """psycopg2 connection factory; accepts the backend's SQLAlchemy URL as well as a plain libpq one."""
+    import psycopg2  # type: ignore
+
+    dsn = dsn.replace("+asyncpg", "").replace("+psycopg2", "")
+    return lambda: psycopg2.connect(dsn)
+
+
+def adapt_sql(statement: str, paramstyle: str) -> str:
+    return statement.replace("%s", "?") if paramstyle == "qmark" else statement
+
+
+@dataclass
+class ForecastRow:
+    site_id: int
+    timestamp: datetime
+    predicted_kwh: float
+    predicted_co2: float
+    lower_kwh: float
+    upper_kwh: float
+    issued_at: datetime
+    model_version: Optional[str] = None
+
+
+def forecast_rows(
+    forecaster: IntelligentForecaster,
+    site_id: int,
+    horizon_hours: int = HORIZON_HOURS,
+    emission_factor: float = DEFAULT_EMISSION_FACTOR,
+    model_version: Optional[str] = None,
+) -> List[ForecastRow]:
+    issued_at = datetime.utcnow()
+    return [
+        ForecastRow(
+            site_id=site_id,
+            timestamp=point.timestamp,
+            predicted_kwh=point.prediction,
+            predicted_co2=point.prediction * emission_factor,
+            lower_kwh=point.lower,
+            upper_kwh=point.upper,
+            issued_at=issued_at,
+            model_version=model_version,
+        )
+        for point in forecaster.predict(horizon_hours)
+    ]
+
+
+class ForecastStore:
+    """
+    Writes precomputed forecasts into the backend's ``forecast_energy`` table. A site's rows from
+    the first forecast hour on are replaced in one transaction, so readers see either the old or
+    the new horizon; earlier rows are kept for accuracy tracking, and the replaced predictions are
+    copied to ``forecast_energy_superseded`` first.
+    """
+
+    def __init__(self, connect: Callable[[], Any], paramstyle: str = "format") -> None:
+        self._connect = connect
+        self.paramstyle = paramstyle
+
+    @classmethod
+    def from_dsn(cls, dsn: str) -> "ForecastStore":
+        return cls(connect_dsn(dsn))
+
+    def _sql(self, statement: str) -> str:
+        return adapt_sql(statement, self.paramstyle)
+
+    def replace(self, rows: Sequence[ForecastRow]) -> int:
+        if not rows:
+            return 0
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(self._sql(_SNAPSHOT_SQL), (rows[0].site_id, rows[0].timestamp))
+            cursor.execute(self._sql(_DELETE_SQL), (rows[0].site_id, rows[0].timestamp))
+            cursor.executemany(self._sql(_INSERT_SQL), [astuple(row) for row in rows])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        logger.info("Stored %s forecast hours for site %s from %s", len(rows), rows[0].site_id, rows[0].timestamp)
+        return len(rows)
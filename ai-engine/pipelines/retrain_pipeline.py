@@ -4,18 +4,29 @@ import hashlib
 import json
 import logging
 import os
-import sqlite3
+import tempfile
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Callable, Iterable, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 from minio import Minio
 from minio.sse import SseCustomerKey
 
-from ..models.intelligent_forecaster import IntelligentForecaster
-from ..models.optimizer import EquipmentConfig, OptimizationEngine, sample_evaluator
+from models.intelligent_forecaster import IntelligentForecaster
+from models.optimizer import (
+    EquipmentConfig,
+    OptimizationEngine,
+    default_solver,
+    sample_batch_evaluator,
+    sample_evaluator,
+    study_storage,
+)
+from models.registry import get_registry
+from pipelines.artifact_store import ArtifactCache, ArtifactUploader, is_cached_only
+from utils.resample import resample_hourly
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +42,54 @@ class RetrainContext:
     bucket_name: str = "zerocraftr-models"
     registry_path: Path = Path("models_registry.db")
     encryption_key: Optional[str] = None
+    study_storage: Optional[str] = None
+    optimizer_solver: Optional[str] = None
+    # Standardized shift of the hourly mean/std below which an unchanged-looking window is not refit
+    drift_threshold: float = 0.0
+    force: bool = False
+    artifact_cache_dir: Optional[Path] = None
+    upload_workers: int = 4
+    rf_profile: str = "full"
+    artifact_compression: str = "lz4"
+    lstm_precision: str = "float32"
+    seasonal_model: str = "builtin"
+    # A retrained forecaster replaces production when its MAE is within this fraction of the current one
+    auto_promote: bool = True
+    promotion_tolerance: float = 0.05
+
+
+@dataclass
+class TelemetryFingerprint:
+    digest: str
+    mean: float
+    std: float
+    hours: int
+
+
+def telemetry_fingerprint(telemetry: pd.DataFrame) -> TelemetryFingerprint:
+    """Content hash and summary of the hourly training window, independent of sample cadence and row order."""
+    hourly = resample_hourly(telemetry)
+    timestamps = hourly["timestamp"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    values = np.round(hourly["energy_kwh"].to_numpy(dtype=float), 6)
+    digest = hashlib.sha256(timestamps.tobytes() + values.tobytes()).hexdigest()
+    return TelemetryFingerprint(
+        digest=digest,
+        mean=float(np.nanmean(values)) if len(values) else 0.0,
+        std=float(np.nanstd(values)) if len(values) else 0.0,
+        hours=len(values),
+    )
+
+
+def equipment_fingerprint(equipments: List[EquipmentConfig]) -> str:
+    payload = json.dumps([cfg.__dict__ for cfg in equipments], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def telemetry_drift(current: TelemetryFingerprint, previous: Dict[str, Any]) -> float:
+    if current.digest == previous.get("fingerprint"):
+        return 0.0
+    scale = max(float(previous.get("std", 0.0)), 1e-9)
+    return max(abs(current.mean - float(previous.get("mean", 0.0))), abs(current.std - float(previous.get("std", 0.0)))) / scale
 
 
 class RetrainPipeline:
@@ -41,8 +100,19 @@ class RetrainPipeline:
 
     def __init__(self, context: RetrainContext) -> None:
         self.context = context
-        self.forecaster = IntelligentForecaster()
-        self.optimizer = OptimizationEngine(sample_evaluator)
+        self.forecaster = IntelligentForecaster(
+            rf_profile=context.rf_profile,
+            artifact_compression=context.artifact_compression,
+            lstm_precision=context.lstm_precision,
+            seasonal_model=context.seasonal_model,
+        )
+        self.optimizer = OptimizationEngine(
+            sample_evaluator,
+            batch_evaluator=sample_batch_evaluator,
+            storage=study_storage(context.study_storage) if context.study_storage else None,
+            study_name=f"site-{context.site_id}",
+            solver=default_solver(context.optimizer_solver, context.study_storage),
+        )
         key_material = context.encryption_key or os.getenv("AI_MINIO_SSE_KEY", "zerocraftr-default-model-key")
         self._sse_key = SseCustomerKey(hashlib.sha256(key_material.encode("utf-8")).digest())
         self.client = Minio(
@@ -51,6 +121,15 @@ class RetrainPipeline:
             secret_key=context.minio_secret_key,
             secure=context.minio_endpoint.startswith("https"),
         )
+        self.registry = get_registry(context.registry_path)
+        self.uploader = ArtifactUploader(self.client, context.bucket_name, sse=self._sse_key, max_workers=context.upload_workers)
+        self.cache = ArtifactCache(
+            context.artifact_cache_dir or Path(context.registry_path).parent / "artifact_cache",
+            self.client,
+            context.bucket_name,
+            self._sse_key,
+        )
+        self._forecast_entry_id: Optional[int] = None
 
     def ensure_bucket(self) -> None:
         try:
@@ -59,55 +138,82 @@ class RetrainPipeline:
         except Exception as exc:  # pragma: no cover - network dependent
             logger.warning("Unable to verify MinIO bucket (%s). Continuing in offline mode.", exc)
 
-    def _upload_artifacts(self, artifacts: dict[str, str]) -> dict[str, str]:
-        uploaded_paths: dict[str, str] = {}
+    def _upload_artifacts(self, artifacts: dict[str, str]) -> dict[str, Dict[str, Any]]:
+        """
+        Upload concurrently and return ``{name: {object_name, sha256, size}}``. When object storage
+        is unreachable the files are kept in the checksum-keyed local cache instead and the entries
+        point at those cached copies.
+        """
         try:
-            self.ensure_bucket()
-            for name, path in artifacts.items():
-                object_name = f"site-{self.context.site_id}/{Path(path).name}"
-                self.client.fput_object(self.context.bucket_name, object_name, path, sse=self._sse_key)
-                uploaded_paths[name] = object_name
-        except Exception as exc:  # pragma: no cover - network dependent
-            logger.warning("Failed to upload to MinIO (%s). Retaining local artifacts.", exc)
-            for name, path in artifacts.items():
-                uploaded_paths[name] = Path(path).resolve().as_posix()
-        return uploaded_paths
-
-    def _record_registry(self, model_name: str, accuracy: float, artifact_path: str) -> None:
-        conn = sqlite3.connect(self.context.registry_path)
-        with conn:
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS models_registry (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    model_name TEXT NOT NULL,
-                    version TEXT NOT NULL,
-                    accuracy REAL,
-                    path TEXT NOT NULL,
-                    created_at TEXT NOT NULL
-                )
-            """
-            )
-            conn.execute(
-                """
-                INSERT INTO models_registry (model_name, version, accuracy, path, created_at)
-                VALUES (?, ?, ?, ?, ?)
-            """,
-                (
+            return self.uploader.upload_all(artifacts, prefix=f"site-{self.context.site_id}")
+        except Exception as exc:
+            logger.warning("Failed to upload to MinIO (%s). Keeping artifacts in %s.", exc, self.cache.root)
+            return self.cache.keep(artifacts)
+
+    def _record_registry(
+        self,
+        model_name: str,
+        accuracy: float,
+        artifact_path: str,
+        fingerprint: Optional[str] = None,
+        summary: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        return self.registry.record(model_name, self.context.site_id, accuracy, artifact_path, fingerprint, summary)
+
+    def _maybe_promote(self, model_name: str, entry_id: int, mae: float, validation: Optional[str] = None) -> bool:
+        """
+        Promote ``entry_id`` unless the production version's MAE beats it by more than the tolerance.
+        MAEs are only compared when both were measured the same way (the summary's ``validation``);
+        otherwise a backtested candidate replaces an unvalidated production version and an
+        unvalidated candidate never replaces a backtested one.
+        """
+        if not self.context.auto_promote:
+            return False
+        current = self.registry.production(model_name, self.context.site_id)
+        if current is not None and current.accuracy is not None:
+            current_validation = current.summary.get("validation")
+            if current_validation != validation:
+                if validation != "backtest":
+                    logger.info(
+                        "Keeping backtested production %s v%s for site %s over an unvalidated candidate",
+                        model_name,
+                        current.version,
+                        self.context.site_id,
+                    )
+                    return False
+            elif mae > current.accuracy * (1 + self.context.promotion_tolerance):
+                logger.info(
+                    "Keeping production %s v%s for site %s (candidate MAE=%.4f, production MAE=%.4f)",
                     model_name,
-                    datetime.utcnow().strftime("%Y%m%d%H%M%S"),
-                    accuracy,
-                    artifact_path,
-                    datetime.utcnow().isoformat(),
-                ),
-            )
-        conn.close()
+                    current.version,
+                    self.context.site_id,
+                    mae,
+                    current.accuracy,
+                )
+                return False
+        promoted = self.registry.promote(entry_id)
+        logger.info("Promoted %s v%s to production for site %s", model_name, promoted.version, self.context.site_id)
+        return True
+
+    def _latest_entry(self, model_name: str) -> Optional[Dict[str, Any]]:
+        entry = self.registry.latest(model_name, self.context.site_id, with_fingerprint=True)
+        if entry is None:
+            return None
+        return {"fingerprint": entry.fingerprint, **entry.summary}
+
+    def _retrain_forecaster(self, telemetry: pd.DataFrame) -> Dict[str, float]:
+        fingerprint = telemetry_fingerprint(telemetry)
+        previous = self._latest_entry("intelligent_forecaster")
+        if not self.context.force and previous is not None:
+            drift = telemetry_drift(fingerprint, previous)
+            if drift <= self.context.drift_threshold:
+                logger.info(
+                    "Telemetry for site %s unchanged (drift=%.4f), keeping the current forecaster",
+                    self.context.site_id,
+                    drift,
+                )
+                return {"mae": previous["mae"], "mape": previous.get("mape", 0.0), "retrained": 0.0, "promoted": 0.0}
 
-    def run(self) -> dict[str, float]:
-        logger.info("Starting retrain pipeline for site %s", self.context.site_id)
-        telemetry = self.context.telemetry_loader(self.context.site_id)
-        if telemetry.empty:
-            raise ValueError("No telemetry available for retraining.")
         metrics = self.forecaster.fit(telemetry)
         logger.info(
             "Forecaster retrained for site %s at %s (MAE=%.4f, MAPE=%.2f%%)",
@@ -116,11 +222,43 @@ class RetrainPipeline:
             metrics["mae"],
             metrics.get("mape", 0.0),
         )
-        artifacts = self.forecaster.export_artifacts()
-        uploaded = self._upload_artifacts(artifacts)
-        self._record_registry("intelligent_forecaster", metrics["mae"], json.dumps(uploaded))
+        # exports land in a private temp dir that is removed once uploaded (or cached)
+        with tempfile.TemporaryDirectory(prefix=f"retrain-site-{self.context.site_id}-") as work_dir:
+            self.forecaster.artifact_dir = Path(work_dir)
+            artifacts = self.forecaster.export_artifacts()
+            uploaded = self._upload_artifacts(artifacts)
+        self.forecaster.artifact_dir = None
+        validation = "backtest" if metrics.get("validated") else "in_sample"
+        summary = {
+            "mean": fingerprint.mean,
+            "std": fingerprint.std,
+            "hours": fingerprint.hours,
+            "mae": metrics["mae"],
+            "mape": metrics.get("mape", 0.0),
+            "train_mae": metrics.get("train_mae"),
+            # how mae was measured; registry accuracy is only compared between equal bases
+            "validation": validation,
+            "weights": self.forecaster.ensemble_weights,
+        }
+        entry_id = self._record_registry(
+            "intelligent_forecaster", metrics["mae"], json.dumps(uploaded), fingerprint.digest, summary
+        )
+        self._forecast_entry_id = entry_id
+        if is_cached_only(uploaded):
+            # other pods cannot fetch artifacts that never reached object storage
+            logger.warning("Not promoting forecaster for site %s: artifacts are only cached locally", self.context.site_id)
+            promoted = False
+        else:
+            promoted = self._maybe_promote("intelligent_forecaster", entry_id, metrics["mae"], validation)
+        return {**metrics, "retrained": 1.0, "promoted": float(promoted)}
+
+    def _rerun_optimizer(self, equipments: List[EquipmentConfig]) -> Dict[str, float]:
+        fingerprint = equipment_fingerprint(equipments)
+        previous = self._latest_entry("optimization_engine")
+        if not self.context.force and previous is not None and previous["fingerprint"] == fingerprint:
+            logger.info("Equipment baseline for site %s unchanged, keeping the current plan", self.context.site_id)
+            return {"objective": previous["objective"], "retrained": 0.0}
 
-        equipments = list(self.context.equipment_loader(self.context.site_id))
         opt_result = self.optimizer.optimize(equipments)
         logger.info(
             "Optimization retrained for site %s at %s (objective=%.4f, savings=%.2f%%)",
@@ -129,12 +267,46 @@ class RetrainPipeline:
             opt_result.objective,
             opt_result.savings_pct,
         )
-        self._record_registry("optimization_engine", opt_result.objective, json.dumps([cfg.__dict__ for cfg in opt_result.recommended]))
+        self._record_registry(
+            "optimization_engine",
+            opt_result.objective,
+            json.dumps([cfg.__dict__ for cfg in opt_result.recommended]),
+            fingerprint,
+            {"objective": opt_result.objective},
+        )
+        return {"objective": opt_result.objective, "retrained": 1.0}
+
+    def serving_forecaster(self, telemetry: pd.DataFrame) -> Tuple[Optional[IntelligentForecaster], Optional[str]]:
+        """
+        The forecaster serving would use for this site, with its version: the production entry
+        (this run's fit when it was just promoted), else this run's candidate if one was fitted.
+        """
+        entry = self.registry.production("intelligent_forecaster", self.context.site_id)
+        if entry is not None:
+            if entry.id == self._forecast_entry_id:
+                return self.forecaster, entry.version
+            paths = self.cache.resolve(IntelligentForecaster.serving_artifacts(json.loads(entry.path)))
+            loaded = IntelligentForecaster.from_artifacts(paths, seasonal_model=self.context.seasonal_model)
+            return loaded.with_history(telemetry), entry.version
+        if self.forecaster.history is not None:
+            return self.forecaster, None
+        return None, None
+
+    def run(self) -> dict[str, float]:
+        logger.info("Starting retrain pipeline for site %s", self.context.site_id)
+        telemetry = self.context.telemetry_loader(self.context.site_id)
+        if telemetry.empty:
+            raise ValueError("No telemetry available for retraining.")
+        forecast = self._retrain_forecaster(telemetry)
+        optimization = self._rerun_optimizer(list(self.context.equipment_loader(self.context.site_id)))
 
         return {
-            "forecast_mae": metrics["mae"],
-            "forecast_mape": metrics.get("mape", 0.0),
-            "optimization_objective": opt_result.objective,
+            "forecast_mae": forecast["mae"],
+            "forecast_mape": forecast.get("mape", 0.0),
+            "optimization_objective": optimization["objective"],
+            "forecast_retrained": forecast["retrained"],
+            "optimization_retrained": optimization["retrained"],
+            "forecast_promoted": forecast["promoted"],
         }
 
 
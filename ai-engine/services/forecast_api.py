@@ -1,23 +1,79 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import os
+from functools import lru_cache
 from datetime import datetime
-from typing import Dict, List
+from pathlib import Path
+from typing import Dict, List, Optional
 
 import pandas as pd
 from fastapi import Depends, FastAPI, HTTPException, status
 from pydantic import BaseModel, Field
 
 from models.intelligent_forecaster import ForecastResult, IntelligentForecaster
+from models.model_holder import ProductionModel
+from models.registry import RegistryEntry, get_registry
+from pipelines.artifact_store import ArtifactCache
+from utils.resample import resample_hourly
 from .common import register_metrics_endpoint, require_jwt
 
 app = FastAPI(title="ZeroCraftr Forecast Service", version="0.3.0")
 register_metrics_endpoint(app)
 _MIN_TELEMETRY_POINTS = 24 * 7
+_LSTM_BACKEND = os.getenv("FORECAST_LSTM_BACKEND", "torch")
+_SEASONAL_MODEL = os.getenv("FORECAST_SEASONAL_MODEL", "builtin")
+_REGISTRY_PATH = os.getenv("MODEL_REGISTRY_PATH")
+
+
+@lru_cache(maxsize=1)
+def _artifact_cache() -> ArtifactCache:
+    from minio import Minio
+    from minio.sse import SseCustomerKey
+
+    endpoint = os.getenv("MINIO_ENDPOINT", "http://minio:9000")
+    key_material = os.getenv("AI_MINIO_SSE_KEY", "zerocraftr-default-model-key")
+    client = Minio(
+        endpoint.replace("http://", "").replace("https://", ""),
+        access_key=os.getenv("MINIO_ACCESS_KEY", "minio"),
+        secret_key=os.getenv("MINIO_SECRET_KEY", "minio123"),
+        secure=endpoint.startswith("https"),
+    )
+    root = os.getenv("ARTIFACT_CACHE_DIR") or str(Path(_REGISTRY_PATH or ".").parent / "artifact_cache")
+    return ArtifactCache(
+        root,
+        client,
+        os.getenv("MINIO_MODELS_BUCKET", "zerocraftr-models"),
+        SseCustomerKey(hashlib.sha256(key_material.encode("utf-8")).digest()),
+    )
+
+
+def _load_forecaster(entry: RegistryEntry) -> IntelligentForecaster:
+    # only the LSTM graph this backend serves is fetched
+    artifacts = IntelligentForecaster.serving_artifacts(json.loads(entry.path), _LSTM_BACKEND)
+    paths = _artifact_cache().resolve(artifacts)
+    return IntelligentForecaster.from_artifacts(paths, lstm_backend=_LSTM_BACKEND, seasonal_model=_SEASONAL_MODEL)
+
+
+# With a registry configured, each site is served by its promoted forecaster; sites without one
+# (or deployments without a registry) fall back to fitting on the request's telemetry.
+production_forecasters: Optional[ProductionModel[IntelligentForecaster]] = (
+    ProductionModel(
+        "intelligent_forecaster",
+        get_registry(_REGISTRY_PATH),
+        _load_forecaster,
+        check_interval=float(os.getenv("MODEL_CHECK_INTERVAL", "5")),
+        max_sites=int(os.getenv("FORECAST_MODEL_CACHE_SIZE", "64")),
+    )
+    if _REGISTRY_PATH
+    else None
+)
 
 
 class TelemetryPoint(BaseModel):
     timestamp: datetime
-    energy_kwh: float = Field(..., gt=0)
+    energy_kwh: float = Field(..., ge=0)
 
 
 class ForecastRequest(BaseModel):
@@ -39,15 +95,16 @@ class ForecastResponse(BaseModel):
     metrics: Dict[str, float]
     points: List[ForecastComponent]
     recent_actuals: List[TelemetryPoint]
+    model_version: Optional[str] = None
 
 
 def _build_dataframe(points: List[TelemetryPoint]) -> pd.DataFrame:
-    df = pd.DataFrame([{"timestamp": item.timestamp, "energy_kwh": item.energy_kwh} for item in points])
-    df = df.sort_values("timestamp")
+    raw = pd.DataFrame([{"timestamp": item.timestamp, "energy_kwh": item.energy_kwh} for item in points])
+    df = resample_hourly(raw)
     if len(df) < _MIN_TELEMETRY_POINTS:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail=f"At least {_MIN_TELEMETRY_POINTS} telemetry samples are required for training.",
+            detail=f"At least {_MIN_TELEMETRY_POINTS} hours of telemetry are required for training.",
         )
     return df.tail(_MIN_TELEMETRY_POINTS).reset_index(drop=True)
 
@@ -68,8 +125,17 @@ def _serialize_results(results: List[ForecastResult]) -> List[ForecastComponent]
 @app.post("/api/v2/forecast/combined", response_model=ForecastResponse)
 def combined_forecast(payload: ForecastRequest, _: dict = Depends(require_jwt)) -> ForecastResponse:
     telemetry_df = _build_dataframe(payload.telemetry)
-    forecaster = IntelligentForecaster()
-    metrics = forecaster.fit(telemetry_df)
+    production = production_forecasters.get(payload.site_id) if production_forecasters else None
+    if production is not None:
+        entry, model = production
+        forecaster = model.with_history(telemetry_df)
+        metrics = entry.summary
+        model_version: Optional[str] = entry.version
+    else:
+        forecaster = IntelligentForecaster(lstm_backend=_LSTM_BACKEND, seasonal_model=_SEASONAL_MODEL)
+        # the backtest only informs model selection, which a throwaway per-request fit never feeds
+        metrics = forecaster.fit(telemetry_df, backtest=False)
+        model_version = None
     forecast_points = forecaster.predict(payload.horizon_hours)
     serialized = _serialize_results(forecast_points)
     recent_actuals = telemetry_df.tail(24)
@@ -77,7 +143,7 @@ def combined_forecast(payload: ForecastRequest, _: dict = Depends(require_jwt))
     return ForecastResponse(
         site_id=payload.site_id,
         metrics={
-            "mae": metrics["mae"],
+            "mae": metrics.get("mae", 0.0),
             "mape": metrics.get("mape", 0.0),
         },
         points=serialized,
@@ -85,9 +151,17 @@ def combined_forecast(payload: ForecastRequest, _: dict = Depends(require_jwt))
             TelemetryPoint(timestamp=row.timestamp.to_pydatetime(), energy_kwh=float(row.energy_kwh))
             for row in recent_actuals.itertuples()
         ],
+        model_version=model_version,
     )
 
 
+@app.get("/models/status")
+def models_status(_: dict = Depends(require_jwt)) -> Dict[str, object]:
+    if production_forecasters is None:
+        return {"registry": None}
+    return {"registry": _REGISTRY_PATH, **production_forecasters.status()}
+
+
 @app.get("/healthz")
 def healthcheck() -> Dict[str, str]:
     return {"status": "ok"}
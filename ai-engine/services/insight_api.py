@@ -1,11 +1,18 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
 import os
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Dict
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
 
-from fastapi import Depends, FastAPI
+from fastapi import Depends, FastAPI, Response, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from llm.insight_generator import InsightGenerator
@@ -13,10 +20,145 @@ from .common import register_metrics_endpoint, require_jwt
 
 logger = logging.getLogger(__name__)
 MODEL_NAME = os.getenv("INSIGHT_MODEL_NAME", "distilgpt2")
-generator = InsightGenerator(model_name=MODEL_NAME)
-app = FastAPI(title="ZeroCraftr Insight Service", version="0.3.0")
+MODEL_DIR = os.getenv("INSIGHT_MODEL_DIR")
+generator = InsightGenerator(
+    model_name=MODEL_NAME,
+    model_dir=Path(MODEL_DIR) if MODEL_DIR else None,
+    local_files_only=os.getenv("INSIGHT_ALLOW_DOWNLOAD", "false").lower() != "true",
+    quantize=os.getenv("INSIGHT_QUANTIZE", "false").lower() == "true",
+    lazy=True,
+    stream_timeout=float(os.getenv("INSIGHT_STREAM_TIMEOUT", "30")),
+)
+# serve template insights as ready when the model cannot be loaded, instead of failing readiness
+ALLOW_TEMPLATE = os.getenv("INSIGHT_ALLOW_TEMPLATE", "false").lower() == "true"
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # load off the event loop so /healthz answers meanwhile; /readyz reports 503 until it is done
+    app.state.generator_load = asyncio.get_running_loop().run_in_executor(None, generator.load)
+    yield
+
+
+app = FastAPI(title="ZeroCraftr Insight Service", version="0.3.0", lifespan=_lifespan)
 register_metrics_endpoint(app)
 
+_CacheKey = Tuple[str, Optional[int]]
+
+
+class InsightBatcher:
+    """
+    Collects concurrent insight requests into micro-batches served by one ``generate_batch`` call.
+    Results are kept in an LRU cache keyed by the formatted prompt (and the seed, in template mode
+    where it determines the output), and identical prompts waiting in the same batch are generated once.
+    """
+
+    def __init__(
+        self,
+        generator: InsightGenerator,
+        max_batch_size: int = 8,
+        max_wait_ms: float = 20.0,
+        cache_size: int = 256,
+    ) -> None:
+        self.generator = generator
+        self.max_batch_size = max(max_batch_size, 1)
+        self.max_wait = max_wait_ms / 1000.0
+        self.cache_size = cache_size
+        self._cache: OrderedDict[_CacheKey, Dict[str, float | str]] = OrderedDict()
+        # streaming responses touch the cache from Starlette's threadpool
+        self._cache_lock = threading.Lock()
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+
+    def cache_key(self, context: Dict[str, str], seed: Optional[int] = 42) -> _CacheKey:
+        return (self.generator.format_prompt(context), seed if self.generator.seeded else None)
+
+    def cache_get(self, key: _CacheKey) -> Optional[Dict[str, float | str]]:
+        with self._cache_lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+            return result
+
+    def cache_put(self, key: _CacheKey, result: Dict[str, float | str]) -> None:
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    async def submit(self, context: Dict[str, str], seed: Optional[int] = 42) -> Dict[str, float | str]:
+        key = self.cache_key(context, seed)
+        cached = self.cache_get(key)
+        if cached is not None:
+            return dict(cached)
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        await self._queue.put((key, context, future))
+        return dict(await future)
+
+    async def _collect(self) -> List[tuple]:
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            pending: Dict[_CacheKey, List[asyncio.Future]] = {}
+            contexts: Dict[_CacheKey, Dict[str, str]] = {}
+            for key, context, future in batch:
+                cached = self.cache_get(key)
+                if cached is not None:
+                    if not future.done():
+                        future.set_result(cached)
+                    continue
+                pending.setdefault(key, []).append(future)
+                contexts.setdefault(key, context)
+            if not pending:
+                continue
+            keys = list(pending)
+            try:
+                results = await loop.run_in_executor(
+                    None,
+                    self.generator.generate_batch,
+                    [contexts[key] for key in keys],
+                    [key[1] for key in keys],
+                )
+            except Exception as exc:  # pragma: no cover - model runtime failure
+                logger.exception("Batched insight generation failed")
+                for futures in pending.values():
+                    for future in futures:
+                        if not future.done():
+                            future.set_exception(exc)
+                continue
+            for key, result in zip(keys, results):
+                self.cache_put(key, result)
+                for future in pending[key]:
+                    if not future.done():
+                        future.set_result(result)
+
+
+batcher = InsightBatcher(
+    generator,
+    max_batch_size=int(os.getenv("INSIGHT_BATCH_SIZE", "8")),
+    max_wait_ms=float(os.getenv("INSIGHT_BATCH_WAIT_MS", "20")),
+    cache_size=int(os.getenv("INSIGHT_CACHE_SIZE", "256")),
+)
+
 
 class InsightRequest(BaseModel):
     site_id: int
@@ -32,9 +174,17 @@ class InsightResponse(BaseModel):
     generated_at: datetime
 
 
+class ReadinessResponse(BaseModel):
+    status: str
+    mode: str
+    load_seconds: Optional[float] = None
+    error: Optional[str] = None
+
+
+
 @app.post("/api/v2/insights", response_model=InsightResponse)
-def generate_insight(payload: InsightRequest, _: dict = Depends(require_jwt)) -> InsightResponse:
-    result = generator.generate(payload.dict())
+async def generate_insight(payload: InsightRequest, _: dict = Depends(require_jwt)) -> InsightResponse:
+    result = await batcher.submit(payload.dict())
     logger.info("Insight generated for site %s at %s", payload.site_id, datetime.utcnow().isoformat())
     return InsightResponse(
         site_id=payload.site_id,
@@ -44,11 +194,59 @@ def generate_insight(payload: InsightRequest, _: dict = Depends(require_jwt)) ->
     )
 
 
+def _sse(payload: Dict[str, float | str], event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(payload)}\n\n"
+
+
+def _stream_events(context: Dict[str, str], seed: Optional[int]) -> Iterator[str]:
+    key = batcher.cache_key(context, seed)
+    cached = batcher.cache_get(key)
+    if cached is not None:
+        yield _sse({"delta": cached["insight"]})
+        yield _sse(cached, event="done")
+        return
+    for chunk in generator.stream(context, seed):
+        if "delta" in chunk:
+            yield _sse(chunk)
+        elif "error" in chunk:
+            yield _sse(chunk, event="error")
+        else:
+            batcher.cache_put(key, chunk)
+            yield _sse(chunk, event="done")
+
+
+@app.post("/api/v2/insights/stream")
+def stream_insight(payload: InsightRequest, _: dict = Depends(require_jwt)) -> StreamingResponse:
+    """Server-sent events: ``data`` frames carry token deltas, the final ``done`` frame the full insight."""
+    logger.info("Streaming insight for site %s", payload.site_id)
+    return StreamingResponse(
+        _stream_events(payload.dict(), 42),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.get("/healthz")
 def healthcheck() -> Dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/readyz", response_model=ReadinessResponse)
+def readiness(response: Response) -> ReadinessResponse:
+    if not generator.loaded:
+        state = "loading"
+    elif generator.load_error is not None and not ALLOW_TEMPLATE:
+        state = "failed"
+    else:
+        state = "ready"
+    if state != "ready":
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return ReadinessResponse(
+        status=state, mode=generator.mode, load_seconds=generator.load_seconds, error=generator.load_error
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -1,18 +1,29 @@
 from __future__ import annotations
 
 import logging
+import os
 from datetime import datetime
 from typing import Dict, List
 
 from fastapi import Depends, FastAPI
 from pydantic import BaseModel, Field
 
-from models.optimizer import EquipmentConfig, OptimizationEngine, sample_evaluator
+from models.optimizer import (
+    EquipmentConfig,
+    OptimizationEngine,
+    default_solver,
+    sample_batch_evaluator,
+    sample_evaluator,
+    study_storage,
+)
 from .common import register_metrics_endpoint, require_jwt
 
 logger = logging.getLogger(__name__)
 app = FastAPI(title="ZeroCraftr Optimization Service", version="0.3.0")
 register_metrics_endpoint(app)
+_STUDY_STORAGE_URL = os.getenv("OPTIMIZER_STUDY_STORAGE")
+# resolved at import so a bad OPTIMIZER_SOLVER stops the service from starting
+_SOLVER = default_solver(os.getenv("OPTIMIZER_SOLVER"), _STUDY_STORAGE_URL)
 
 
 class EquipmentPayload(BaseModel):
@@ -42,7 +53,14 @@ class OptimizationResponse(BaseModel):
 @app.post("/api/v2/optimize", response_model=OptimizationResponse)
 def optimize(payload: OptimizationRequest, _: dict = Depends(require_jwt)) -> OptimizationResponse:
     configs = [EquipmentConfig(**cfg.dict()) for cfg in payload.equipment]
-    engine = OptimizationEngine(sample_evaluator, lambda_weight=payload.lambda_weight)
+    engine = OptimizationEngine(
+        sample_evaluator,
+        lambda_weight=payload.lambda_weight,
+        batch_evaluator=sample_batch_evaluator,
+        storage=study_storage(_STUDY_STORAGE_URL) if _STUDY_STORAGE_URL else None,
+        study_name=f"site-{payload.site_id}",
+        solver=_SOLVER,
+    )
     result = engine.optimize(configs)
     logger.info(
         "Optimization completed for site %s at %s (objective %.2f, savings %.2f%%)",
@@ -2,27 +2,37 @@ from __future__ import annotations
 
 import logging
 import os
-import sqlite3
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable, List
+from typing import Iterable, List, Optional
 
 import pandas as pd
-from fastapi import Depends, FastAPI, HTTPException, status
+from fastapi import Depends, FastAPI, HTTPException, Query, status
+from prometheus_client import REGISTRY
 from pydantic import BaseModel, Field
 
-from models.optimizer import EquipmentConfig
+from models.optimizer import EquipmentConfig, default_solver
+from models.registry import RegistryEntry, get_registry
+from pipelines.forecast_accuracy import AccuracyCollector, ForecastAccuracyTracker
 from pipelines.retrain_pipeline import RetrainContext, RetrainPipeline
 from .common import register_metrics_endpoint, require_jwt
 
 logger = logging.getLogger(__name__)
 app = FastAPI(title="ZeroCraftr Retraining Service", version="0.3.0")
 register_metrics_endpoint(app)
+_OPTIMIZER_SOLVER = default_solver(os.getenv("OPTIMIZER_SOLVER"), os.getenv("OPTIMIZER_STUDY_STORAGE"))
+if os.getenv("FORECAST_DATABASE_URL"):
+    REGISTRY.register(
+        AccuracyCollector(
+            ForecastAccuracyTracker.from_dsn(os.environ["FORECAST_DATABASE_URL"]),
+            ttl=float(os.getenv("FORECAST_ACCURACY_METRICS_TTL", "60")),
+        )
+    )
 
 
 class TelemetryPoint(BaseModel):
     timestamp: datetime
-    energy_kwh: float = Field(..., gt=0)
+    energy_kwh: float = Field(..., ge=0)
 
 
 class EquipmentPayload(BaseModel):
@@ -36,6 +46,7 @@ class RetrainRequest(BaseModel):
     site_id: int
     telemetry: List[TelemetryPoint]
     equipment: List[EquipmentPayload] = Field(default_factory=list)
+    force: bool = False
 
 
 class RetrainResponse(BaseModel):
@@ -43,18 +54,26 @@ class RetrainResponse(BaseModel):
     forecast_mae: float
     forecast_mape: float
     optimization_objective: float
+    forecast_retrained: bool = True
+    optimization_retrained: bool = True
+    forecast_promoted: bool = False
 
 
 class ModelRegistryEntry(BaseModel):
+    id: Optional[int] = None
     model_name: str
     version: str
     accuracy: float | None
     path: str
     created_at: datetime
+    site_id: Optional[int] = None
+    stage: str = "candidate"
+    promoted_at: Optional[datetime] = None
 
 
 class ModelRegistryResponse(BaseModel):
     models: List[ModelRegistryEntry]
+    total: int = 0
 
 
 def _registry_path() -> Path:
@@ -91,6 +110,26 @@ def _context(payload: RetrainRequest, df: pd.DataFrame, equipment: List[Equipmen
         bucket_name=os.getenv("MINIO_MODELS_BUCKET", "zerocraftr-models"),
         registry_path=_registry_path(),
         encryption_key=os.getenv("AI_MINIO_SSE_KEY"),
+        study_storage=os.getenv("OPTIMIZER_STUDY_STORAGE"),
+        optimizer_solver=_OPTIMIZER_SOLVER,
+        drift_threshold=float(os.getenv("RETRAIN_DRIFT_THRESHOLD", "0")),
+        force=payload.force,
+        auto_promote=os.getenv("RETRAIN_AUTO_PROMOTE", "true").lower() == "true",
+        promotion_tolerance=float(os.getenv("RETRAIN_PROMOTION_TOLERANCE", "0.05")),
+    )
+
+
+def _serialize_entry(entry: RegistryEntry) -> ModelRegistryEntry:
+    return ModelRegistryEntry(
+        id=entry.id,
+        model_name=entry.model_name,
+        version=entry.version,
+        accuracy=entry.accuracy,
+        path=entry.path,
+        created_at=entry.created_at,
+        site_id=entry.site_id,
+        stage=entry.stage,
+        promoted_at=entry.promoted_at,
     )
 
 
@@ -106,47 +145,51 @@ def retrain_models(payload: RetrainRequest, _: dict = Depends(require_jwt)) -> R
         forecast_mae=metrics["forecast_mae"],
         forecast_mape=metrics["forecast_mape"],
         optimization_objective=metrics["optimization_objective"],
+        forecast_retrained=bool(metrics["forecast_retrained"]),
+        optimization_retrained=bool(metrics["optimization_retrained"]),
+        forecast_promoted=bool(metrics["forecast_promoted"]),
     )
 
 
 @app.get("/api/v2/models/list", response_model=ModelRegistryResponse)
-def list_models(_: dict = Depends(require_jwt)) -> ModelRegistryResponse:
+def list_models(
+    model_name: Optional[str] = None,
+    site_id: Optional[int] = None,
+    latest_per_site: bool = False,
+    limit: int = Query(100, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    _: dict = Depends(require_jwt),
+) -> ModelRegistryResponse:
     path = _registry_path()
     if not path.exists():
-        return ModelRegistryResponse(models=[])
-    conn = sqlite3.connect(path)
-    with conn:
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS models_registry (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                model_name TEXT NOT NULL,
-                version TEXT NOT NULL,
-                accuracy REAL,
-                path TEXT NOT NULL,
-                created_at TEXT NOT NULL
-            )
-            """
-        )
-        rows = conn.execute(
-            """
-            SELECT model_name, version, accuracy, path, created_at
-            FROM models_registry
-            ORDER BY created_at DESC
-            LIMIT 100
-        """
-        ).fetchall()
-    models = [
-        ModelRegistryEntry(
-            model_name=row[0],
-            version=row[1],
-            accuracy=row[2],
-            path=row[3],
-            created_at=datetime.fromisoformat(row[4]),
-        )
-        for row in rows
-    ]
-    return ModelRegistryResponse(models=models)
+        return ModelRegistryResponse(models=[], total=0)
+    registry = get_registry(path)
+    if latest_per_site:
+        # one row per site, so pagination applies to sites rather than versions
+        entries = [
+            entry
+            for entry in registry.latest_per_site(model_name or "intelligent_forecaster")
+            if site_id is None or entry.site_id == site_id
+        ]
+        total = len(entries)
+        entries = entries[offset : offset + limit]
+    else:
+        entries = registry.query(model_name=model_name, site_id=site_id, limit=limit, offset=offset)
+        total = registry.count(model_name=model_name, site_id=site_id)
+    return ModelRegistryResponse(models=[_serialize_entry(entry) for entry in entries], total=total)
+
+
+@app.post("/api/v2/models/{entry_id}/promote", response_model=ModelRegistryEntry)
+def promote_model(entry_id: int, _: dict = Depends(require_jwt)) -> ModelRegistryEntry:
+    path = _registry_path()
+    if not path.exists():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Model registry is empty")
+    try:
+        entry = get_registry(path).promote(entry_id)
+    except KeyError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+    logger.info("Promoted %s v%s to production for site %s", entry.model_name, entry.version, entry.site_id)
+    return _serialize_entry(entry)
 
 
 @app.get("/healthz")
@@ -2,28 +2,37 @@ from __future__ import annotations
 
 import json
 import logging
+import math
 import os
+import re
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable, List
+from typing import Iterable, List, Tuple
 
 import pandas as pd
 import requests
 
+from models.device_anomaly import FEATURE_COLUMNS, MODEL_DIR as DEVICE_MODEL_DIR, readings_by_device, train_device_models
 from models.intelligent_forecaster import generate_synthetic_telemetry
-from models.optimizer import EquipmentConfig
+from models.optimizer import EquipmentConfig, default_solver
+from models.registry import get_registry
+from pipelines.fleet_scheduler import FleetRetrainScheduler, SiteInfo
+from pipelines.forecast_accuracy import ForecastAccuracyTracker, is_degraded
+from pipelines.forecast_precompute import DEFAULT_EMISSION_FACTOR, HORIZON_HOURS, MAX_AGE_HOURS, ForecastStore, connect_dsn, forecast_rows
 from pipelines.retrain_pipeline import RetrainContext, RetrainPipeline
+from utils.feature_store import CALENDAR_COLUMNS, FeatureStore
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("retrain_worker")
+_HISTORY_HOURS = int(os.getenv("TRAINING_HISTORY_HOURS", "168"))
 
 
-def _telemetry_from_backend(site_id: int) -> pd.DataFrame | None:
+def _telemetry_from_backend(site_id: int, hours: int = _HISTORY_HOURS) -> pd.DataFrame | None:
     source = os.getenv("TELEMETRY_SOURCE_URL")
     if not source:
         return None
     try:
-        response = requests.get(f"{source.rstrip('/')}/sites/{site_id}/telemetry?hours=168", timeout=15)
+        response = requests.get(f"{source.rstrip('/')}/sites/{site_id}/telemetry?hours={hours}", timeout=15)
         response.raise_for_status()
         payload = response.json()
         if isinstance(payload, list) and payload:
@@ -33,13 +42,36 @@ def _telemetry_from_backend(site_id: int) -> pd.DataFrame | None:
     return None
 
 
-def _load_telemetry(site_id: int) -> pd.DataFrame:
+def _load_from_feature_store(store: FeatureStore, site_id: int) -> pd.DataFrame | None:
+    """Fetch only the hours after the store's watermark, then train from the stored history."""
+    now = pd.Timestamp(datetime.utcnow()).floor("h")
+    watermark = store.latest_timestamp("site", site_id)
+    hours = _HISTORY_HOURS
+    if watermark is not None:
+        hours = max(1, min(_HISTORY_HOURS, math.ceil((now - watermark) / pd.Timedelta(hours=1)) + 1))
+    fresh = _telemetry_from_backend(site_id, hours)
+    if fresh is not None and not fresh.empty:
+        appended = store.append("site", site_id, fresh, until=now)
+        logger.info("Feature store: appended %s new hours for site %s", appended, site_id)
+    # the forecaster trains on the stored calendar features as they are
+    stored = store.read("site", site_id, start=now - pd.Timedelta(hours=_HISTORY_HOURS), columns=["energy_kwh", *CALENDAR_COLUMNS])
+    return stored if not stored.empty else None
+
+
+def _load_telemetry(site_id: int) -> Tuple[pd.DataFrame, bool]:
+    """The site's training telemetry and whether it is synthetic (no real telemetry was found)."""
+    store_dir = os.getenv("FEATURE_STORE_DIR")
+    if store_dir:
+        stored = _load_from_feature_store(FeatureStore(store_dir), site_id)
+        if stored is not None:
+            logger.info("Loaded %s hourly feature rows from the feature store", len(stored))
+            return stored, False
     df = _telemetry_from_backend(site_id)
     if df is not None and not df.empty:
         logger.info("Fetched %s telemetry samples from backend", len(df))
-        return df
-    logger.info("Falling back to synthetic telemetry for site %s", site_id)
-    return generate_synthetic_telemetry(datetime.utcnow(), periods=24 * 7)
+        return df, False
+    logger.warning("Falling back to synthetic telemetry for site %s; its model will not be promoted or stored", site_id)
+    return generate_synthetic_telemetry(datetime.utcnow(), periods=24 * 7), True
 
 
 def _load_equipment() -> List[EquipmentConfig]:
@@ -56,7 +88,9 @@ def _load_equipment() -> List[EquipmentConfig]:
     ]
 
 
-def _context(site_id: int, telemetry: pd.DataFrame, equipment: List[EquipmentConfig]) -> RetrainContext:
+def _context(
+    site_id: int, telemetry: pd.DataFrame, equipment: List[EquipmentConfig], auto_promote: bool = True
+) -> RetrainContext:
     def telemetry_loader(_: int) -> pd.DataFrame:
         return telemetry
 
@@ -71,18 +105,178 @@ def _context(site_id: int, telemetry: pd.DataFrame, equipment: List[EquipmentCon
         minio_access_key=os.getenv("MINIO_ACCESS_KEY", "minio"),
         minio_secret_key=os.getenv("MINIO_SECRET_KEY", "minio123"),
         bucket_name=os.getenv("MINIO_MODELS_BUCKET", "zerocraftr-models"),
-        registry_path=Path(os.getenv("MODEL_REGISTRY_PATH", "models_registry.db")),
+        registry_path=Path(os.getenv("MODEL_REGISTRY_PATH", "models_registry.db")).resolve(),
         encryption_key=os.getenv("AI_MINIO_SSE_KEY"),
+        study_storage=os.getenv("OPTIMIZER_STUDY_STORAGE"),
+        optimizer_solver=os.getenv("OPTIMIZER_SOLVER"),
+        drift_threshold=float(os.getenv("RETRAIN_DRIFT_THRESHOLD", "0")),
+        force=os.getenv("RETRAIN_FORCE", "false").lower() == "true",
+        artifact_cache_dir=Path(os.environ["ARTIFACT_CACHE_DIR"]) if os.getenv("ARTIFACT_CACHE_DIR") else None,
+        rf_profile=os.getenv("RETRAIN_RF_PROFILE", "full"),
+        artifact_compression=os.getenv("ARTIFACT_COMPRESSION", "lz4"),
+        lstm_precision=os.getenv("RETRAIN_LSTM_PRECISION", "float32"),
+        seasonal_model=os.getenv("RETRAIN_SEASONAL_MODEL", "builtin"),
+        auto_promote=auto_promote and os.getenv("RETRAIN_AUTO_PROMOTE", "true").lower() == "true",
+        promotion_tolerance=float(os.getenv("RETRAIN_PROMOTION_TOLERANCE", "0.05")),
     )
 
 
-def main() -> None:
-    site_id = int(os.getenv("SITE_ID", "1"))
-    telemetry = _load_telemetry(site_id)
+def _enumerate_sites() -> List[SiteInfo]:
+    """Fleet from ``SITE_IDS`` (comma separated), else the backend's site list, else ``SITE_ID``."""
+    site_ids = os.getenv("SITE_IDS")
+    if site_ids:
+        return [SiteInfo(int(value)) for value in site_ids.split(",") if value.strip()]
+    source = os.getenv("TELEMETRY_SOURCE_URL")
+    if source:
+        try:
+            response = requests.get(f"{source.rstrip('/')}/sites", timeout=15)
+            response.raise_for_status()
+            sites = []
+            for entry in response.json():
+                last_at = None
+                if entry.get("last_telemetry_at"):
+                    stamp = pd.Timestamp(entry["last_telemetry_at"])
+                    if stamp.tzinfo is not None:
+                        stamp = stamp.tz_convert("UTC").tz_localize(None)
+                    last_at = stamp.to_pydatetime()
+                sites.append(SiteInfo(int(entry["id"]), last_at))
+            if sites:
+                return sites
+        except Exception as exc:  # pragma: no cover - network calls
+            logger.warning("Failed to list sites: %s", exc)
+    return [SiteInfo(int(os.getenv("SITE_ID", "1")))]
+
+
+def _device_readings(site_id: int, dsn: str) -> pd.DataFrame:
+    """Raw readings of the site's devices over ``DEVICE_TRAINING_HOURS`` from the telemetry hypertable."""
+    type_column = os.getenv("DEVICE_TYPE_COLUMN")
+    if type_column and not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", type_column):
+        raise ValueError(f"Invalid DEVICE_TYPE_COLUMN '{type_column}'")
+    columns = ["t.device_id", *(f"t.{name}" for name in FEATURE_COLUMNS)]
+    if type_column:
+        columns.append(f"d.{type_column} AS device_type")
+    since = datetime.utcnow() - pd.Timedelta(hours=int(os.getenv("DEVICE_TRAINING_HOURS", "168")))
+    conn = connect_dsn(dsn)()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT {', '.join(columns)} FROM telemetry AS t JOIN device AS d ON d.device_id = t.device_id "
+            "WHERE d.site_id = %s AND t.time >= %s",
+            (site_id, since),
+        )
+        rows = cursor.fetchall()
+    finally:
+        conn.close()
+    names = ["device_id", *FEATURE_COLUMNS] + (["device_type"] if type_column else [])
+    return pd.DataFrame(rows, columns=names)
+
+
+def _retrain_device_models(site_id: int, dsn: str) -> int:
+    """Refit the per-device anomaly models that the inference service picks up by artifact mtime."""
+    readings = _device_readings(site_id, dsn)
+    if readings.empty:
+        return 0
+    # scheduler children are daemonic and cannot start a process pool of their own
+    paths = train_device_models(
+        readings_by_device(readings),
+        model_dir=Path(os.getenv("DEVICE_MODEL_DIR", str(DEVICE_MODEL_DIR))),
+        max_workers=1,
+    )
+    trained = sum(path is not None for path in paths.values())
+    logger.info("Trained %s of %s device anomaly models for site %s", trained, len(paths), site_id)
+    return trained
+
+
+def _forecast_degraded(site_id: int, dsn: str) -> bool:
+    """Whether the production forecaster's rolling error has drifted past what it was validated at."""
+    registry_path = Path(os.getenv("MODEL_REGISTRY_PATH", "models_registry.db")).resolve()
+    entry = get_registry(registry_path).production("intelligent_forecaster", site_id) if registry_path.exists() else None
+    if entry is None:
+        logger.info("No production forecaster for site %s, retraining", site_id)
+        return True
+    # only a held-out backtest MAE measures the same thing as the rolling error; older versions
+    # scored in-sample are retrained once so a backtested version can replace them
+    if entry.summary.get("validation") != "backtest" or entry.accuracy is None:
+        logger.info("Production forecaster v%s for site %s has no backtest MAE to compare against, retraining", entry.version, site_id)
+        return True
+    accuracy = ForecastAccuracyTracker.from_dsn(dsn).rolling(site_id=site_id)
+    degraded = is_degraded(
+        accuracy,
+        entry.accuracy,
+        tolerance=float(os.getenv("RETRAIN_DEGRADATION_TOLERANCE", "0.25")),
+        horizon_hours=int(os.getenv("RETRAIN_DEGRADATION_HORIZON", "24")),
+    )
+    if not degraded:
+        logger.info("Forecast accuracy for site %s within tolerance of MAE %.4f, skipping retrain", site_id, entry.accuracy)
+    return degraded
+
+
+def retrain_site(site_id: int) -> dict[str, float]:
+    """Retrain one site; runs inside a scheduler child process."""
+    try:
+        import torch
+
+        # children share the node, so each keeps to its own core
+        torch.set_num_threads(int(os.getenv("RETRAIN_THREADS_PER_SITE", "1")))
+    except ImportError:  # pragma: no cover - torch is a hard dependency of the forecaster
+        pass
+    telemetry, synthetic = _load_telemetry(site_id)
     equipment = _load_equipment()
-    pipeline = RetrainPipeline(_context(site_id, telemetry, equipment))
-    metrics = pipeline.run()
-    logger.info("Cron retrain completed for site %s metrics=%s", site_id, metrics)
+    # a model fitted on synthetic telemetry is recorded as a candidate only
+    pipeline = RetrainPipeline(_context(site_id, telemetry, equipment, auto_promote=not synthetic))
+    dsn = os.getenv("FORECAST_DATABASE_URL")
+    if dsn and not synthetic and os.getenv("RETRAIN_ON_DEGRADATION", "false").lower() == "true" and not _forecast_degraded(site_id, dsn):
+        # the production model keeps serving; its horizon still moves forward
+        metrics = {"forecast_retrained": 0.0, "optimization_retrained": 0.0}
+    else:
+        metrics = pipeline.run()
+    metrics["synthetic_telemetry"] = float(synthetic)
+    telemetry_dsn = os.getenv("TELEMETRY_DATABASE_URL") or dsn
+    if telemetry_dsn:
+        metrics["device_models_trained"] = float(_retrain_device_models(site_id, telemetry_dsn))
+    if dsn and not synthetic:
+        metrics["forecast_hours_stored"] = float(_precompute_forecast(pipeline, site_id, telemetry, dsn))
+    return metrics
+
+
+def _precompute_forecast(pipeline: RetrainPipeline, site_id: int, telemetry: pd.DataFrame, dsn: str) -> int:
+    """
+    Store the next ``FORECAST_HORIZON_HOURS`` + ``FORECAST_MAX_AGE_HOURS`` of the site's serving
+    forecaster in ``forecast_energy``, so the backend can serve a full horizon from the stored rows
+    until the forecast is too old to use.
+    """
+    forecaster, version = pipeline.serving_forecaster(telemetry)
+    if forecaster is None:
+        logger.warning("No forecaster available to precompute site %s", site_id)
+        return 0
+    rows = forecast_rows(
+        forecaster,
+        site_id,
+        horizon_hours=int(os.getenv("FORECAST_HORIZON_HOURS", str(HORIZON_HOURS)))
+        + int(os.getenv("FORECAST_MAX_AGE_HOURS", str(MAX_AGE_HOURS))),
+        emission_factor=float(os.getenv("FORECAST_EMISSION_FACTOR", str(DEFAULT_EMISSION_FACTOR))),
+        model_version=version,
+    )
+    return ForecastStore.from_dsn(dsn).replace(rows)
+
+
+def main() -> None:
+    # fail before forking per-site workers rather than in every one of them
+    default_solver(os.getenv("OPTIMIZER_SOLVER"), os.getenv("OPTIMIZER_STUDY_STORAGE"))
+    dsn = os.getenv("FORECAST_DATABASE_URL")
+    if dsn:
+        # score the hours that arrived since the last run before deciding who needs retraining
+        ForecastAccuracyTracker.from_dsn(dsn).update()
+    workers = os.getenv("RETRAIN_WORKERS")
+    scheduler = FleetRetrainScheduler(
+        retrain_site,
+        state_path=Path(os.getenv("RETRAIN_STATE_PATH", "retrain_state.json")),
+        report_dir=Path(os.getenv("RETRAIN_REPORT_DIR", "retrain_reports")),
+        max_workers=int(workers) if workers else None,
+        site_timeout=float(os.getenv("RETRAIN_SITE_TIMEOUT", "3600")),
+    )
+    report = scheduler.run(_enumerate_sites())
+    logger.info("Cron retrain completed for %s sites: %s", report["sites"], report["counts"])
 
 
 if __name__ == "__main__":
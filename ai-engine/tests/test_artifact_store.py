@@ -0,0 +1,134 @@
+import shutil
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pytest
+import torch
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from models.intelligent_forecaster import IntelligentForecaster, generate_synthetic_telemetry  # type: ignore  # noqa: E402
+from pipelines.artifact_store import ArtifactCache, ArtifactUploader, is_cached_only, sha256_file  # type: ignore  # noqa: E402
+
+
+class LocalObjectStore:
+    """Directory-backed stand-in for the MinIO client calls the pipeline makes."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.buckets: set[str] = set()
+        self.uploads: list[dict] = []
+        self.downloads = 0
+        self._lock = threading.Lock()
+
+    def bucket_exists(self, bucket: str) -> bool:
+        return bucket in self.buckets
+
+    def make_bucket(self, bucket: str) -> None:
+        self.buckets.add(bucket)
+
+    def fput_object(self, bucket, object_name, file_path, metadata=None, sse=None, part_size=0, num_parallel_uploads=3):
+        target = self.root / bucket / object_name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(file_path, target)
+        with self._lock:
+            self.uploads.append(
+                {"object": object_name, "metadata": metadata, "part_size": part_size, "parts": num_parallel_uploads}
+            )
+
+    def remove_object(self, bucket, object_name):
+        (self.root / bucket / object_name).unlink()
+
+    def fget_object(self, bucket, object_name, file_path, ssec=None):
+        with self._lock:
+            self.downloads += 1
+        shutil.copyfile(self.root / bucket / object_name, file_path)
+
+
+def test_concurrent_upload_and_checksum_keyed_cache(tmp_path):
+    store = LocalObjectStore(tmp_path / "minio")
+    work = tmp_path / "work"
+    work.mkdir()
+    artifacts = {}
+    for name, size in (("lstm", 1024), ("random_forest", 3 * 1024 * 1024), ("prophet", 10)):
+        path = work / f"{name}.bin"
+        path.write_bytes(bytes(range(256)) * (size // 256) + name.encode())
+        artifacts[name] = str(path)
+
+    uploaded = ArtifactUploader(store, "models", max_workers=3, part_size=1024 * 1024).upload_all(artifacts, prefix="site-1")
+
+    assert {entry["object"] for entry in store.uploads} == {f"site-1/{name}.bin" for name in artifacts}
+    assert all(entry["part_size"] == 1024 * 1024 for entry in store.uploads)
+    # three files on three workers leave one part stream each
+    assert all(entry["parts"] == 1 for entry in store.uploads)
+    for name, path in artifacts.items():
+        assert uploaded[name]["sha256"] == sha256_file(path)
+
+    cache = ArtifactCache(tmp_path / "cache", store, "models")
+    rf = uploaded["random_forest"]
+    first = cache.fetch(rf["object_name"], rf["sha256"])
+    second = cache.fetch(rf["object_name"], rf["sha256"])
+    assert first == second and store.downloads == 1
+    assert sha256_file(first) == rf["sha256"]
+
+    with pytest.raises(ValueError):
+        cache.fetch(uploaded["lstm"]["object_name"], "0" * 64)
+    assert not list((tmp_path / "cache" / "00").glob("*"))
+
+
+class FailingObjectStore(LocalObjectStore):
+    def fput_object(self, bucket, object_name, file_path, **kwargs):
+        if object_name.endswith("prophet.bin"):
+            raise ConnectionError("connection reset")
+        super().fput_object(bucket, object_name, file_path, **kwargs)
+
+
+def test_failed_upload_removes_partial_set_and_falls_back_to_cache(tmp_path):
+    store = FailingObjectStore(tmp_path / "minio")
+    artifacts = {}
+    for name in ("lstm", "random_forest", "prophet"):
+        path = tmp_path / f"{name}.bin"
+        path.write_bytes(name.encode() * 100)
+        artifacts[name] = str(path)
+
+    with pytest.raises(ConnectionError):
+        ArtifactUploader(store, "models", max_workers=2).upload_all(artifacts, prefix="site-1")
+    assert len(store.uploads) == 2
+    assert not [path for path in (tmp_path / "minio").rglob("*") if path.is_file()]
+
+    cache = ArtifactCache(tmp_path / "cache", store, "models")
+    kept = cache.keep(artifacts)
+    assert all(Path(entry["object_name"]).is_absolute() for entry in kept.values())
+    resolved = cache.resolve(kept)
+    assert {name: sha256_file(path) for name, path in resolved.items()} == {name: sha256_file(path) for name, path in artifacts.items()}
+    assert store.downloads == 0
+    assert is_cached_only(kept)
+
+    # another host has neither the cached copy nor an uploaded object to fetch
+    with pytest.raises(FileNotFoundError):
+        ArtifactCache(tmp_path / "other-cache", store, "models").resolve(
+            {"lstm": {**kept["lstm"], "object_name": str(tmp_path / "elsewhere" / "lstm.bin")}}
+        )
+    assert store.downloads == 0
+
+
+def test_compact_compressed_export_round_trips(tmp_path):
+    telemetry = generate_synthetic_telemetry(datetime(2024, 1, 1), periods=24 * 8)
+    forecaster = IntelligentForecaster(device="cpu", rf_profile="compact", artifact_compression="lz4", lstm_precision="float16")
+    forecaster.fit(telemetry, epochs=1)
+    forecaster.artifact_dir = tmp_path
+    paths = forecaster.export_artifacts()
+
+    state = torch.load(paths["lstm"])
+    assert all(tensor.dtype == torch.float16 for tensor in state.values())
+    assert joblib.load(paths["random_forest"]).max_depth == 10
+
+    before = [point.components["lstm"] for point in forecaster.predict(6)]
+    forecaster.load_lstm_weights(paths["lstm"])
+    after = [point.components["lstm"] for point in forecaster.predict(6)]
+    assert next(forecaster.lstm.parameters()).dtype == torch.float32
+    assert np.allclose(before, after, rtol=1e-2, atol=1e-2)
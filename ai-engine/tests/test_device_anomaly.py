@@ -0,0 +1,61 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from models.device_anomaly import DeviceModelCache, readings_by_device, train_device_models  # type: ignore  # noqa: E402
+
+
+def _telemetry(device_id: str, offset: float, rows: int = 200) -> pd.DataFrame:
+    rng = np.random.default_rng(len(device_id))
+    return pd.DataFrame(
+        {
+            "device_id": device_id,
+            "temperature": 60 + offset + rng.normal(0, 1, rows),
+            "pressure": 2.0 + rng.normal(0, 0.05, rows),
+            "vibration": 0.3 + rng.normal(0, 0.02, rows),
+            "power_usage": 1500 + offset * 10 + rng.normal(0, 20, rows),
+        }
+    )
+
+
+def test_per_device_models_train_in_parallel_and_load_lazily(tmp_path):
+    telemetry = pd.concat([_telemetry("press-1", 0.0), _telemetry("oven-2", 40.0), _telemetry("tiny", 0.0, rows=3)])
+    paths = train_device_models(readings_by_device(telemetry), model_dir=tmp_path, max_workers=2)
+
+    assert paths["tiny"] is None
+    assert Path(paths["press-1"]).exists() and Path(paths["oven-2"]).exists()
+
+    cache = DeviceModelCache(tmp_path, max_models=1)
+    assert len(cache) == 0
+    model = cache.get("press-1")
+    readings = pd.DataFrame(
+        {
+            "temperature": [60.0, 60.5, 100.0],
+            "pressure": [2.0, 2.0, 2.0],
+            "vibration": [0.3, None, 0.3],
+            "power_usage": [1500.0, 1510.0, 1500.0],
+        }
+    )
+    assert model.score(readings).anomalous_indices.tolist() == [2]
+
+    cache.get("oven-2")
+    assert len(cache) == 1
+    assert cache.get("unknown") is None
+    assert cache.get("unknown", device_type="missing") is None
+
+
+def test_type_models_are_trained_and_retrained_artifacts_reloaded(tmp_path):
+    telemetry = pd.concat([_telemetry("press-1", 0.0), _telemetry("press-2", 1.0)]).assign(device_type="press")
+    paths = train_device_models(readings_by_device(telemetry), model_dir=tmp_path, max_workers=1)
+    assert set(paths) == {"press-1", "press-2", "type-press"}
+
+    cache = DeviceModelCache(tmp_path, check_interval=0.0)
+    first = cache.get("new-press", device_type="press")
+    assert first is not None and cache.get("new-press", device_type="press") is first
+
+    train_device_models(readings_by_device(_telemetry("press-1", 40.0).assign(device_type="press")), model_dir=tmp_path)
+    assert cache.get("new-press", device_type="press") is not first
@@ -0,0 +1,47 @@
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from models.intelligent_forecaster import generate_synthetic_telemetry  # type: ignore  # noqa: E402
+from utils.feature_store import CALENDAR_COLUMNS, FeatureStore, hourly_features  # type: ignore  # noqa: E402
+
+
+def test_incremental_appends_match_full_materialization(tmp_path, recwarn):
+    telemetry = generate_synthetic_telemetry(datetime(2024, 1, 30), periods=24 * 4)
+    store = FeatureStore(tmp_path)
+
+    assert store.append("site", 1, telemetry.iloc[:50]) == 50
+    # overlapping rows are ignored, only the new range is derived
+    assert store.append("site", 1, telemetry.iloc[40:]) == len(telemetry) - 50
+    assert store.append("site", 1, telemetry) == 0
+    assert store.latest_timestamp("site", 1) == pd.Timestamp(telemetry["timestamp"].iloc[-1])
+    assert {path.name for path in tmp_path.glob("site=1/month=*")} == {"month=2024-01", "month=2024-02"}
+
+    stored = store.read("site", 1)
+    expected = hourly_features(telemetry)
+    assert len(stored) == len(expected)
+    assert {"lag_1h", "lag_24h"}.isdisjoint(stored.columns)
+    assert np.allclose(stored["energy_kwh"].to_numpy(), expected["energy_kwh"].to_numpy())
+
+    february = store.read("site", 1, start=pd.Timestamp("2024-02-01"), columns=["energy_kwh"])
+    assert list(february.columns) == ["timestamp", "energy_kwh"]
+    assert february["timestamp"].min() == pd.Timestamp("2024-02-01")
+    assert not [warning for warning in recwarn if warning.filename.endswith("feature_store.py")]
+
+
+def test_forecaster_reuses_stored_calendar_features(tmp_path):
+    from models.intelligent_forecaster import IntelligentForecaster  # type: ignore
+
+    telemetry = generate_synthetic_telemetry(datetime(2024, 1, 30), periods=24 * 3)
+    store = FeatureStore(tmp_path)
+    store.append("site", 1, telemetry)
+    stored = store.read("site", 1, columns=["energy_kwh", *CALENDAR_COLUMNS])
+
+    prepared = IntelligentForecaster()._prepare_dataframe(stored)
+    assert list(prepared.columns) == ["timestamp", "energy_kwh", *CALENDAR_COLUMNS]
+    assert prepared.equals(IntelligentForecaster()._prepare_dataframe(telemetry[["timestamp", "energy_kwh"]]))
@@ -0,0 +1,55 @@
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from pipelines.fleet_scheduler import FleetRetrainScheduler, SiteInfo  # type: ignore  # noqa: E402
+
+
+def _runner(site_id: int) -> dict:
+    if site_id == 2:
+        time.sleep(30)
+    if site_id == 3:
+        raise ValueError("No telemetry available for retraining.")
+    return {"forecast_mae": float(site_id)}
+
+
+def test_fleet_run_reports_timeouts_failures_and_resumes(tmp_path):
+    state_path = tmp_path / "state.json"
+    scheduler = FleetRetrainScheduler(
+        _runner, state_path, tmp_path / "reports", max_workers=3, site_timeout=1.0, mp_context="fork"
+    )
+    report = scheduler.run([SiteInfo(1), SiteInfo(2), SiteInfo(3)])
+
+    assert report["counts"] == {"succeeded": 1, "timed_out": 1, "failed": 1}
+    assert (tmp_path / "reports" / f"retrain-report-{report['run_id']}.json").exists()
+    state = json.loads(state_path.read_text())
+    assert list(state["last_trained"]) == ["1"]
+
+    # an interrupted run only retries the sites it had not finished
+    state["run"]["status"] = "running"
+    state["run"]["outcomes"] = {"1": state["run"]["outcomes"]["1"], "2": state["run"]["outcomes"]["2"]}
+    state_path.write_text(json.dumps(state))
+    resumed = scheduler.run([SiteInfo(1), SiteInfo(2), SiteInfo(3)])
+    assert resumed["run_id"] == report["run_id"]
+    assert resumed["counts"] == {"succeeded": 1, "timed_out": 1, "failed": 1}
+
+
+def test_sites_with_new_data_and_stale_models_go_first():
+    now = datetime(2024, 6, 1)
+    last_trained = {
+        "1": (now - timedelta(days=1)).isoformat(),
+        "2": (now - timedelta(days=5)).isoformat(),
+        "3": (now - timedelta(days=9)).isoformat(),
+    }
+    sites = [
+        SiteInfo(1, last_data_at=now),
+        SiteInfo(2, last_data_at=now),
+        SiteInfo(3, last_data_at=now - timedelta(days=10)),
+        SiteInfo(4),
+    ]
+    ordered = FleetRetrainScheduler.prioritize(sites, last_trained, now)
+    assert [site.site_id for site in ordered] == [4, 2, 1, 3]
@@ -2,10 +2,15 @@ from datetime import datetime
 from pathlib import Path
 import sys
 
+import numpy as np
+import pandas as pd
+
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from models.intelligent_forecaster import (  # type: ignore  # noqa: E402
+    COMPONENTS,
     IntelligentForecaster,
+    SeasonalTrendModel,
     compute_mae,
     generate_synthetic_telemetry,
 )
@@ -17,7 +22,9 @@ def test_forecast_accuracy():
     train, future = full_data.iloc[:-24], full_data.iloc[-24:]
     forecaster = IntelligentForecaster(window=24, device="cpu")
     metrics = forecaster.fit(train, epochs=10)
-    assert metrics["mae"] < 15
+    assert metrics["train_mae"] < 15
+    # the reported error is the held-out backtest, not the in-sample fit
+    assert metrics["validated"] == 1.0 and metrics["mae"] == metrics["backtest_mae"]
     assert metrics["mape"] > 0
 
     results = forecaster.predict(24)
@@ -26,3 +33,54 @@ def test_forecast_accuracy():
 
     assert len(results) == 24
     assert mae < 10
+
+
+def test_seasonal_trend_model_recovers_profile_and_trend():
+    ds = pd.date_range(datetime(2024, 1, 1), periods=24 * 28, freq="h")
+    t = np.arange(len(ds), dtype=float)
+    weekend = np.where(ds.dayofweek >= 5, -6.0, 0.0)
+    y = 40 + 0.02 * t + 5 * np.sin(2 * np.pi * ds.hour.to_numpy() / 24) + weekend
+    y[::50] += 80  # spikes must not tilt the trend
+    model = SeasonalTrendModel().fit(pd.DataFrame({"ds": ds, "y": y}))
+    assert abs(model.slope - 0.02) < 2e-3
+
+    future = pd.date_range(ds[-1] + pd.Timedelta(hours=1), periods=48, freq="h")
+    expected = 40 + 0.02 * np.arange(len(ds), len(ds) + 48) + 5 * np.sin(2 * np.pi * future.hour.to_numpy() / 24)
+    expected += np.where(future.dayofweek >= 5, -6.0, 0.0)
+    restored = SeasonalTrendModel.from_dict(model.to_dict())
+    yhat = restored.predict(pd.DataFrame({"ds": future}))["yhat"].to_numpy()
+    assert np.abs(yhat - expected).mean() < 1.0
+
+
+def test_backtest_learns_weights_and_interval(tmp_path):
+    full_data = generate_synthetic_telemetry(datetime(2024, 1, 1), periods=24 * 10)
+    forecaster = IntelligentForecaster(window=24, device="cpu", rf_profile="compact")
+    metrics = forecaster.fit(full_data, epochs=1)
+
+    assert forecaster.backtest is not None and len(forecaster.backtest) == 3 * 24
+    weights = forecaster.ensemble_weights
+    assert all(weights[name] >= 0 for name in COMPONENTS)
+    assert abs(sum(weights.values()) - 1.0) < 1e-6
+    assert set(metrics) >= {"backtest_mae", *(f"backtest_mae_{name}" for name in COMPONENTS)}
+    # the backtest LSTM is refit per fold, not the final model that has seen the test hours
+    last_fold = forecaster.backtest.iloc[-24:]
+    series = full_data["energy_kwh"].astype(float).to_numpy()
+    assert not np.allclose(last_fold["lstm"], forecaster._lstm_forecast(series[:-24], 24))
+    lower, upper = forecaster.error_quantiles  # type: ignore[misc]
+    point = forecaster.predict(1)[0]
+    assert point.lower == point.prediction + lower and point.upper == point.prediction + upper
+
+    forecaster.artifact_dir = tmp_path
+    served = IntelligentForecaster.from_artifacts(forecaster.export_artifacts(), device="cpu")
+    assert served.ensemble_weights == weights and served.error_quantiles == (lower, upper)
+
+
+def test_fit_without_backtest_keeps_default_weights():
+    full_data = generate_synthetic_telemetry(datetime(2024, 1, 1), periods=24 * 10)
+    forecaster = IntelligentForecaster(window=24, device="cpu", rf_profile="compact")
+    metrics = forecaster.fit(full_data, epochs=1, backtest=False)
+
+    assert forecaster.backtest is not None and forecaster.backtest.empty
+    assert forecaster.error_quantiles is None and metrics["validated"] == 0.0
+    assert metrics["mae"] == metrics["train_mae"]
+    assert abs(sum(forecaster.ensemble_weights.values()) - 1.0) < 1e-6
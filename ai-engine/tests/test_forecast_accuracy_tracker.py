@@ -0,0 +1,154 @@
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from pipelines.forecast_accuracy import ForecastAccuracyTracker, SiteAccuracy, is_degraded  # type: ignore  # noqa: E402
+from pipelines.forecast_precompute import ForecastRow, ForecastStore  # type: ignore  # noqa: E402
+
+
+def _accuracy_tables(conn: sqlite3.Connection) -> None:
+    # created by the backend's init_db in deployments
+    conn.execute(
+        "CREATE TABLE forecast_accuracy_daily (site_id INTEGER, horizon_hours INTEGER, day DATE, samples INTEGER, "
+        "abs_error_sum REAL, pct_samples INTEGER, pct_error_sum REAL, PRIMARY KEY (site_id, horizon_hours, day))"
+    )
+    conn.execute("CREATE TABLE forecast_accuracy_state (name VARCHAR(64) PRIMARY KEY, watermark TIMESTAMP NOT NULL)")
+
+
+def _database(path: Path, start: datetime) -> None:
+    conn = sqlite3.connect(path)
+    _accuracy_tables(conn)
+    conn.execute(
+        "CREATE TABLE forecast_energy (site_id INTEGER, timestamp TIMESTAMP, predicted_kwh REAL, issued_at TIMESTAMP)"
+    )
+    conn.execute(
+        "CREATE TABLE forecast_energy_superseded (site_id INTEGER, timestamp TIMESTAMP, issued_at TIMESTAMP, "
+        "predicted_kwh REAL NOT NULL, model_version TEXT, PRIMARY KEY (site_id, timestamp, issued_at))"
+    )
+    conn.execute("CREATE TABLE device (device_id INTEGER, site_id INTEGER)")
+    conn.execute("CREATE TABLE telemetry_1h (bucket TIMESTAMP, device_id INTEGER, avg_power REAL)")
+    conn.executemany("INSERT INTO device VALUES (?, ?)", [(1, 7), (2, 7)])
+    for step in range(1, 49):
+        hour = start + timedelta(hours=step)
+        # issued at ``start``: hours 1-6 land in the 6h bucket, 7-24 in 24h, the rest in 72h
+        conn.execute("INSERT INTO forecast_energy VALUES (7, ?, 10.0, ?)", (hour, start))
+        # two meters at 4 kW each -> 8 kWh actual, 2 kWh absolute error
+        conn.executemany("INSERT INTO telemetry_1h VALUES (?, ?, 4000.0)", [(hour, 1), (hour, 2)])
+    conn.commit()
+    conn.close()
+
+
+def test_tracker_scores_incrementally_per_horizon(tmp_path):
+    path = tmp_path / "accuracy.db"
+    start = datetime(2024, 3, 1)
+    _database(path, start)
+    tracker = ForecastAccuracyTracker(
+        lambda: sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES), paramstyle="qmark"
+    )
+
+    assert tracker.update(until=start + timedelta(hours=24)) == 24
+    # the watermark keeps already scored hours from being counted twice
+    assert tracker.update(until=start + timedelta(hours=24)) == 0
+    assert tracker.update(until=start + timedelta(hours=47)) == 23
+
+    today = start.date() + timedelta(days=1)
+    rolling = {item.horizon_hours: item for item in tracker.rolling(days=7, site_id=7, today=today)}
+    assert {horizon: item.samples for horizon, item in rolling.items()} == {6: 6, 24: 18, 72: 23}
+    assert all(item.mae == pytest.approx(2.0) and item.mape == pytest.approx(25.0) for item in rolling.values())
+    # the first day falls out of a one-day window
+    assert sum(item.samples for item in tracker.rolling(days=1, today=today)) == 24
+
+
+def test_watermark_waits_for_unmaterialized_buckets(tmp_path):
+    path = tmp_path / "accuracy.db"
+    start = datetime(2024, 3, 1)
+    _database(path, start)
+    conn = sqlite3.connect(path)
+    # the aggregate has not materialized the last eight hours yet
+    pending = conn.execute("SELECT * FROM telemetry_1h WHERE bucket > ?", (start + timedelta(hours=40),)).fetchall()
+    conn.execute("DELETE FROM telemetry_1h WHERE bucket > ?", (start + timedelta(hours=40),))
+    conn.commit()
+    tracker = ForecastAccuracyTracker(
+        lambda: sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES), paramstyle="qmark"
+    )
+
+    assert tracker.update(until=start + timedelta(hours=48)) == 40
+    conn.executemany("INSERT INTO telemetry_1h VALUES (?, ?, ?)", pending)
+    conn.commit()
+    conn.close()
+    assert tracker.update(until=start + timedelta(hours=48)) == 8
+
+
+def test_replaced_horizons_are_still_scored_at_their_lead(tmp_path):
+    path = tmp_path / "accuracy.db"
+    start = datetime(2024, 3, 1)
+    conn = sqlite3.connect(path)
+    _accuracy_tables(conn)
+    conn.execute(
+        "CREATE TABLE forecast_energy (site_id INTEGER, timestamp TIMESTAMP, predicted_kwh REAL, predicted_co2 REAL, "
+        "lower_kwh REAL, upper_kwh REAL, issued_at TIMESTAMP, model_version TEXT)"
+    )
+    conn.execute(
+        "CREATE TABLE forecast_energy_superseded (site_id INTEGER, timestamp TIMESTAMP, issued_at TIMESTAMP, "
+        "predicted_kwh REAL NOT NULL, model_version TEXT, PRIMARY KEY (site_id, timestamp, issued_at))"
+    )
+    conn.execute("CREATE TABLE device (device_id INTEGER, site_id INTEGER)")
+    conn.execute("CREATE TABLE telemetry_1h (bucket TIMESTAMP, device_id INTEGER, avg_power REAL)")
+    conn.execute("INSERT INTO device VALUES (1, 7)")
+    conn.executemany("INSERT INTO telemetry_1h VALUES (?, 1, 8000.0)", [(start + timedelta(hours=step),) for step in range(1, 97)])
+    conn.commit()
+    conn.close()
+    connect = lambda: sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES)  # noqa: E731
+    store = ForecastStore(connect, paramstyle="qmark")
+
+    def horizon(issued: datetime) -> list:
+        return [ForecastRow(7, issued + timedelta(hours=step), 10.0, 8.2, 9.0, 11.0, issued) for step in range(1, 97)]
+
+    # nightly runs: each new horizon replaces the previous one from its first hour on
+    for day in range(3):
+        store.replace(horizon(start + timedelta(days=day)))
+    tracker = ForecastAccuracyTracker(connect, paramstyle="qmark")
+
+    assert tracker.update(until=start + timedelta(hours=96)) == 96 + 72 + 48
+    samples = {item.horizon_hours: item.samples for item in tracker.rolling(days=7, today=start.date() + timedelta(days=4))}
+    # leads past a day come from horizons that a later run replaced
+    assert samples == {6: 18, 24: 54, 72: 120, 168: 24}
+    # scored hours are dropped; day 1's replaced hours past the last actual wait for their telemetry
+    conn = connect()
+    remaining = conn.execute("SELECT MIN(timestamp), COUNT(*) FROM forecast_energy_superseded").fetchone()
+    assert remaining == (str(start + timedelta(hours=97)), 24)
+    conn.close()
+
+
+def test_rolling_is_empty_before_the_tables_exist(tmp_path):
+    path = tmp_path / "empty.db"
+    tracker = ForecastAccuracyTracker(lambda: sqlite3.connect(path), paramstyle="qmark")
+
+    assert tracker.rolling(days=7) == []
+    # a read never creates the schema
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0] == 0
+    conn.close()
+
+
+def test_degradation_against_the_validated_mae():
+    accuracy = [SiteAccuracy(site_id=7, horizon_hours=24, samples=48, mae=2.0, mape=25.0)]
+
+    assert not is_degraded(accuracy, baseline_mae=1.8, tolerance=0.25)
+    assert is_degraded(accuracy, baseline_mae=1.5, tolerance=0.25)
+    assert is_degraded(accuracy, baseline_mae=None)
+    # too few scored hours is not evidence that the model is fine
+    assert is_degraded(accuracy, baseline_mae=1.8, min_samples=72)
+    # leads up to the horizon are pooled like the 1-24h backtest; longer leads are left out
+    pooled = [
+        SiteAccuracy(site_id=7, horizon_hours=6, samples=12, mae=1.0, mape=10.0),
+        SiteAccuracy(site_id=7, horizon_hours=24, samples=36, mae=3.0, mape=30.0),
+        SiteAccuracy(site_id=7, horizon_hours=72, samples=48, mae=9.0, mape=90.0),
+    ]
+    assert not is_degraded(pooled, baseline_mae=2.0, tolerance=0.25)
+    assert is_degraded(pooled, baseline_mae=2.0, tolerance=0.2)
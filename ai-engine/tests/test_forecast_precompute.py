@@ -0,0 +1,55 @@
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from models.intelligent_forecaster import ForecastResult  # type: ignore  # noqa: E402
+from pipelines.forecast_precompute import ForecastStore, forecast_rows  # type: ignore  # noqa: E402
+
+
+class _FixedForecaster:
+    def __init__(self, start: datetime, level: float) -> None:
+        self.start = start
+        self.level = level
+
+    def predict(self, horizon_hours: int):
+        return [
+            ForecastResult(self.start + timedelta(hours=step), self.level, self.level - 1, self.level + 1, {})
+            for step in range(horizon_hours)
+        ]
+
+
+def test_store_replaces_the_horizon_and_keeps_earlier_hours(tmp_path):
+    path = tmp_path / "forecasts.db"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE forecast_energy (id INTEGER PRIMARY KEY, site_id INTEGER NOT NULL, timestamp TIMESTAMP NOT NULL, "
+        "predicted_kwh REAL NOT NULL, predicted_co2 REAL NOT NULL, lower_kwh REAL, upper_kwh REAL, issued_at TIMESTAMP, "
+        "model_version TEXT, UNIQUE (site_id, timestamp))"
+    )
+    conn.execute(
+        "CREATE TABLE forecast_energy_superseded (site_id INTEGER, timestamp TIMESTAMP, issued_at TIMESTAMP, "
+        "predicted_kwh REAL NOT NULL, model_version TEXT, PRIMARY KEY (site_id, timestamp, issued_at))"
+    )
+    conn.close()
+    store = ForecastStore(lambda: sqlite3.connect(path), paramstyle="qmark")
+    start = datetime(2024, 3, 1)
+
+    assert store.replace(forecast_rows(_FixedForecaster(start, 10.0), 4, horizon_hours=48, emission_factor=0.5)) == 48
+    rows = forecast_rows(_FixedForecaster(start + timedelta(hours=24), 20.0), 4, horizon_hours=48, model_version="v2")
+    assert store.replace(rows) == 48
+    store.replace(forecast_rows(_FixedForecaster(start, 99.0), 5, horizon_hours=24))
+
+    conn = sqlite3.connect(path)
+    stored = conn.execute(
+        "SELECT predicted_kwh, predicted_co2, model_version FROM forecast_energy WHERE site_id = 4 ORDER BY timestamp"
+    ).fetchall()
+    superseded = conn.execute("SELECT MIN(timestamp), COUNT(*), MAX(predicted_kwh) FROM forecast_energy_superseded").fetchone()
+    conn.close()
+    assert len(stored) == 72
+    # the first horizon's last day was replaced by the second one but kept for scoring
+    assert superseded == (str(start + timedelta(hours=24)), 24, 10.0)
+    assert stored[0] == (10.0, 5.0, None)
+    assert stored[24] == (20.0, 20.0 * 0.82, "v2") and stored[-1][0] == 20.0
@@ -0,0 +1,79 @@
+import os
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import torch
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from models.energy_predictor import export_graphs, load_model, predict_next_day_batch  # type: ignore  # noqa: E402
+from models.intelligent_forecaster import IntelligentForecaster, generate_synthetic_telemetry  # type: ignore  # noqa: E402
+
+
+def test_torchscript_graph_matches_eager_predictor(tmp_path):
+    predictor = load_model(tmp_path / "missing.pt")
+    paths = export_graphs(predictor, stem=tmp_path / "energy_predictor")
+
+    graph = torch.jit.load(paths["torchscript"])
+    curves = [list(np.linspace(10, 40, 24)), list(np.linspace(40, 10, 24))]
+    with torch.no_grad():
+        scripted = graph(torch.tensor(curves, dtype=torch.float32)).squeeze(-1).clamp(min=0.0).tolist()
+    assert np.allclose(scripted, predict_next_day_batch(curves, model=predictor), atol=1e-5)
+
+
+def test_compiled_lstm_backend_matches_eager_forecast():
+    telemetry = generate_synthetic_telemetry(datetime(2024, 1, 1), periods=24 * 8)
+    forecasts = {}
+    for backend in ("torch", "torchscript"):
+        torch.manual_seed(0)
+        forecaster = IntelligentForecaster(device="cpu", lstm_backend=backend)
+        forecaster.fit(telemetry, epochs=1)
+        forecasts[backend] = [point.components["lstm"] for point in forecaster.predict(12)]
+    assert np.allclose(forecasts["torch"], forecasts["torchscript"], atol=1e-4)
+
+
+_ONNX_SERVICE_CHECK = """
+import sys
+import inference_api
+assert "torch" not in sys.modules, "torch imported by the ONNX backend"
+print(inference_api.forecast_energy(inference_api.EnergyForecastRequest(load_curve=[10.0] * 24)).prediction_kwh)
+"""
+
+
+def test_onnx_inference_service_runs_without_torch(tmp_path):
+    predictor = load_model(tmp_path / "missing.pt")
+    paths = export_graphs(predictor, stem=tmp_path / "energy_predictor")
+    root = Path(__file__).resolve().parents[1]
+    env = {**os.environ, "INFERENCE_BACKEND": "onnx", "ENERGY_MODEL_PATH": paths["onnx"]}
+
+    served = subprocess.run([sys.executable, "-c", _ONNX_SERVICE_CHECK], cwd=root, env=env, capture_output=True, text=True)
+    assert served.returncode == 0, served.stderr
+    assert np.isclose(float(served.stdout.strip()), predict_next_day_batch([[10.0] * 24], model=predictor)[0], atol=1e-4)
+
+    env["ENERGY_MODEL_PATH"] = str(tmp_path / "missing.onnx")
+    missing = subprocess.run([sys.executable, "-c", "import inference_api"], cwd=root, env=env, capture_output=True, text=True)
+    assert missing.returncode != 0 and "FileNotFoundError" in missing.stderr
+
+
+def test_served_forecaster_runs_the_exported_graph(tmp_path, monkeypatch):
+    torch.manual_seed(0)
+    telemetry = generate_synthetic_telemetry(datetime(2024, 1, 1), periods=24 * 8)
+    forecaster = IntelligentForecaster(device="cpu")
+    forecaster.fit(telemetry, epochs=1, backtest=False)
+    forecaster.artifact_dir = tmp_path
+    paths = forecaster.export_artifacts()
+    expected = [point.components["lstm"] for point in forecaster.predict(6)]
+
+    def no_compile(self):
+        raise AssertionError("the exported graph should be served, not re-traced")
+
+    monkeypatch.setattr(IntelligentForecaster, "_compile_lstm", no_compile)
+    for backend in ("torchscript", "onnx"):
+        artifacts = IntelligentForecaster.serving_artifacts(paths, backend)
+        assert [name for name in artifacts if name.startswith("lstm_")] == [f"lstm_{backend}"]
+        served = IntelligentForecaster.from_artifacts(artifacts, device="cpu", lstm_backend=backend)
+        actual = [point.components["lstm"] for point in served.with_history(telemetry).predict(6)]
+        assert np.allclose(expected, actual, rtol=1e-4, atol=1e-4)
@@ -0,0 +1,36 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from models.anomaly_detector import load_detector  # type: ignore  # noqa: E402
+from models.energy_predictor import load_model, predict_next_day, predict_next_day_batch  # type: ignore  # noqa: E402
+from models.waste_model import WasteEmissionModel  # type: ignore  # noqa: E402
+
+
+def test_batch_predictions_match_single_calls(tmp_path):
+    predictor = load_model(tmp_path / "missing.pt")
+    curves = [list(np.linspace(10, 40, 24)), list(np.linspace(40, 10, 24))]
+    batch = predict_next_day_batch(curves, model=predictor)
+    assert np.allclose(batch, [predict_next_day(curve, model=predictor) for curve in curves], atol=1e-5)
+
+    detector = load_detector(tmp_path / "missing.joblib")
+    series = [[1.0, 1.1, 0.9, 12.0], [0.8, 0.9, 1.0]]
+    assert detector.predict_many(series) == [detector.predict(values) for values in series]
+
+    waste = WasteEmissionModel(tmp_path / "waste.joblib")
+    assert np.allclose(waste.predict_many([0.5, 2.0]), [waste.predict(0.5), waste.predict(2.0)])
+
+
+def test_columnar_scores_match_records(tmp_path):
+    detector = load_detector(tmp_path / "missing.joblib")
+    series = np.concatenate([np.full(50, 1.0), [9.0], np.full(50, 1.1)])
+
+    scores = detector.score(series)
+    records = detector.predict(series)
+
+    assert scores.anomalous_indices.tolist() == [idx for idx, record in enumerate(records) if record.is_anomaly]
+    assert 50 in scores.anomalous_indices
+    assert np.allclose(scores.z_scores, [record.z_score for record in records])
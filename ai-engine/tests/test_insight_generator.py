@@ -1,3 +1,4 @@
+import asyncio
 import sys
 from pathlib import Path
 
@@ -17,3 +18,117 @@ def test_insight_generator_returns_confident_response():
 
     assert "insight" in response and response["insight"]
     assert response["confidence"] >= 0.75
+
+
+def test_generate_batch_matches_single_generation():
+    generator = InsightGenerator()
+    contexts = [
+        {"energy_summary": "420 kWh", "forecast_summary": "5% rise", "optimization_summary": "press #3 -8%"},
+        {"energy_summary": "390 kWh", "forecast_summary": "flat", "optimization_summary": "idle conveyor"},
+    ]
+    batch = generator.generate_batch(contexts, seeds=[1, 2])
+
+    assert len(batch) == 2
+    if generator.model is None:  # sampling is only reproducible in template mode
+        assert batch == [generator.generate(contexts[0], seed=1), generator.generate(contexts[1], seed=2)]
+
+
+def test_batcher_deduplicates_and_caches_prompts():
+    from services.insight_api import InsightBatcher  # type: ignore
+
+    generator = InsightGenerator()
+    calls: list[int] = []
+    generate_batch = generator.generate_batch
+
+    def counting_generate_batch(contexts, seeds=None):
+        calls.append(len(contexts))
+        return generate_batch(contexts, seeds)
+
+    generator.generate_batch = counting_generate_batch  # type: ignore
+    batcher = InsightBatcher(generator, max_batch_size=4, max_wait_ms=50)
+    context = {"energy_summary": "420 kWh", "forecast_summary": "5% rise", "optimization_summary": "press #3 -8%"}
+
+    async def scenario():
+        first = await asyncio.gather(*(batcher.submit(context) for _ in range(3)))
+        second = await batcher.submit(context)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert calls == [1]
+    assert all(result == second for result in first)
+
+
+def test_batcher_ignores_seeds_in_model_mode():
+    from services.insight_api import InsightBatcher  # type: ignore
+
+    generator = InsightGenerator(model_name="missing-local-model", lazy=True)
+    batcher = InsightBatcher(generator)
+    context = {"energy_summary": "420 kWh"}
+    assert batcher.cache_key(context, 1) != batcher.cache_key(context, 2)
+
+    generator.loaded, generator.model = True, object()
+    assert batcher.cache_key(context, 1) == batcher.cache_key(context, 2)
+
+
+def test_lazy_generator_loads_on_first_use():
+    generator = InsightGenerator(model_name="missing-local-model", lazy=True)
+    assert generator.mode == "unloaded"
+
+    response = generator.generate({"energy_summary": "420 kWh"}, seed=5)
+
+    assert response["insight"]
+    assert generator.mode == "template"
+    assert generator.load_seconds is not None
+
+
+def test_stream_yields_deltas_then_final_insight():
+    generator = InsightGenerator()
+    context = {"energy_summary": "420 kWh", "forecast_summary": "5% rise", "optimization_summary": "press #3 -8%"}
+
+    events = list(generator.stream(context, seed=9))
+
+    deltas = [event["delta"] for event in events[:-1]]
+    assert deltas and all(isinstance(delta, str) for delta in deltas)
+    assert events[-1]["insight"] == "".join(deltas).strip()
+    if generator.model is None:
+        assert events[-1] == generator.generate(context, seed=9)
+
+
+def test_readiness_waits_for_a_successful_load():
+    from fastapi import Response
+
+    from services import insight_api  # type: ignore
+
+    generator = InsightGenerator(model_name="missing-local-model", lazy=True)
+    insight_api.generator, original = generator, insight_api.generator
+    try:
+        response = Response()
+        assert insight_api.readiness(response).status == "loading" and response.status_code == 503
+        generator.load()
+        response = Response()
+        assert insight_api.readiness(response).status == "failed" and response.status_code == 503
+        insight_api.ALLOW_TEMPLATE = True
+        response = Response()
+        assert insight_api.readiness(response).status == "ready" and response.status_code == 200
+    finally:
+        insight_api.generator, insight_api.ALLOW_TEMPLATE = original, False
+
+
+def test_stream_events_report_generation_errors():
+    from services import insight_api  # type: ignore
+
+    class FailingGenerator(InsightGenerator):
+        def stream(self, context, seed=42):
+            yield {"delta": "Shift"}
+            yield {"error": "CUDA out of memory"}
+
+    generator = FailingGenerator(model_name="missing-local-model", lazy=True)
+    insight_api.generator, original = generator, insight_api.generator
+    try:
+        events = list(insight_api._stream_events({"energy_summary": "fails"}, 42))
+    finally:
+        insight_api.generator = original
+
+    assert events[-1].startswith("event: error\n") and "CUDA out of memory" in events[-1]
+    assert insight_api.batcher.cache_get(insight_api.batcher.cache_key({"energy_summary": "fails"}, 42)) is None
@@ -0,0 +1,100 @@
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import torch
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from models.intelligent_forecaster import IntelligentForecaster, generate_synthetic_telemetry  # type: ignore  # noqa: E402
+from models.model_holder import ModelHolder, ProductionModel  # type: ignore  # noqa: E402
+from models.registry import ModelRegistry, RegistryEntry  # type: ignore  # noqa: E402
+
+
+def test_model_holder_loads_once_and_reloads_on_change(tmp_path):
+    artifact = tmp_path / "model.txt"
+    artifact.write_text("v1")
+    loads: list[str] = []
+
+    def loader(path: Path) -> str:
+        content = path.read_text() if path.exists() else "fallback"
+        loads.append(content)
+        return content
+
+    holder = ModelHolder("test", artifact, loader, check_interval=0)
+
+    assert holder.get() == "v1"
+    assert holder.get() == "v1"
+    assert loads == ["v1"]
+
+    artifact.write_text("v2-longer")
+    os.utime(artifact, ns=(artifact.stat().st_atime_ns, artifact.stat().st_mtime_ns + 1_000_000))
+    assert holder.get() == "v2-longer"
+    assert loads == ["v1", "v2-longer"]
+    assert holder.status()["loaded"] and holder.status()["load_seconds"] is not None
+
+
+def test_production_model_hot_swaps_on_promotion(tmp_path):
+    registry = ModelRegistry(tmp_path / "registry.db")
+    first = registry.record("intelligent_forecaster", 3, 1.0, "v1")
+    second = registry.record("intelligent_forecaster", 3, 0.9, "v2")
+    loads: list[str] = []
+
+    def loader(entry: RegistryEntry) -> str:
+        loads.append(entry.path)
+        return entry.path
+
+    served = ProductionModel("intelligent_forecaster", registry, loader, check_interval=0)
+    assert served.get(3) is None
+
+    registry.promote(first)
+    entry, model = served.get(3)  # type: ignore[misc]
+    assert (entry.stage, model) == ("production", "v1")
+    assert served.get(3)[1] == "v1" and loads == ["v1"]  # type: ignore[index]
+
+    registry.promote(second)
+    assert served.get(3)[1] == "v2"  # type: ignore[index]
+    assert registry.get(first).stage == "archived"  # type: ignore[union-attr]
+    assert [entry.id for entry in registry.query(site_id=3) if entry.stage == "production"] == [second]
+    assert loads == ["v1", "v2"] and served.status()["versions"] == {"3": entry.version}
+
+
+def test_forecaster_served_from_artifacts_matches_fitted(tmp_path):
+    torch.manual_seed(0)
+    telemetry = generate_synthetic_telemetry(datetime(2024, 1, 1), periods=24 * 8)
+    forecaster = IntelligentForecaster(device="cpu")
+    forecaster.fit(telemetry, epochs=1)
+    forecaster.artifact_dir = tmp_path
+    paths = forecaster.export_artifacts()
+
+    served = IntelligentForecaster.from_artifacts(paths, device="cpu").with_history(telemetry)
+    expected = [point.prediction for point in forecaster.predict(12)]
+    actual = [point.prediction for point in served.predict(12)]
+    assert np.allclose(expected, actual, rtol=1e-4, atol=1e-4)
+
+
+def test_production_model_keeps_serving_when_a_load_fails(tmp_path):
+    registry = ModelRegistry(tmp_path / "registry.db")
+    broken = registry.record("intelligent_forecaster", 3, 1.0, "broken")
+    loads: list[str] = []
+
+    def loader(entry: RegistryEntry) -> str:
+        loads.append(entry.path)
+        if entry.path.startswith("broken"):
+            raise OSError("artifact unavailable")
+        return entry.path
+
+    served = ProductionModel("intelligent_forecaster", registry, loader, check_interval=60)
+    registry.promote(broken)
+    # nothing to fall back to: the caller fits per request, and the load is not retried each call
+    assert served.get(3) is None and served.get(3) is None
+    assert loads == ["broken"]
+
+    served.check_interval = 0
+    registry.promote(registry.record("intelligent_forecaster", 3, 0.9, "v2"))
+    assert served.get(3)[1] == "v2"  # type: ignore[index]
+    registry.promote(registry.record("intelligent_forecaster", 3, 0.8, "broken-v3"))
+    entry, model = served.get(3)  # type: ignore[misc]
+    assert (entry.path, model) == ("v2", "v2")
@@ -0,0 +1,47 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from models.registry import ModelRegistry, get_registry  # type: ignore  # noqa: E402
+
+
+def test_registry_migrates_and_answers_site_queries(tmp_path):
+    path = tmp_path / "registry.db"
+    legacy = sqlite3.connect(path)
+    legacy.execute(
+        "CREATE TABLE models_registry (id INTEGER PRIMARY KEY AUTOINCREMENT, model_name TEXT NOT NULL, "
+        "version TEXT NOT NULL, accuracy REAL, path TEXT NOT NULL, created_at TEXT NOT NULL)"
+    )
+    legacy.execute(
+        "INSERT INTO models_registry (model_name, version, accuracy, path, created_at) "
+        "VALUES ('intelligent_forecaster', '1', 1.0, 'legacy', '2024-01-01T00:00:00')"
+    )
+    legacy.commit()
+    legacy.close()
+
+    registry = get_registry(path)
+    assert get_registry(path) is registry
+    assert registry._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    indexes = {row[1] for row in registry._conn.execute("PRAGMA index_list(models_registry)")}
+    assert "ix_models_registry_model_site_created" in indexes
+
+    for site_id in (1, 2, 1):
+        registry.record("intelligent_forecaster", site_id, float(site_id), f"site-{site_id}", "digest", {"mae": 1.0})
+    registry.record("optimization_engine", 1, 5.0, "[]")
+
+    assert registry.count() == 5
+    assert registry.count(model_name="intelligent_forecaster", site_id=1) == 2
+    page = registry.query(model_name="intelligent_forecaster", limit=2, offset=1)
+    assert len(page) == 2 and page[0].created_at >= page[1].created_at
+
+    latest = registry.latest_per_site("intelligent_forecaster")
+    assert [(entry.site_id, entry.id) for entry in latest] == [(None, 1), (1, 4), (2, 3)]
+    assert registry.latest("intelligent_forecaster", 1, with_fingerprint=True).summary == {"mae": 1.0}
+    assert registry.latest("intelligent_forecaster", 3) is None
+
+    # a second process-level connection sees committed versions without reopening
+    other = ModelRegistry(path)
+    assert other.count() == 5
+    other.close()
@@ -4,7 +4,18 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
-from models.optimizer import EquipmentConfig, OptimizationEngine, sample_evaluator  # type: ignore  # noqa: E402
+import numpy as np  # noqa: E402
+import optuna  # noqa: E402
+import pytest  # noqa: E402
+
+from models.optimizer import (  # type: ignore  # noqa: E402
+    EquipmentConfig,
+    OptimizationEngine,
+    default_solver,
+    population_arrays,
+    sample_batch_evaluator,
+    sample_evaluator,
+)
 
 
 def test_optimizer_generates_improvement():
@@ -21,3 +32,89 @@ def test_optimizer_generates_improvement():
     assert all(cfg.load_pct > 0 for cfg in result.recommended)
     serialized = json.dumps([cfg.__dict__ for cfg in result.recommended])
     assert isinstance(json.loads(serialized), list)
+
+
+def _reference_evaluator(configs):
+    # the original per-machine formula, kept independent of the vectorized terms
+    energy = 0.0
+    for cfg in configs:
+        load_factor = cfg.load_pct / 100.0
+        efficiency = 0.9 - 0.2 * abs(load_factor - 0.85)
+        runtime_effect = cfg.runtime_hours + 0.1 * cfg.idle_hours
+        energy += runtime_effect * load_factor / max(efficiency, 0.1) * 10
+    return {"energy_kwh": energy, "co2_kg": energy * 0.82}
+
+
+def test_batch_evaluator_matches_scalar_evaluator():
+    population = [
+        [EquipmentConfig(name=f"machine_{i}", load_pct=60 + 5 * i + j, runtime_hours=8 + j, idle_hours=i) for i in range(5)]
+        for j in range(4)
+    ]
+    # loads on both sides of the 85 % efficiency peak
+    population.append([EquipmentConfig(name=f"machine_{i}", load_pct=5 + 24 * i, runtime_hours=2, idle_hours=20) for i in range(5)])
+    batch = sample_batch_evaluator(*population_arrays(population))
+    reference = [_reference_evaluator(configs) for configs in population]
+
+    assert np.allclose(batch["energy_kwh"], [m["energy_kwh"] for m in reference])
+    assert np.allclose(batch["co2_kg"], [m["co2_kg"] for m in reference])
+    assert all(
+        np.isclose(sample_evaluator(configs)["energy_kwh"], expected["energy_kwh"])
+        for configs, expected in zip(population, reference)
+    )
+
+
+def test_batched_optimizer_generates_improvement():
+    baseline = [EquipmentConfig(name=f"machine_{i}", load_pct=90, runtime_hours=16, idle_hours=4) for i in range(10)]
+    engine = OptimizationEngine(
+        sample_evaluator,
+        n_trials=24,
+        random_state=7,
+        batch_evaluator=sample_batch_evaluator,
+        batch_size=8,
+    )
+
+    result = engine.optimize(baseline)
+
+    assert result.savings_pct > 0
+    assert len(result.recommended) == len(baseline)
+
+
+def test_persisted_study_warm_starts_next_run(tmp_path):
+    baseline = [
+        EquipmentConfig(name="machine_1", load_pct=90, runtime_hours=16, idle_hours=4),
+        EquipmentConfig(name="machine_2", load_pct=80, runtime_hours=12, idle_hours=6),
+    ]
+    storage = f"sqlite:///{tmp_path / 'studies.db'}"
+
+    def run():
+        engine = OptimizationEngine(sample_evaluator, n_trials=12, storage=storage, study_name="site-1")
+        return engine.optimize(baseline)
+
+    first = run()
+    second = run()
+
+    # the previous best is re-evaluated first, so a warm-started run can only match or improve it
+    assert second.objective <= first.objective + 1e-9
+    study = optuna.load_study(study_name="site-1", storage=storage)
+    assert len(study.trials) == 24
+
+
+def test_separable_solver_beats_joint_search():
+    baseline = [
+        EquipmentConfig(name=f"machine_{i}", load_pct=70 + i, runtime_hours=10 + i % 6, idle_hours=i % 4) for i in range(20)
+    ]
+    joint = OptimizationEngine(sample_evaluator, n_trials=20, random_state=7).optimize(baseline)
+    separable = OptimizationEngine(sample_evaluator, solver="auto").optimize(baseline)
+
+    assert separable.objective < joint.objective
+    for eq, cfg in zip(baseline, separable.recommended):
+        assert 0.5 * eq.load_pct <= cfg.load_pct <= 1.05 * eq.load_pct
+        assert 0.1 <= cfg.idle_hours <= max(eq.idle_hours, 1.0)
+
+
+def test_default_solver_keeps_persisted_studies_on_tpe():
+    assert default_solver(None, "sqlite:///studies.db") == "tpe"
+    assert default_solver(None, None) == "auto"
+    assert default_solver("auto", "sqlite:///studies.db") == "auto"
+    with pytest.raises(ValueError):
+        default_solver("grid", None)
@@ -0,0 +1,28 @@
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from models.intelligent_forecaster import generate_synthetic_telemetry  # type: ignore  # noqa: E402
+from utils.resample import resample_hourly  # type: ignore  # noqa: E402
+
+
+def test_resample_hourly_sums_minute_samples_and_fills_gaps():
+    minutes = pd.date_range(datetime(2024, 1, 1), periods=60 * 4, freq="min")
+    telemetry = pd.DataFrame({"timestamp": minutes, "energy_kwh": 0.5})
+    telemetry = telemetry[telemetry["timestamp"].dt.hour != 2]  # meter offline for an hour
+
+    hourly = resample_hourly(telemetry)
+
+    assert len(hourly) == 4
+    assert list(hourly["energy_kwh"]) == [30.0, 30.0, 30.0, 30.0]
+
+
+def test_resample_hourly_passes_hourly_series_through():
+    telemetry = generate_synthetic_telemetry(datetime(2024, 1, 1), periods=48)
+    hourly = resample_hourly(telemetry)
+    assert len(hourly) == 48
+    assert hourly["energy_kwh"].round(6).tolist() == telemetry["energy_kwh"].round(6).tolist()
@@ -55,3 +55,64 @@ def test_retrain_pipeline_updates_registry(tmp_path):
     for path in artifacts:
         if os.path.exists(path):
             os.remove(path)
+
+
+def test_unchanged_telemetry_skips_retraining(tmp_path):
+    telemetry = generate_synthetic_telemetry(datetime(2024, 1, 1), periods=24 * 8)
+    equipment = [EquipmentConfig(name="machine", load_pct=85, runtime_hours=10, idle_hours=2)]
+
+    def run(force: bool = False) -> dict:
+        context = RetrainContext(
+            site_id=7,
+            telemetry_loader=lambda _: telemetry,
+            equipment_loader=lambda _: equipment,
+            minio_endpoint="http://localhost:9000",
+            minio_access_key="test",
+            minio_secret_key="test",
+            registry_path=tmp_path / "registry.db",
+            force=force,
+        )
+        pipeline = RetrainPipeline(context)
+        fit = pipeline.forecaster.fit
+        pipeline.forecaster.fit = lambda df: fit(df, epochs=1)  # type: ignore
+        pipeline.forecaster.export_artifacts = lambda: {}  # type: ignore
+        pipeline._upload_artifacts = lambda artifacts: {}  # type: ignore
+        return pipeline.run()
+
+    first = run()
+    second = run()
+    assert first["forecast_retrained"] == 1.0 and second["forecast_retrained"] == 0.0
+    assert first["forecast_promoted"] == 1.0 and second["forecast_promoted"] == 0.0
+    assert second["optimization_retrained"] == 0.0
+    assert second["forecast_mae"] == first["forecast_mae"]
+    assert run(force=True)["forecast_retrained"] == 1.0
+
+    conn = sqlite3.connect(tmp_path / "registry.db")
+    count = conn.execute("SELECT COUNT(*) FROM models_registry WHERE site_id = 7").fetchone()[0]
+    conn.close()
+    assert count == 4
+
+
+def test_promotion_compares_only_backtested_mae(tmp_path):
+    context = RetrainContext(
+        site_id=5,
+        telemetry_loader=lambda _: None,
+        equipment_loader=lambda _: [],
+        minio_endpoint="http://localhost:9000",
+        minio_access_key="test",
+        minio_secret_key="test",
+        registry_path=tmp_path / "registry.db",
+    )
+    pipeline = RetrainPipeline(context)
+    registry = pipeline.registry
+    # an older production version scored in-sample looks better than any held-out error
+    legacy = registry.record("intelligent_forecaster", 5, 0.5, "{}", summary={"mae": 0.5})
+    registry.promote(legacy)
+
+    candidate = registry.record("intelligent_forecaster", 5, 4.0, "{}", summary={"validation": "backtest"})
+    assert pipeline._maybe_promote("intelligent_forecaster", candidate, 4.0, "backtest")
+    worse = registry.record("intelligent_forecaster", 5, 5.0, "{}", summary={"validation": "backtest"})
+    assert not pipeline._maybe_promote("intelligent_forecaster", worse, 5.0, "backtest")
+    unvalidated = registry.record("intelligent_forecaster", 5, 1.0, "{}", summary={"validation": "in_sample"})
+    assert not pipeline._maybe_promote("intelligent_forecaster", unvalidated, 1.0, "in_sample")
+    assert registry.production("intelligent_forecaster", 5).id == candidate  # type: ignore[union-attr]
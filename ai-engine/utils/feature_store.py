@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.resample import resample_hourly
+
+CALENDAR_COLUMNS = ("hour", "dayofweek", "sin_hour", "cos_hour")
+_WATERMARK = "_watermark.json"
+
+
+def add_calendar_features(df: pd.DataFrame) -> pd.DataFrame:
+    """Hour-of-day/day-of-week features shared by the forecaster and the feature store."""
+    df["hour"] = df["timestamp"].dt.hour
+    df["dayofweek"] = df["timestamp"].dt.dayofweek
+    df["sin_hour"] = np.sin(2 * math.pi * df["hour"] / 24)
+    df["cos_hour"] = np.cos(2 * math.pi * df["hour"] / 24)
+    return df
+
+
+def is_hourly_feature_frame(df: pd.DataFrame) -> bool:
+    """Whether ``df`` is a gap-free hourly grid that already carries the calendar features."""
+    if df.empty or not {"timestamp", "energy_kwh", *CALENDAR_COLUMNS} <= set(df.columns):
+        return False
+    steps = pd.to_datetime(df["timestamp"]).diff().iloc[1:]
+    return bool((steps == pd.Timedelta(hours=1)).all() and df["energy_kwh"].notna().all())
+
+
+def hourly_features(telemetry: pd.DataFrame) -> pd.DataFrame:
+    return add_calendar_features(resample_hourly(telemetry))
+
+
+class FeatureStore:
+    """
+    Append-only hourly feature tables on local disk, one per entity (``site`` or ``device``) and key.
+    Rows are written as Parquet files partitioned by month under
+    ``<root>/<entity>=<key>/month=YYYY-MM/``; a watermark records the last materialized hour, so
+    each append derives features only for the new range (anchored on the last stored hour, so a gap
+    since the watermark is interpolated) and reads are served memory-mapped without touching the
+    telemetry source.
+    """
+
+    def __init__(self, root: Path | str) -> None:
+        self.root = Path(root)
+        self._lock = threading.Lock()
+
+    def _table_dir(self, entity: str, key: object) -> Path:
+        return self.root / f"{entity}={key}"
+
+    def latest_timestamp(self, entity: str, key: object) -> Optional[pd.Timestamp]:
+        path = self._table_dir(entity, key) / _WATERMARK
+        if not path.exists():
+            return None
+        return pd.Timestamp(json.loads(path.read_text(encoding="utf-8"))["last_timestamp"])
+
+    def append(
+        self,
+        entity: str,
+        key: object,
+        telemetry: pd.DataFrame,
+        until: Optional[pd.Timestamp] = None,
+    ) -> int:
+        """
+        Materialize features for telemetry newer than the watermark and return the rows written.
+        ``until`` excludes a still-filling hour (e.g. the current one) so it is never frozen half-summed.
+        """
+        if telemetry.empty:
+            return 0
+        raw = telemetry[["timestamp", "energy_kwh"]].copy()
+        raw["timestamp"] = pd.to_datetime(raw["timestamp"])
+        with self._lock:
+            watermark = self.latest_timestamp(entity, key)
+            if watermark is not None:
+                raw = raw[raw["timestamp"] >= watermark + pd.Timedelta(hours=1)]
+            if until is not None:
+                raw = raw[raw["timestamp"] < until]
+            if raw.empty:
+                return 0
+
+            if watermark is not None:
+                tail = self.read(entity, key, start=watermark, columns=["energy_kwh"])
+                if not tail.empty:
+                    raw = pd.concat([tail, raw], ignore_index=True)
+            features = hourly_features(raw)
+            if watermark is not None:
+                features = features[features["timestamp"] > watermark]
+            if features.empty:
+                return 0
+            self._write(entity, key, features)
+            self._write_watermark(entity, key, features["timestamp"].iloc[-1])
+            return len(features)
+
+    def _write(self, entity: str, key: object, features: pd.DataFrame) -> None:
+        table_dir = self._table_dir(entity, key)
+        for month, part in features.groupby(features["timestamp"].dt.strftime("%Y-%m"), sort=True):
+            partition = table_dir / f"month={month}"
+            partition.mkdir(parents=True, exist_ok=True)
+            first, last = part["timestamp"].iloc[0], part["timestamp"].iloc[-1]
+            path = partition / f"part-{first:%Y%m%d%H}-{last:%Y%m%d%H}.parquet"
+            tmp_path = path.with_suffix(".tmp")
+            pq.write_table(pa.Table.from_pandas(part.reset_index(drop=True), preserve_index=False), tmp_path)
+            os.replace(tmp_path, path)
+
+    def _write_watermark(self, entity: str, key: object, timestamp: pd.Timestamp) -> None:
+        path = self._table_dir(entity, key) / _WATERMARK
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"last_timestamp": pd.Timestamp(timestamp).isoformat()}), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def read(
+        self,
+        entity: str,
+        key: object,
+        start: Optional[pd.Timestamp] = None,
+        end: Optional[pd.Timestamp] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """Memory-mapped read of ``[start, end)``, skipping month partitions outside the range."""
+        table_dir = self._table_dir(entity, key)
+        wanted = None if columns is None else ["timestamp", *[column for column in columns if column != "timestamp"]]
+        tables: List[pa.Table] = []
+        for partition in sorted(table_dir.glob("month=*")):
+            month = pd.Period(partition.name.split("=", 1)[1], freq="M")
+            if start is not None and month.end_time < start:
+                continue
+            if end is not None and month.start_time >= end:
+                continue
+            for path in sorted(partition.glob("*.parquet")):
+                tables.append(pq.read_table(path, columns=wanted, memory_map=True))
+        if not tables:
+            return pd.DataFrame(columns=wanted or ["timestamp", "energy_kwh", *CALENDAR_COLUMNS])
+        df = pa.concat_tables(tables).to_pandas()
+        if start is not None:
+            df = df[df["timestamp"] >= start]
+        if end is not None:
+            df = df[df["timestamp"] < end]
+        return df.sort_values("timestamp").reset_index(drop=True)
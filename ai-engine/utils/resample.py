@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import pandas as pd
+
+
+def resample_hourly(telemetry: pd.DataFrame) -> pd.DataFrame:
+    """
+    Collapse energy telemetry onto an hourly grid expected by the forecasters.
+    Samples are summed per hour bucket and hours missing between known buckets are
+    interpolated, so already-hourly input passes through unchanged.
+    """
+    if "timestamp" not in telemetry.columns:
+        raise ValueError("telemetry must contain 'timestamp'")
+    if "energy_kwh" not in telemetry.columns:
+        raise ValueError("telemetry must contain 'energy_kwh'")
+    if telemetry.empty:
+        return pd.DataFrame({"timestamp": pd.to_datetime([]), "energy_kwh": []})
+
+    series = pd.Series(
+        telemetry["energy_kwh"].astype(float).to_numpy(),
+        index=pd.to_datetime(telemetry["timestamp"]),
+    ).sort_index()
+    hourly = series.resample("h").sum(min_count=1)
+    hourly = hourly.interpolate(method="time", limit_area="inside")
+    return hourly.rename("energy_kwh").rename_axis("timestamp").reset_index()
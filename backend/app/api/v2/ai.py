@@ -1,16 +1,24 @@
 from __future__ import annotations
 
+from collections import defaultdict
 from datetime import datetime, timedelta
-from typing import List
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, text
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
 from ...api.deps import get_current_user, oauth2_scheme
+from ...core.config import settings
 from ...db import models
 from ...db.session import get_db
 from ...services import ai_bridge
+from ...services.aggregator import PowerSample, fill_hourly_gaps, hourly_energy
 from .schemas import (
+    ForecastAccuracyEntry,
+    ForecastAccuracyResponse,
     ForecastCombinedRequest,
     ForecastCombinedResponse,
     ForecastComponent,
@@ -29,29 +37,150 @@ from .schemas import (
 router = APIRouter(tags=["ai"])
 
 
-def _collect_telemetry(site_id: int, db: Session, lookback_hours: int) -> List[TelemetryPoint]:
-    cutoff = datetime.utcnow() - timedelta(hours=lookback_hours)
+_ENERGY_METRICS = {"energy_kwh", "energy"}
+_POWER_METRICS = {"power", "w"}
+_HOURLY_AGGREGATE_QUERY = text(
+    """
+    SELECT agg.bucket AS bucket, SUM(agg.avg_power) / 1000.0 AS energy_kwh
+    FROM telemetry_1h AS agg
+    JOIN device ON device.device_id = agg.device_id
+    WHERE device.site_id = :site_id AND agg.bucket >= :cutoff
+    GROUP BY agg.bucket
+    ORDER BY agg.bucket
+    """
+)
+
+
+def _hourly_from_aggregate(site_id: int, db: Session, cutoff: datetime) -> Dict[datetime, float]:
+    try:
+        rows = db.execute(_HOURLY_AGGREGATE_QUERY, {"site_id": site_id, "cutoff": cutoff}).all()
+    except SQLAlchemyError:
+        # Continuous aggregate only exists on TimescaleDB deployments
+        db.rollback()
+        return {}
+    return {row.bucket.replace(tzinfo=None): float(row.energy_kwh) for row in rows if row.energy_kwh is not None}
+
+
+def _hourly_from_raw(site_id: int, db: Session, cutoff: datetime) -> Dict[datetime, float]:
     query = (
-        db.query(models.Telemetry)
+        db.query(models.Telemetry.device_id, models.Telemetry.timestamp, models.Telemetry.metric, models.Telemetry.value)
         .join(models.Device)
         .filter(models.Device.site_id == site_id)
         .filter(models.Telemetry.timestamp >= cutoff)
-        .order_by(models.Telemetry.timestamp.desc())
+        .filter(func.lower(models.Telemetry.metric).in_(_ENERGY_METRICS | _POWER_METRICS))
+        .order_by(models.Telemetry.timestamp.asc())
     )
-    records = query.limit(lookback_hours * 4).all()  # allow up to 15 min cadence
-    if not records:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No telemetry available for site")
-
-    points: List[TelemetryPoint] = []
-    for rec in reversed(records):
-        metric = rec.metric.lower()
-        if metric in {"energy_kwh", "energy"}:
-            energy = float(rec.value)
-        elif metric in {"power", "w"}:
-            energy = float(rec.value) / 1000.0
+    buckets: Dict[datetime, float] = defaultdict(float)
+    power_by_device: Dict[int, List[PowerSample]] = defaultdict(list)
+    for device_id, timestamp, metric, value in query:
+        if metric.lower() in _ENERGY_METRICS:
+            buckets[timestamp.replace(minute=0, second=0, microsecond=0)] += float(value)
         else:
-            continue
-        points.append(TelemetryPoint(timestamp=rec.timestamp, energy_kwh=energy))
+            power_by_device[device_id].append(PowerSample(timestamp, float(value)))
+    # Integrate each meter separately; interleaved samples from different devices are not one curve
+    for samples in power_by_device.values():
+        for bucket, energy in hourly_energy(samples).items():
+            buckets[bucket] += energy
+    return buckets
+
+
+def _precomputed_forecast(site_id: int, horizon_hours: int, db: Session) -> Optional[ForecastCombinedResponse]:
+    """
+    The stored forecast for the next ``horizon_hours``, or None unless it starts at the current
+    hour, covers every following hour and was issued within ``FORECAST_MAX_AGE_HOURS``.
+    """
+    now = datetime.utcnow()
+    start = now.replace(minute=0, second=0, microsecond=0)
+    rows = (
+        db.query(models.ForecastEnergy)
+        .filter(models.ForecastEnergy.site_id == site_id)
+        .filter(models.ForecastEnergy.timestamp >= start)
+        .order_by(models.ForecastEnergy.timestamp.asc())
+        .limit(horizon_hours)
+        .all()
+    )
+    if len(rows) < horizon_hours or rows[0].timestamp != start:
+        return None
+    if any(later.timestamp - earlier.timestamp != timedelta(hours=1) for earlier, later in zip(rows, rows[1:])):
+        return None
+    oldest = now - timedelta(hours=settings.FORECAST_MAX_AGE_HOURS)
+    if any(row.issued_at is None or row.issued_at < oldest for row in rows):
+        return None
+    return ForecastCombinedResponse(
+        site_id=site_id,
+        horizon_hours=horizon_hours,
+        points=[
+            ForecastComponent(
+                timestamp=row.timestamp,
+                prediction=row.predicted_kwh,
+                lower=row.lower_kwh if row.lower_kwh is not None else row.predicted_kwh,
+                upper=row.upper_kwh if row.upper_kwh is not None else row.predicted_kwh,
+                components={},
+            )
+            for row in rows
+        ],
+        metrics={},
+        recent_actuals=[],
+        source="precomputed",
+        model_version=rows[0].model_version,
+    )
+
+
+@router.get("/forecast/accuracy", response_model=ForecastAccuracyResponse)
+def forecast_accuracy(
+    site_id: int,
+    days: int = Query(7, ge=1, le=90),
+    db: Session = Depends(get_db),
+    _user: models.User = Depends(get_current_user),
+):
+    """Rolling error of the precomputed forecasts against telemetry_1h, per lead-time bucket."""
+    start = datetime.utcnow().date() - timedelta(days=days - 1)
+    table = models.ForecastAccuracyDaily
+    samples = func.sum(table.samples)
+    pct_samples = func.sum(table.pct_samples)
+    try:
+        rows = (
+            db.query(
+                table.horizon_hours,
+                samples.label("samples"),
+                func.sum(table.abs_error_sum).label("abs_error_sum"),
+                pct_samples.label("pct_samples"),
+                func.sum(table.pct_error_sum).label("pct_error_sum"),
+            )
+            .filter(table.site_id == site_id, table.day >= start)
+            .group_by(table.horizon_hours)
+            .order_by(table.horizon_hours)
+            .all()
+        )
+    except SQLAlchemyError:
+        # the table appears once the ai-engine accuracy job has run
+        db.rollback()
+        rows = []
+    return ForecastAccuracyResponse(
+        site_id=site_id,
+        days=days,
+        horizons=[
+            ForecastAccuracyEntry(
+                horizon_hours=row.horizon_hours,
+                samples=row.samples,
+                mae=row.abs_error_sum / row.samples,
+                mape=row.pct_error_sum / row.pct_samples if row.pct_samples else None,
+            )
+            for row in rows
+            if row.samples
+        ],
+    )
+
+
+def _collect_telemetry(site_id: int, db: Session, lookback_hours: int) -> List[TelemetryPoint]:
+    cutoff = datetime.utcnow() - timedelta(hours=lookback_hours)
+    buckets = _hourly_from_aggregate(site_id, db, cutoff) or _hourly_from_raw(site_id, db, cutoff)
+    if not buckets:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No energy telemetry available for site")
+
+    # idle hours are real zeros and stay in the series; only hours without any reading were left out
+    # of ``buckets``, and those are interpolated
+    points = [TelemetryPoint(timestamp=bucket, energy_kwh=energy) for bucket, energy in fill_hourly_gaps(buckets)]
     if not points:
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Site lacks energy telemetry")
     return points
@@ -64,6 +193,10 @@ async def forecast_combined(
     _user: models.User = Depends(get_current_user),
     token: str = Depends(oauth2_scheme),
 ):
+    if not payload.live and payload.telemetry is None:
+        precomputed = _precomputed_forecast(payload.site_id, payload.horizon_hours, db)
+        if precomputed is not None:
+            return precomputed
     telemetry = payload.telemetry or _collect_telemetry(payload.site_id, db, payload.lookback_hours)
     serialized = [
         {
@@ -104,6 +237,7 @@ async def forecast_combined(
         points=points,
         metrics=metrics,
         recent_actuals=recent_actuals,
+        model_version=response.get("model_version"),
     )
 
 
@@ -141,6 +275,20 @@ async def generate_insight(
     return InsightResponse(site_id=payload.site_id, insight=response.get("insight", ""), confidence=response.get("confidence", 0.0))
 
 
+@router.post("/insights/stream")
+async def stream_insight(
+    payload: InsightRequest,
+    _user: models.User = Depends(get_current_user),
+    token: str = Depends(oauth2_scheme),
+):
+    chunks = await ai_bridge.stream_insight(payload.dict(), token)
+    return StreamingResponse(
+        chunks,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/models/retrain", response_model=RetrainResponse)
 async def retrain_models(
     payload: RetrainRequest,
@@ -8,7 +8,7 @@ from pydantic import BaseModel, Field
 
 class TelemetryPoint(BaseModel):
     timestamp: datetime
-    energy_kwh: float = Field(..., gt=0)
+    energy_kwh: float = Field(..., ge=0)
 
 
 class ForecastCombinedRequest(BaseModel):
@@ -16,6 +16,8 @@ class ForecastCombinedRequest(BaseModel):
     horizon_hours: int = Field(24, ge=1, le=168)
     lookback_hours: int = Field(24 * 7, ge=24, le=24 * 30)
     telemetry: Optional[List[TelemetryPoint]] = None
+    # recompute with the forecast service instead of reading the precomputed forecast_energy rows
+    live: bool = False
 
 
 class ForecastComponent(BaseModel):
@@ -32,6 +34,21 @@ class ForecastCombinedResponse(BaseModel):
     points: List[ForecastComponent]
     metrics: Dict[str, float]
     recent_actuals: List[TelemetryPoint]
+    source: str = "live"
+    model_version: Optional[str] = None
+
+
+class ForecastAccuracyEntry(BaseModel):
+    horizon_hours: int
+    samples: int
+    mae: float
+    mape: Optional[float] = None
+
+
+class ForecastAccuracyResponse(BaseModel):
+    site_id: int
+    days: int
+    horizons: List[ForecastAccuracyEntry]
 
 
 class EquipmentConfigPayload(BaseModel):
@@ -38,6 +38,9 @@ class Settings(BaseSettings):
             path=values.get("POSTGRES_DB") or "",
         ).unicode_string()
 
+    # Precomputed forecasts older than this are ignored in favour of a live forecast
+    FORECAST_MAX_AGE_HOURS: int = 36
+
     # MQTT
     MQTT_BROKER_HOST: str = "localhost"
     MQTT_BROKER_PORT: int = 1883
@@ -3,6 +3,7 @@ import logging
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy import text
 from app.core.config import settings
+from app.db import models
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -25,6 +26,18 @@ async def init_db():
             logger.warning(f"Hypertable creation warning: {e}")
 
         # 3. Create Continuous Aggregate: Hourly
+        # IF NOT EXISTS keeps an aggregate created before avg_power was added, so recreate it then
+        existing = await conn.execute(text("SELECT to_regclass('telemetry_1h') IS NOT NULL"))
+        if existing.scalar():
+            has_avg_power = await conn.execute(text("""
+                SELECT EXISTS (
+                    SELECT 1 FROM pg_attribute
+                    WHERE attrelid = 'telemetry_1h'::regclass AND attname = 'avg_power' AND NOT attisdropped
+                )
+            """))
+            if not has_avg_power.scalar():
+                logger.warning("telemetry_1h lacks avg_power; recreating the continuous aggregate.")
+                await conn.execute(text("DROP MATERIALIZED VIEW telemetry_1h CASCADE;"))
         await conn.execute(text("""
             CREATE MATERIALIZED VIEW IF NOT EXISTS telemetry_1h
             WITH (timescaledb.continuous) AS
@@ -36,6 +49,7 @@ async def init_db():
                 MIN(temperature) as min_temp,
                 AVG(pressure) as avg_pressure,
                 AVG(vibration) as avg_vibration,
+                AVG(power_usage) as avg_power,
                 SUM(power_usage) as total_power
             FROM telemetry
             GROUP BY bucket, device_id;
@@ -65,6 +79,36 @@ async def init_db():
         except Exception as e:
             logger.warning(f"Retention policy warning: {e}")
 
+        # 6. Precomputed forecasts: columns and (site_id, timestamp) key added after the first release
+        try:
+            await conn.execute(text("""
+                ALTER TABLE forecast_energy
+                    ADD COLUMN IF NOT EXISTS lower_kwh DOUBLE PRECISION,
+                    ADD COLUMN IF NOT EXISTS upper_kwh DOUBLE PRECISION,
+                    ADD COLUMN IF NOT EXISTS issued_at TIMESTAMP,
+                    ADD COLUMN IF NOT EXISTS model_version VARCHAR(64);
+            """))
+            await conn.execute(text("""
+                CREATE UNIQUE INDEX IF NOT EXISTS uq_forecast_energy_site_timestamp
+                    ON forecast_energy (site_id, timestamp);
+            """))
+            logger.info("forecast_energy migrated.")
+        except Exception as e:
+            logger.warning(f"forecast_energy migration warning: {e}")
+
+        # 7. Tables written by the ai-engine forecast jobs, added after the first release
+        await conn.run_sync(
+            lambda sync_conn: models.Base.metadata.create_all(
+                sync_conn,
+                tables=[
+                    models.ForecastEnergySuperseded.__table__,
+                    models.ForecastAccuracyDaily.__table__,
+                    models.ForecastAccuracyState.__table__,
+                ],
+            )
+        )
+        logger.info("Forecast superseded and accuracy tables ensured.")
+
     await engine.dispose()
 
 if __name__ == "__main__":
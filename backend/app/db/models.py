@@ -5,6 +5,7 @@ from typing import Optional
 
 from sqlalchemy import (
     Column,
+    Date,
     DateTime,
     Enum,
     Float,
@@ -121,16 +122,55 @@ class WasteRecord(Base):
 
 class ForecastEnergy(Base):
     __tablename__ = "forecast_energy"
+    # one row per site and hour; also serves the dashboard's (site_id, timestamp) range reads
+    __table_args__ = (UniqueConstraint("site_id", "timestamp", name="uq_forecast_energy_site_timestamp"),)
 
     id = Column(Integer, primary_key=True)
     site_id = Column(Integer, ForeignKey("sites.id"), nullable=False, index=True)
     timestamp = Column(DateTime, nullable=False, index=True)
     predicted_kwh = Column(Float, nullable=False)
     predicted_co2 = Column(Float, nullable=False)
+    lower_kwh = Column(Float, nullable=True)
+    upper_kwh = Column(Float, nullable=True)
+    issued_at = Column(DateTime, nullable=True)
+    model_version = Column(String(64), nullable=True)
 
     site = relationship("Site", back_populates="forecasts")
 
 
+class ForecastEnergySuperseded(Base):
+    __tablename__ = "forecast_energy_superseded"
+    # predictions a newer horizon replaced, one row per issue, kept by the ai-engine until the
+    # accuracy job has scored their hour so leads past the retrain interval are measured
+
+    site_id = Column(Integer, primary_key=True)
+    timestamp = Column(DateTime, primary_key=True)
+    issued_at = Column(DateTime, primary_key=True)
+    predicted_kwh = Column(Float, nullable=False)
+    model_version = Column(String(64), nullable=True)
+
+
+class ForecastAccuracyDaily(Base):
+    __tablename__ = "forecast_accuracy_daily"
+    # per-day error sums by lead-time bucket, maintained incrementally by the ai-engine accuracy job
+
+    site_id = Column(Integer, primary_key=True)
+    horizon_hours = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    samples = Column(Integer, nullable=False)
+    abs_error_sum = Column(Float, nullable=False)
+    pct_samples = Column(Integer, nullable=False)
+    pct_error_sum = Column(Float, nullable=False)
+
+
+class ForecastAccuracyState(Base):
+    __tablename__ = "forecast_accuracy_state"
+    # the accuracy job's watermark: the newest telemetry_1h bucket it has scored
+
+    name = Column(String(64), primary_key=True)
+    watermark = Column(DateTime, nullable=False)
+
+
 class AlertRule(Base):
     __tablename__ = "alert_rules"
 
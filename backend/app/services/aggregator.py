@@ -1,6 +1,7 @@
-from collections.abc import Sequence
+from collections import defaultdict
+from collections.abc import Mapping, Sequence
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Iterable
 
 from ..core.config import get_settings
@@ -27,6 +28,61 @@ def integrate_energy(samples: Sequence[PowerSample]) -> float:
     return total_wh / 1000.0
 
 
+def _floor_hour(timestamp: datetime) -> datetime:
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+def hourly_energy(samples: Sequence[PowerSample]) -> dict[datetime, float]:
+    """
+    Integrate watt samples of a single meter into hourly kWh buckets keyed by bucket start.
+    Power is interpolated linearly between samples, so intervals spanning several hours are
+    split across buckets and hours without samples are gap-filled. Edge buckets that are only
+    partly covered are scaled to the mean power over the covered span.
+    """
+    if len(samples) < 2:
+        return {}
+
+    sorted_samples = sorted(samples, key=lambda s: s.timestamp)
+    bucket_wh: dict[datetime, float] = defaultdict(float)
+    bucket_seconds: dict[datetime, float] = defaultdict(float)
+    for prev, curr in zip(sorted_samples, sorted_samples[1:]):
+        span = (curr.timestamp - prev.timestamp).total_seconds()
+        if span <= 0:
+            continue
+        slope = (curr.watts - prev.watts) / span
+        seg_start = prev.timestamp
+        while seg_start < curr.timestamp:
+            bucket = _floor_hour(seg_start)
+            seg_end = min(bucket + timedelta(hours=1), curr.timestamp)
+            start_watts = prev.watts + slope * (seg_start - prev.timestamp).total_seconds()
+            end_watts = prev.watts + slope * (seg_end - prev.timestamp).total_seconds()
+            seconds = (seg_end - seg_start).total_seconds()
+            bucket_wh[bucket] += ((start_watts + end_watts) / 2.0) * (seconds / 3600.0)
+            bucket_seconds[bucket] += seconds
+            seg_start = seg_end
+
+    return {
+        bucket: bucket_wh[bucket] * (3600.0 / bucket_seconds[bucket]) / 1000.0
+        for bucket in sorted(bucket_wh)
+        if bucket_seconds[bucket] > 0
+    }
+
+
+def fill_hourly_gaps(buckets: Mapping[datetime, float]) -> list[tuple[datetime, float]]:
+    """Return a contiguous hourly series, linearly interpolating hours missing between known buckets."""
+    if not buckets:
+        return []
+
+    known = sorted(buckets.items())
+    series: list[tuple[datetime, float]] = []
+    for (start, start_kwh), (end, end_kwh) in zip(known, known[1:]):
+        steps = int((end - start).total_seconds() // 3600)
+        for step in range(steps):
+            series.append((start + timedelta(hours=step), start_kwh + (end_kwh - start_kwh) * step / steps))
+    series.append(known[-1])
+    return series
+
+
 def summarize_telemetry(records: Iterable[dict]) -> dict[str, float]:
     """
     Accepts raw telemetry records and produces aggregate totals for energy, emissions, waste.
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, Optional
 
 import httpx
 from fastapi import HTTPException, status
@@ -54,3 +54,38 @@ async def trigger_retrain(payload: dict[str, Any], token: Optional[str]) -> Dict
 
 async def fetch_models(token: Optional[str]) -> Dict[str, Any]:
     return await _request("GET", settings.ai_retrain_url, "/api/v2/models/list", None, token)
+
+
+async def stream_insight(payload: dict[str, Any], token: Optional[str]) -> AsyncIterator[bytes]:
+    """
+    Open the insight SSE stream before returning so upstream errors still surface as HTTP errors,
+    then relay raw event bytes as they arrive.
+    """
+    headers = {"Accept": "text/event-stream"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    # generation on CPU can pause between tokens, so only the connect phase is kept short
+    client = httpx.AsyncClient(timeout=httpx.Timeout(60.0, connect=5.0))
+    url = f"{settings.ai_insights_url.rstrip('/')}/api/v2/insights/stream"
+    try:
+        response = await client.send(client.build_request("POST", url, json=payload, headers=headers), stream=True)
+    except httpx.RequestError as exc:
+        await client.aclose()
+        logger.error("AI engine request to %s failed: %s", url, exc)
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="AI service unavailable") from exc
+    if response.status_code >= 400:
+        body = await response.aread()
+        await response.aclose()
+        await client.aclose()
+        logger.warning("AI engine error %s: %s", response.status_code, body)
+        raise HTTPException(status_code=response.status_code, detail=body.decode("utf-8", errors="replace"))
+
+    async def relay() -> AsyncIterator[bytes]:
+        try:
+            async for chunk in response.aiter_raw():
+                yield chunk
+        finally:
+            await response.aclose()
+            await client.aclose()
+
+    return relay()
@@ -1,6 +1,6 @@
 from datetime import datetime, timedelta
 
-from backend.app.services.aggregator import PowerSample, integrate_energy
+from backend.app.services.aggregator import PowerSample, fill_hourly_gaps, hourly_energy, integrate_energy
 
 
 def test_integrate_energy_trapezoidal():
@@ -21,3 +21,22 @@ def test_integrate_energy_trapezoidal():
 def test_integrate_with_insufficient_samples():
     energy = integrate_energy([])
     assert energy == 0.0
+
+
+def test_hourly_energy_splits_intervals_across_buckets():
+    base = datetime(2024, 1, 1, 10, 30)
+    samples = [
+        PowerSample(timestamp=base, watts=1000),
+        PowerSample(timestamp=base + timedelta(hours=1), watts=1000),
+    ]
+    buckets = hourly_energy(samples)
+    assert list(buckets) == [datetime(2024, 1, 1, 10), datetime(2024, 1, 1, 11)]
+    # each half-covered edge bucket is scaled to a full hour at the mean power
+    assert all(abs(kwh - 1.0) < 1e-6 for kwh in buckets.values())
+
+
+def test_fill_hourly_gaps_interpolates_missing_hours():
+    start = datetime(2024, 1, 1, 0)
+    series = fill_hourly_gaps({start: 1.0, start + timedelta(hours=3): 4.0})
+    assert [ts.hour for ts, _ in series] == [0, 1, 2, 3]
+    assert [kwh for _, kwh in series] == [1.0, 2.0, 3.0, 4.0]
@@ -8,3 +8,15 @@ app.kubernetes.io/instance: {{ .Release.Name }}
 app.kubernetes.io/version: {{ .Chart.AppVersion }}
 app.kubernetes.io/managed-by: Helm
 {{- end -}}
+
+{{- define "zerocraftr-ai.registryAffinity" -}}
+# pods sharing the SQLite registry volume must run on the retrain pod's node
+affinity:
+  podAffinity:
+    requiredDuringSchedulingIgnoredDuringExecution:
+      - labelSelector:
+          matchLabels:
+            zerocraftr.ai/component: retrain
+            app.kubernetes.io/instance: {{ .Release.Name }}
+        topologyKey: kubernetes.io/hostname
+{{- end -}}
@@ -1,23 +1,78 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI
+from pydantic import BaseModel, Field
+import mlflow
 import mlflow.lightgbm
 import pandas as pd
 import numpy as np
 import os
+import threading
 
 app = FastAPI()
 
-# Load model on startup
+FEATURES = ['hour', 'day', 'prev_temp', 'prev_pressure']
+# A local MLflow model directory (e.g. a downloaded artifact) wins over the registry URI
+MODEL_PATH = os.getenv("MODEL_PATH")
+# train_real.py registers every run and moves the "production" alias to the best one
+MODEL_URI = os.getenv("MODEL_URI", "models:/zerocraftr-forecasting-real@production")
+RELOAD_INTERVAL = float(os.getenv("MODEL_RELOAD_INTERVAL", "60"))
+
 model = None
-try:
-    mlflow_uri = os.getenv("MLFLOW_TRACKING_URI", "http://localhost:5000")
-    mlflow.set_tracking_uri(mlflow_uri)
-    # In production, this would load from MLflow Model Registry
-    # For local dev, we might need to point to a specific run or use a local path
-    # model = mlflow.lightgbm.load_model("models:/zerocraftr-forecasting-real/Production")
-    pass
-except Exception as e:
-    print(f"Warning: Could not load model: {e}")
+model_version = None
+_stop = threading.Event()
+
+
+def resolve_version():
+    """Cheap identifier of what is currently published, so reloads only happen on promotion."""
+    if MODEL_PATH:
+        mlmodel = os.path.join(MODEL_PATH, "MLmodel")
+        return str(os.stat(mlmodel).st_mtime_ns) if os.path.exists(mlmodel) else None
+    if MODEL_URI.startswith("models:/"):
+        reference = MODEL_URI[len("models:/"):]
+        if "@" in reference:
+            name, _, alias = reference.partition("@")
+            try:
+                return mlflow.MlflowClient().get_model_version_by_alias(name, alias).version
+            except mlflow.exceptions.MlflowException:
+                # nothing promoted yet
+                return None
+        name, _, version = reference.partition("/")
+        if version.isdigit():
+            return version
+    return MODEL_URI
+
+
+def refresh_model():
+    """Load the published model when its version differs from the one being served."""
+    global model, model_version
+    try:
+        version = resolve_version()
+        if version is None or version == model_version:
+            return
+        loaded = mlflow.lightgbm.load_model(MODEL_PATH or MODEL_URI)
+        # Single reference swap: in-flight requests keep the model they already read
+        model, model_version = loaded, version
+        print(f"Loaded model {MODEL_PATH or MODEL_URI} (version {version})")
+    except Exception as e:
+        print(f"Warning: Could not load model: {e}")
+
+
+def _reload_loop():
+    while not _stop.wait(RELOAD_INTERVAL):
+        refresh_model()
+
+
+@app.on_event("startup")
+def load_on_startup():
+    mlflow.set_tracking_uri(os.getenv("MLFLOW_TRACKING_URI", "http://localhost:5000"))
+    refresh_model()
+    if RELOAD_INTERVAL > 0:
+        threading.Thread(target=_reload_loop, name="model-reload", daemon=True).start()
+
+
+@app.on_event("shutdown")
+def stop_reload():
+    _stop.set()
+
 
 class InferenceInput(BaseModel):
     hour: int
@@ -25,34 +80,60 @@ class InferenceInput(BaseModel):
     prev_temp: float
     prev_pressure: float
 
+class BatchInferenceInput(BaseModel):
+    rows: list[InferenceInput] = Field(min_length=1)
+
 class OptimizationOutput(BaseModel):
     predicted_temp: float
     recommendation: str
     confidence_interval: list[float]
 
-@app.post("/predict", response_model=OptimizationOutput)
-def predict(input_data: InferenceInput):
-    # Mock prediction if model not loaded
-    if model:
-        df = pd.DataFrame([input_data.model_dump()])
-        prediction = model.predict(df)[0]
-    else:
-        # Simple heuristic for fallback
-        prediction = input_data.prev_temp * 0.9 + 2.0
-    
+class BatchOptimizationOutput(BaseModel):
+    model_version: str | None
+    predictions: list[OptimizationOutput]
+
+
+def predict_frame(df: pd.DataFrame) -> np.ndarray:
+    current = model
+    if current is not None:
+        return np.asarray(current.predict(df[FEATURES]), dtype=float)
+    # Simple heuristic for fallback
+    return df['prev_temp'].to_numpy(dtype=float) * 0.9 + 2.0
+
+
+def to_output(prediction: float) -> OptimizationOutput:
     # Optimization Logic
     recommendation = "Normal Operation"
     if prediction > 30.0:
         recommendation = "High Temperature Alert: Reduce Load by 20%"
     elif prediction < 10.0:
         recommendation = "Low Temperature Alert: Check Heating Systems"
-        
+
     # Mock Confidence Interval (+/- 10%)
-    lower_bound = prediction * 0.9
-    upper_bound = prediction * 1.1
-    
-    return {
-        "predicted_temp": prediction,
-        "recommendation": recommendation,
-        "confidence_interval": [lower_bound, upper_bound]
-    }
+    return OptimizationOutput(
+        predicted_temp=prediction,
+        recommendation=recommendation,
+        confidence_interval=[prediction * 0.9, prediction * 1.1],
+    )
+
+
+@app.post("/predict", response_model=OptimizationOutput)
+def predict(input_data: InferenceInput):
+    df = pd.DataFrame([input_data.model_dump()])
+    return to_output(float(predict_frame(df)[0]))
+
+
+@app.post("/predict/batch", response_model=BatchOptimizationOutput)
+def predict_batch(batch: BatchInferenceInput):
+    # One frame and one model call for the whole batch
+    df = pd.DataFrame({name: [getattr(row, name) for row in batch.rows] for name in FEATURES})
+    predictions = predict_frame(df)
+    return BatchOptimizationOutput(
+        model_version=model_version,
+        predictions=[to_output(float(value)) for value in predictions],
+    )
+
+
+@app.get("/health")
+def health():
+    return {"status": "ok", "model_loaded": model is not None, "model_version": model_version}